@@ -0,0 +1,83 @@
+# benchmarks/bench_extractor.py
+"""
+Compare the old full-page regex + json.loads path with the streaming extractor.
+
+Usage:
+    python -m benchmarks.bench_extractor [saved_page.html ...]
+
+Without arguments the search page in tests/fixtures is used; pass other saved
+YouTube result pages to benchmark against those.
+"""
+from typing import Callable, Dict, List
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+from src.extractor import iter_renderers
+
+MAX_RESULTS = 5
+CHUNK_SIZE = 64 * 1024
+ROUNDS = 20
+
+SEARCH_PAGE = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "fixtures", "search-python-tutorial.html")
+
+
+def legacy_extract(page: bytes) -> List[str]:
+    """The pre-streaming implementation from search_youtube_videos"""
+    content = page.decode("utf-8")
+    match = re.search(r'var ytInitialData = (.+?);</script>', content)
+    initial_data = json.loads(match.group(1))
+    contents = initial_data['contents']['twoColumnSearchResultsRenderer']['primaryContents']['sectionListRenderer']['contents']
+
+    video_ids = []
+    for section in contents:
+        if 'itemSectionRenderer' not in section:
+            continue
+        for item in section['itemSectionRenderer']['contents']:
+            if 'videoRenderer' not in item:
+                continue
+            video_ids.append(item['videoRenderer']['videoId'])
+            if len(video_ids) >= MAX_RESULTS:
+                return video_ids
+    return video_ids
+
+
+def streaming_extract(page: bytes) -> List[str]:
+    chunks = (page[i:i + CHUNK_SIZE] for i in range(0, len(page), CHUNK_SIZE))
+    renderers = iter_renderers(chunks, "videoRenderer", max_results=MAX_RESULTS, container_key="itemSectionRenderer")
+    return [r['videoId'] for _, r in renderers]
+
+
+def measure(fn: Callable[[bytes], List[str]], page: bytes) -> Dict[str, float]:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(page)
+    elapsed = (time.perf_counter() - start) / ROUNDS
+
+    tracemalloc.start()
+    fn(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"ms": elapsed * 1000, "peak_kb": peak / 1024}
+
+
+def main(paths: List[str]) -> None:
+    pages = [(os.path.basename(path), open(path, "rb").read()) for path in paths or [SEARCH_PAGE]]
+
+    for name, page in pages:
+        assert legacy_extract(page) == streaming_extract(page), f"{name}: extractors disagree"
+
+        legacy = measure(legacy_extract, page)
+        streaming = measure(streaming_extract, page)
+
+        print(f"{name} ({len(page) / 1024:.0f} KB, first {MAX_RESULTS} results)")
+        print(f"  legacy:    {legacy['ms']:8.2f} ms  peak {legacy['peak_kb']:9.0f} KB")
+        print(f"  streaming: {streaming['ms']:8.2f} ms  peak {streaming['peak_kb']:9.0f} KB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,58 @@
+# benchmarks/bench_transcripts.py
+"""
+Throughput of serial extract_video_transcript calls versus the batch tool.
+
+Usage:
+    python -m benchmarks.bench_transcripts [video_count] [latency_ms]
+
+Transcripts come from a local stub with a fixed per-video latency, and the
+on-disk cache is bypassed so every call pays that latency.
+"""
+import os
+import sys
+import time
+
+os.environ["YT_AGENT_DISABLE_CACHE"] = "1"
+
+from src.tools import (extract_video_transcript, extract_video_transcripts,
+                       iter_video_transcripts, set_transcript_source)
+from benchmarks.fixtures import video_id_for
+
+
+def make_stub_source(latency: float):
+    def stub_source(video_id):
+        time.sleep(latency)
+        return [{"text": f"segment {i} of {video_id}", "start": i * 4.0, "duration": 4.0} for i in range(200)]
+    return stub_source
+
+
+def main(video_count: int = 20, latency_ms: float = 250) -> None:
+    urls = [f"https://www.youtube.com/watch?v={video_id_for('bench', i)}" for i in range(video_count)]
+    previous = set_transcript_source(make_stub_source(latency_ms / 1000))
+
+    try:
+        start = time.perf_counter()
+        for url in urls:
+            extract_video_transcript(url)
+        serial = time.perf_counter() - start
+        print(f"{video_count} videos @ {latency_ms:g} ms each")
+        print(f"  serial:          {serial:6.2f} s  {video_count / serial:6.1f} videos/s")
+
+        for concurrency in (2, 4, 8, 16):
+            start = time.perf_counter()
+            first = None
+            for _ in iter_video_transcripts(urls, concurrency=concurrency):
+                if first is None:
+                    first = time.perf_counter() - start
+            batch = time.perf_counter() - start
+            print(f"  concurrency {concurrency:2d}:  {batch:6.2f} s  {video_count / batch:6.1f} videos/s"
+                  f"  first result after {first * 1000:.0f} ms")
+
+        # Sanity check the tool wrapper end to end
+        assert extract_video_transcripts(" ".join(urls), concurrency=8).count("Transcript for") == video_count
+    finally:
+        set_transcript_source(previous)
+
+
+if __name__ == "__main__":
+    main(*[float(arg) if i else int(arg) for i, arg in enumerate(sys.argv[1:])])
@@ -0,0 +1,50 @@
+# benchmarks/compare.py
+"""
+Compare two results files written by benchmarks.run_agent.
+
+Usage:
+    python -m benchmarks.compare before.json after.json
+"""
+from typing import Any, Dict, List, Tuple
+import json
+import sys
+
+METRICS: List[Tuple[str, str]] = [
+    ("latency p50 ms", "latency_ms.p50"),
+    ("latency p90 ms", "latency_ms.p90"),
+    ("latency p99 ms", "latency_ms.p99"),
+    ("llm calls", "llm_calls"),
+    ("prompt bytes", "prompt_bytes"),
+    ("prompt tokens", "prompt_tokens"),
+    ("generated tokens", "generated_tokens"),
+    ("tool p50 ms", "tool_ms.p50"),
+    ("peak mem p50 KB", "peak_memory_kb.p50"),
+]
+
+
+def lookup(summary: Dict[str, Any], path: str) -> float:
+    value: Any = summary
+    for key in path.split("."):
+        value = value[key]
+    return float(value)
+
+
+def main(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print(f"{'metric':<18} {before.get('commit') or 'before':>12} {after.get('commit') or 'after':>12}   change")
+    for label, path in METRICS:
+        old = lookup(before["summary"], path)
+        new = lookup(after["summary"], path)
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{label:<18} {old:>12.1f} {new:>12.1f}   {change}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1], sys.argv[2])
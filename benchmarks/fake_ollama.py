@@ -0,0 +1,263 @@
+# benchmarks/fake_ollama.py
+"""
+Scripted stand-in for an Ollama server.
+
+Implements /api/generate and /api/chat (streaming and non-streaming), /api/tags
+and /api/version. Replies follow the agent's intended plan: search, then
+transcripts, then channel analysis, then a final answer. Latency is modelled on a
+real server: a one-off model load, a per-token cost for prompt evaluation (with
+reuse of the prefix shared with the previous prompt, like Ollama's prompt cache)
+and a per-token cost for generation, scaled per model by model_speed so a small
+router model can be cheaper than the main one. Disconnecting mid-stream stops
+generation. Setting fail makes every generation request fail with a 500, like a
+node whose GPU has fallen over.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from http.server import BaseHTTPRequestHandler
+import json
+import os
+import re
+import threading
+import time
+
+from benchmarks.fake_youtube import QuietThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+
+
+def _common_prefix(a: str, b: str) -> int:
+    limit = min(len(a), len(b))
+    # Compare in blocks first; prompts share long identical prefixes
+    step = 4096
+    i = 0
+    while i + step <= limit and a[i:i + step] == b[i:i + step]:
+        i += step
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def agent_script(prompt: str, answer_words: int = 120, chatter_words: int = 40) -> str:
+    """
+    Decide the next reply from what the conversation already contains.
+
+    Trailing chatter after each tool call mimics models that keep talking past </json>.
+    """
+    query_match = re.search(r"User query: (.*)", prompt)
+    query = query_match.group(1).strip() if query_match else "youtube"
+    filler = ["I", "will", "wait", "for", "the", "result."]
+    chatter = " " + " ".join(filler[i % len(filler)] for i in range(chatter_words))
+
+    def call(action: str, value: str) -> str:
+        return f'<json>\n{{\n"action": "{action}",\n"action_input": {json.dumps(value)}\n}}\n</json>'
+
+    if "Tool: search_youtube_videos" not in prompt:
+        return "Let me search first.\n" + call("search_youtube_videos", query) + chatter
+
+    results = prompt.split("Tool: search_youtube_videos", 1)[1]
+    urls = re.findall(r"https://www\.youtube\.com/watch\?v=[A-Za-z0-9_-]{11}", results)
+    channels = re.findall(r"'channel': '([^']+)'", results)
+
+    if "Tool: extract_video_transcript" not in prompt and urls:
+        if "extract_video_transcripts" in prompt.split("User query:", 1)[0]:
+            return call("extract_video_transcripts", " ".join(urls[:3])) + chatter
+        return "\n".join(call("extract_video_transcript", url) for url in urls[:2]) + chatter
+
+    if "Tool: analyze_channel_content" not in prompt and channels:
+        return call("analyze_channel_content", channels[0]) + chatter
+
+    words = ["The", "videos", "explain", query, "step", "by", "step", "with", "examples."]
+    return "Final Answer: " + " ".join(words[i % len(words)] for i in range(answer_words))
+
+
+class FakeOllamaServer:
+    """Threaded HTTP server speaking enough of the Ollama API for the agent"""
+
+    def __init__(self, script: Optional[Callable[[str], str]] = None, load_ms: float = 0.0,
+                 prompt_ms_per_token: float = 0.0, gen_ms_per_token: float = 0.0,
+                 model_speed: Optional[Dict[str, float]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.script = script or agent_script
+        self.load_ms = load_ms
+        self.prompt_ms_per_token = prompt_ms_per_token
+        self.gen_ms_per_token = gen_ms_per_token
+        # model name -> multiplier on the per-token costs (default 1.0)
+        self.model_speed = model_speed or {}
+        self.fail = False
+        self.failed_requests = 0
+
+        self.records: List[Dict[str, Any]] = []
+        self.active = 0
+        self._loaded = set()
+        self._last_prompt: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    server._send_json(self, {"version": "0.0.0-fake"})
+                elif self.path == "/api/tags":
+                    server._send_json(self, {"models": [{"name": name} for name in sorted(server._loaded)]})
+                else:
+                    server._send_json(self, {"error": "not found"}, status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                if self.path in ("/api/generate", "/api/chat"):
+                    server._generate(self, self.path, body)
+                else:
+                    server._send_json(self, {"error": "not found"}, status=404)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = QuietThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            records, self.records = self.records, []
+        return records
+
+    def _send_json(self, handler, payload: Dict[str, Any], status: int = 200) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _generate(self, handler, path: str, raw: bytes) -> None:
+        if self.fail:
+            with self._lock:
+                self.failed_requests += 1
+            self._send_json(handler, {"error": "fake failure: model runner has unexpectedly stopped"}, status=500)
+            return
+
+        request = json.loads(raw or b"{}")
+        model = request.get("model", "")
+        chat = path == "/api/chat"
+
+        if chat:
+            messages = request.get("messages") or []
+            prompt = "\n".join(m.get("content", "") for m in messages)
+        else:
+            prompt = request.get("prompt", "")
+
+        with self._lock:
+            self.active += 1
+            cold = model not in self._loaded
+            self._loaded.add(model)
+            cached_chars = _common_prefix(self._last_prompt.get(model, ""), prompt)
+            self._last_prompt[model] = prompt
+
+        record = {
+            "endpoint": path,
+            "model": model,
+            "prompt_bytes": len(raw),
+            "prompt_tokens": len(prompt) // CHARS_PER_TOKEN,
+            "cached_tokens": cached_chars // CHARS_PER_TOKEN,
+            "generated_tokens": 0,
+            "aborted": False,
+        }
+
+        try:
+            # Loading the model is the only cost of an empty warm-up request
+            load_ms = self.load_ms if cold else 0.0
+            if not prompt:
+                time.sleep(load_ms / 1000)
+                self._reply(handler, request, chat, model, [], record, load_ms, 0.0, 0.0)
+                return
+
+            scale = self.model_speed.get(model, 1.0)
+            eval_tokens = record["prompt_tokens"] - record["cached_tokens"]
+            prompt_eval_ms = eval_tokens * self.prompt_ms_per_token * scale
+            time.sleep((load_ms + prompt_eval_ms) / 1000)
+
+            tokens = re.findall(r"\S+\s*|\s+", self.script(prompt))
+            self._reply(handler, request, chat, model, tokens, record, load_ms, prompt_eval_ms,
+                        self.gen_ms_per_token * scale)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.records.append(record)
+
+    def _reply(self, handler, request, chat, model, tokens, record, load_ms, prompt_eval_ms, gen_ms_per_token) -> None:
+        stream = request.get("stream", True)
+
+        def part(text: str, done: bool, eval_ms: float = 0.0) -> Dict[str, Any]:
+            payload: Dict[str, Any] = {"model": model, "created_at": "2024-01-01T00:00:00Z", "done": done}
+            if chat:
+                payload["message"] = {"role": "assistant", "content": text}
+            else:
+                payload["response"] = text
+            if done:
+                payload.update({
+                    "done_reason": "stop",
+                    "load_duration": int(load_ms * 1e6),
+                    "prompt_eval_count": record["prompt_tokens"] - record["cached_tokens"],
+                    "prompt_eval_duration": int(prompt_eval_ms * 1e6),
+                    "eval_count": record["generated_tokens"],
+                    "eval_duration": int(eval_ms * 1e6),
+                    "total_duration": int((load_ms + prompt_eval_ms + eval_ms) * 1e6),
+                })
+            return payload
+
+        if not stream:
+            time.sleep(len(tokens) * gen_ms_per_token / 1000)
+            record["generated_tokens"] = len(tokens)
+            self._send_json(handler, part("".join(tokens), True, len(tokens) * gen_ms_per_token))
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def write(payload: Dict[str, Any]) -> None:
+            data = (json.dumps(payload) + "\n").encode("utf-8")
+            handler.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            handler.wfile.flush()
+
+        try:
+            for token in tokens:
+                time.sleep(gen_ms_per_token / 1000)
+                write(part(token, False))
+                record["generated_tokens"] += 1
+            write(part("", True, record["generated_tokens"] * gen_ms_per_token))
+            handler.wfile.write(b"0\r\n\r\n")
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hung up early, just like Ollama we stop generating
+            record["aborted"] = True
+            handler.close_connection = True
+
+
+if __name__ == "__main__":
+    port = int(os.environ.get("FAKE_OLLAMA_PORT", "11435"))
+    with FakeOllamaServer(port=port, prompt_ms_per_token=0.05, gen_ms_per_token=15) as fake:
+        print(f"Fake Ollama listening on {fake.url}")
+        threading.Event().wait()
@@ -0,0 +1,216 @@
+# benchmarks/fake_youtube.py
+"""
+Local stand-in for the parts of YouTube the tools talk to.
+
+Serves search results, channel search, channel /videos pages and transcripts
+(as JSON) with a configurable per-request latency, and can throttle like
+YouTube does: past max_rps requests per second, or for requests queued with
+inject_errors(), it answers 429/5xx with a Retry-After. Pages are generated from
+benchmarks.fixtures unless a recorded page is found in pages_dir:
+
+    search-<slug>.html, channel-search-<slug>.html, channel-<channel_id>.html
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from benchmarks.fixtures import (make_channel_search_page, make_channel_videos_page,
+                                 make_search_page)
+
+
+class QuietThreadingHTTPServer(ThreadingHTTPServer):
+    """Threaded server that doesn't print tracebacks when clients hang up early"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def channel_id_for(name: str) -> str:
+    return "UC" + hashlib.sha1(name.encode("utf-8")).hexdigest()[:22]
+
+
+def make_transcript(video_id: str, segments: int = 400) -> List[Dict[str, Any]]:
+    """Deterministic transcript: `segments` lines of ~12 words, four seconds apart"""
+    return [
+        {"text": f"in part {i} of {video_id} we cover step {i} of the tutorial in some detail",
+         "start": i * 4.0, "duration": 4.0}
+        for i in range(segments)
+    ]
+
+
+class FakeYouTubeServer:
+    """Threaded HTTP server mimicking YouTube search, channel and transcript responses"""
+
+    def __init__(self, latency: float = 0.0, pages_dir: Optional[str] = None,
+                 transcript_segments: int = 400, host: str = "127.0.0.1", port: int = 0,
+                 max_rps: Optional[float] = None, retry_after: Optional[float] = 1):
+        self.latency = latency
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.throttled_count = 0
+        self.pages_dir = pages_dir
+        self.transcript_segments = transcript_segments
+        self.request_count = 0
+        self.request_paths: List[str] = []
+        # Client port of each request, to tell whether connections were reused
+        self.client_ports: List[int] = []
+
+        self._pages: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._recent: List[float] = []
+        self._injected: List[Tuple[int, Optional[float]]] = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = QuietThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeYouTubeServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def inject_errors(self, count: int, status: int = 429, retry_after: Optional[float] = None) -> None:
+        """Answer the next `count` requests with `status` (and Retry-After, if given)"""
+        with self._lock:
+            self._injected.extend([(status, retry_after)] * count)
+
+    def _throttle(self) -> Optional[Tuple[int, Optional[float]]]:
+        with self._lock:
+            if self._injected:
+                self.throttled_count += 1
+                return self._injected.pop(0)
+            if self.max_rps is None:
+                return None
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < 1.0]
+            if len(self._recent) >= self.max_rps:
+                self.throttled_count += 1
+                return 429, self.retry_after
+            self._recent.append(now)
+            return None
+
+    def _recorded(self, name: str) -> Optional[bytes]:
+        if not self.pages_dir:
+            return None
+        path = os.path.join(self.pages_dir, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+        return None
+
+    def _page(self, key: str, recorded_name: str, build) -> bytes:
+        with self._lock:
+            page = self._pages.get(key)
+        if page is None:
+            page = self._recorded(recorded_name) or build().encode("utf-8")
+            with self._lock:
+                self._pages[key] = page
+        return page
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.request_count += 1
+            self.request_paths.append(handler.path)
+            self.client_ports.append(handler.client_address[1])
+
+        throttled = self._throttle()
+        if throttled:
+            status, retry_after = throttled
+            handler.send_response(status)
+            if retry_after is not None:
+                handler.send_header("Retry-After", f"{retry_after:g}")
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        url = urlparse(handler.path)
+        params = parse_qs(url.query)
+        content_type = "text/html; charset=utf-8"
+
+        if url.path == "/results":
+            query = params.get("search_query", [""])[0]
+            if "sp" in params:
+                body = self._page(
+                    f"channel-search:{query}", f"channel-search-{slugify(query)}.html",
+                    lambda: make_channel_search_page(query, channel_id_for(query))
+                )
+            else:
+                body = self._page(
+                    f"search:{query}", f"search-{slugify(query)}.html",
+                    lambda: make_search_page(query)
+                )
+        elif re.fullmatch(r"/channel/[^/]+/videos", url.path):
+            channel_id = url.path.split("/")[2]
+            body = self._page(
+                f"channel:{channel_id}", f"channel-{channel_id}.html",
+                lambda: make_channel_videos_page(channel_id)
+            )
+        elif url.path.startswith("/transcript/"):
+            video_id = url.path.split("/")[2]
+            body = json.dumps(make_transcript(video_id, self.transcript_segments)).encode("utf-8")
+            content_type = "application/json"
+        else:
+            handler.send_response(404)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        try:
+            handler.send_response(200)
+            handler.send_header("Content-Type", content_type)
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The streaming extractor hangs up once it has enough results
+            pass
+
+    def transcript_source(self, video_id: str) -> List[Dict[str, Any]]:
+        """Transcript fetcher for src.tools.set_transcript_source that reads from this server"""
+        from src.http_client import get_http_client
+
+        response = get_http_client().get(f"{self.url}/transcript/{video_id}")
+        response.raise_for_status()
+        return response.json()
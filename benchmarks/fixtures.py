@@ -0,0 +1,95 @@
+# benchmarks/fixtures.py
+"""
+Synthetic YouTube pages shaped like real search and channel responses.
+
+Real pages carry a few megabytes of unrelated script before and inside
+ytInitialData; the padding arguments reproduce that so the extractor and
+the offline harness see realistic sizes without shipping recorded pages.
+"""
+from typing import Any, Dict, List
+import json
+import random
+
+
+def _video_renderer(video_id: str, title: str, channel: str, filler: int) -> Dict[str, Any]:
+    return {
+        "videoId": video_id,
+        "title": {"runs": [{"text": title}]},
+        "ownerText": {"runs": [{"text": channel}]},
+        "lengthText": {"simpleText": "12:34"},
+        "viewCountText": {"simpleText": "12,345 views"},
+        "publishedTimeText": {"simpleText": "2 weeks ago"},
+        "thumbnailOverlays": [{"thumbnailOverlayTimeStatusRenderer": {"text": {"simpleText": "12:34"}}}],
+        "thumbnail": {"thumbnails": [
+            {"url": f"https://i.ytimg.com/vi/{video_id}/hq{i}.jpg", "width": 360, "height": 202}
+            for i in range(4)
+        ]},
+        "trackingParams": "x" * filler,
+    }
+
+
+def video_id_for(seed: str, index: int) -> str:
+    rng = random.Random(f"{seed}:{index}")
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"
+    return "".join(rng.choice(alphabet) for _ in range(11))
+
+
+def wrap_page(initial_data: Dict[str, Any], script_padding: int) -> str:
+    """Embed ytInitialData in an HTML page with unrelated script before and after it"""
+    player_script = "var ytcfg = " + json.dumps({"blob": "y" * script_padding}) + ";"
+    return (
+        "<!DOCTYPE html><html><head><script>" + player_script + "</script></head><body>"
+        "<script nonce=\"abc\">var ytInitialData = " + json.dumps(initial_data) + ";</script>"
+        "<script>" + player_script + "</script></body></html>"
+    )
+
+
+def make_search_page(query: str, video_count: int = 20, filler: int = 2000,
+                     script_padding: int = 500_000) -> str:
+    """Build a search results page listing video_count videos for query"""
+    items: List[Dict[str, Any]] = []
+    for i in range(video_count):
+        video_id = video_id_for(query, i)
+        items.append({"videoRenderer": _video_renderer(
+            video_id, f"{query.title()} tutorial part {i + 1}", f"Channel {i % 4}", filler
+        )})
+
+    initial_data = {
+        "contents": {"twoColumnSearchResultsRenderer": {"primaryContents": {"sectionListRenderer": {
+            "contents": [{"itemSectionRenderer": {"contents": items}}]
+        }}}},
+        "estimatedResults": str(video_count),
+    }
+    return wrap_page(initial_data, script_padding)
+
+
+def make_channel_search_page(channel_name: str, channel_id: str, script_padding: int = 200_000) -> str:
+    """Build a channel-filtered search page whose first hit is channel_id"""
+    initial_data = {
+        "contents": {"twoColumnSearchResultsRenderer": {"primaryContents": {"sectionListRenderer": {
+            "contents": [{"itemSectionRenderer": {"contents": [
+                {"channelRenderer": {"channelId": channel_id, "title": {"simpleText": channel_name}}}
+            ]}}]
+        }}}}
+    }
+    return wrap_page(initial_data, script_padding)
+
+
+def make_channel_videos_page(channel_id: str, video_count: int = 30, filler: int = 2000,
+                             script_padding: int = 500_000) -> str:
+    """Build a channel /videos page in the grid layout"""
+    items = [
+        {"gridVideoRenderer": _video_renderer(
+            video_id_for(channel_id, i), f"Upload {i + 1}", channel_id, filler
+        )}
+        for i in range(video_count)
+    ]
+    initial_data = {
+        "contents": {"twoColumnBrowseResultsRenderer": {"tabs": [
+            {"tabRenderer": {"title": "Home"}},
+            {"tabRenderer": {"title": "Videos", "content": {"sectionListRenderer": {"contents": [
+                {"itemSectionRenderer": {"contents": [{"gridRenderer": {"items": items}}]}}
+            ]}}}},
+        ]}}
+    }
+    return wrap_page(initial_data, script_padding)
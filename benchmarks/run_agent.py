@@ -0,0 +1,263 @@
+# benchmarks/run_agent.py
+"""
+End-to-end agent benchmark that runs fully offline.
+
+Starts a fake YouTube server and a scripted fake Ollama server, drives
+create_youtube_agent over a fixed query set, and reports per-query latency
+percentiles, LLM calls, prompt bytes, tool time and peak memory.
+
+Usage:
+    python -m benchmarks.run_agent [--queries benchmarks/queries.jsonl] [--repeat 3]
+                                   [--output results.json] [--chat] [--streaming]
+
+Results are written as JSON tagged with the current git commit; compare two
+runs with `python -m benchmarks.compare before.json after.json`.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import threading
+import time
+import tracemalloc
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.fake_youtube import FakeYouTubeServer
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(__file__), "queries.jsonl")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "mean": round(statistics.mean(values), 2) if values else 0.0,
+        "p50": round(percentile(values, 50), 2),
+        "p90": round(percentile(values, 90), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(max(values), 2) if values else 0.0,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def load_queries(path: str) -> List[Dict[str, str]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ToolTimer:
+    """Wraps tool functions to accumulate their wall-clock time"""
+
+    def __init__(self):
+        self.total = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.total += time.perf_counter() - start
+                    self.calls += 1
+        return timed
+
+    def reset(self) -> Dict[str, float]:
+        with self._lock:
+            result = {"tool_ms": round(self.total * 1000, 2), "tool_calls": self.calls}
+            self.total = 0.0
+            self.calls = 0
+        return result
+
+
+def run_benchmark(queries: List[Dict[str, str]], repeat: int = 1, chat_mode: bool = False,
+                  streaming: bool = False, model_name: str = "fake-model:latest",
+                  youtube_latency: float = 0.02, load_ms: float = 200.0,
+                  prompt_ms_per_token: float = 0.02, gen_ms_per_token: float = 2.0,
+                  track_memory: bool = True, agent_kwargs: Optional[Dict[str, Any]] = None,
+                  router_model: Optional[str] = None, router_speed: float = 0.1,
+                  pipeline: bool = False) -> Dict[str, Any]:
+    """Run the query set against fresh fake servers and return the results document"""
+    from langchain_core.tools import Tool
+
+    from src.agent import create_youtube_agent
+    from src.http_client import YouTubeHttpClient, set_http_client
+    from src.tools import create_youtube_tools, set_transcript_source
+
+    # Every run should pay for its fetches, not read an earlier run's cache
+    previous_disable_cache = os.environ.get("YT_AGENT_DISABLE_CACHE")
+    os.environ["YT_AGENT_DISABLE_CACHE"] = "1"
+
+    config = {
+        "model": model_name, "repeat": repeat, "chat_mode": chat_mode, "streaming": streaming,
+        "youtube_latency": youtube_latency, "load_ms": load_ms,
+        "prompt_ms_per_token": prompt_ms_per_token, "gen_ms_per_token": gen_ms_per_token,
+        "router_model": router_model, "router_speed": router_speed if router_model else None,
+        "pipeline": pipeline,
+    }
+    agent_kwargs = dict(agent_kwargs or {})
+    if router_model:
+        agent_kwargs["router_model"] = router_model
+    if pipeline:
+        agent_kwargs["pipeline"] = True
+
+    with FakeYouTubeServer(latency=youtube_latency) as youtube, \
+            FakeOllamaServer(load_ms=load_ms, prompt_ms_per_token=prompt_ms_per_token,
+                             gen_ms_per_token=gen_ms_per_token,
+                             model_speed={router_model: router_speed} if router_model else None) as ollama:
+        client = YouTubeHttpClient(base_url=youtube.url)
+        previous_client = set_http_client(client)
+        previous_source = set_transcript_source(youtube.transcript_source)
+
+        timer = ToolTimer()
+        tools = [
+            Tool(name=tool.name, func=timer.wrap(tool.func), description=tool.description)
+            for tool in create_youtube_tools()
+        ]
+
+        try:
+            agent = create_youtube_agent(
+                tools=tools, model_name=model_name, verbose=False, chat_mode=chat_mode,
+                streaming=streaming, base_url=ollama.url, **agent_kwargs
+            )
+
+            results = []
+            for run in range(repeat):
+                for item in queries:
+                    ollama.reset_records()
+                    timer.reset()
+
+                    if track_memory:
+                        tracemalloc.start()
+                    start = time.perf_counter()
+                    error = None
+                    try:
+                        response = agent.invoke({"input": item["query"]})
+                    except Exception as e:
+                        response = {"output": "", "stats": {}}
+                        error = str(e)
+                    latency = time.perf_counter() - start
+                    peak = 0
+                    if track_memory:
+                        _, peak = tracemalloc.get_traced_memory()
+                        tracemalloc.stop()
+
+                    records = ollama.reset_records()
+                    stats = response.get("stats", {})
+                    results.append({
+                        "id": item.get("id"),
+                        "query": item["query"],
+                        "run": run,
+                        "latency_ms": round(latency * 1000, 2),
+                        "llm_calls": stats.get("llm_calls", len(records)),
+                        "prompt_bytes": sum(r["prompt_bytes"] for r in records),
+                        "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+                        "cached_prompt_tokens": sum(r["cached_tokens"] for r in records),
+                        "generated_tokens": sum(r["generated_tokens"] for r in records),
+                        "aborted_generations": sum(1 for r in records if r["aborted"]),
+                        "peak_memory_kb": round(peak / 1024, 1),
+                        "output_chars": len(response.get("output", "")),
+                        "error": error,
+                        **timer.reset(),
+                    })
+        finally:
+            set_http_client(previous_client)
+            set_transcript_source(previous_source)
+            client.close()
+            if previous_disable_cache is None:
+                os.environ.pop("YT_AGENT_DISABLE_CACHE", None)
+            else:
+                os.environ["YT_AGENT_DISABLE_CACHE"] = previous_disable_cache
+
+    def column(name: str) -> List[float]:
+        return [r[name] for r in results]
+
+    summary = {
+        "queries": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "latency_ms": summarize(column("latency_ms")),
+        "llm_calls": sum(column("llm_calls")),
+        "prompt_bytes": sum(column("prompt_bytes")),
+        "prompt_tokens": sum(column("prompt_tokens")),
+        "cached_prompt_tokens": sum(column("cached_prompt_tokens")),
+        "generated_tokens": sum(column("generated_tokens")),
+        "tool_ms": summarize(column("tool_ms")),
+        "peak_memory_kb": summarize(column("peak_memory_kb")),
+    }
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": config,
+        "summary": summary,
+        "results": results,
+    }
+
+
+def print_summary(document: Dict[str, Any]) -> None:
+    summary = document["summary"]
+    latency = summary["latency_ms"]
+    print(f"commit {document['commit']}  {summary['queries']} queries, {summary['errors']} errors")
+    print(f"  latency ms   p50 {latency['p50']:9.1f}  p90 {latency['p90']:9.1f}  p99 {latency['p99']:9.1f}")
+    print(f"  llm calls    {summary['llm_calls']}")
+    print(f"  prompt       {summary['prompt_bytes']} bytes, {summary['prompt_tokens']} tokens "
+          f"({summary['cached_prompt_tokens']} cached)")
+    print(f"  generated    {summary['generated_tokens']} tokens")
+    print(f"  tool ms      p50 {summary['tool_ms']['p50']:9.1f}  p90 {summary['tool_ms']['p90']:9.1f}")
+    print(f"  peak mem KB  p50 {summary['peak_memory_kb']['p50']:9.1f}  max {summary['peak_memory_kb']['max']:9.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline end-to-end agent benchmark")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    parser.add_argument("--chat", action="store_true", help="use the chat API invocation mode")
+    parser.add_argument("--streaming", action="store_true", help="stream LLM output with early tool-call cutoff")
+    parser.add_argument("--youtube-latency", type=float, default=0.02, help="seconds per fake YouTube request")
+    parser.add_argument("--load-ms", type=float, default=200.0, help="fake model load time")
+    parser.add_argument("--prompt-ms-per-token", type=float, default=0.02)
+    parser.add_argument("--gen-ms-per-token", type=float, default=2.0)
+    parser.add_argument("--router-model", help="route tool-picking iterations to this (fake) small model")
+    parser.add_argument("--router-speed", type=float, default=0.1, help="router model's per-token cost relative to the main model")
+    parser.add_argument("--pipeline", action="store_true", help="run the fixed search/transcript/channel plan without the agent loop")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows the run down)")
+    args = parser.parse_args()
+
+    document = run_benchmark(
+        load_queries(args.queries), repeat=args.repeat, chat_mode=args.chat, streaming=args.streaming,
+        youtube_latency=args.youtube_latency, load_ms=args.load_ms,
+        prompt_ms_per_token=args.prompt_ms_per_token, gen_ms_per_token=args.gen_ms_per_token,
+        track_memory=not args.no_memory, router_model=args.router_model, router_speed=args.router_speed,
+        pipeline=args.pipeline
+    )
+    print_summary(document)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,39 @@
 # src/agent.py
 
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import contextvars
+import os
 import re
 import json
-from langchain_core.tools import Tool
+import time
+from src.context import ConversationContext, context_tokens_for_model
+from src.llm_cache import DEFAULT_LLM_CACHE_TTL, CachedLLM, get_response_cache, llm_cache_enabled
+from src.ollama_pool import OllamaEndpointPool, PooledLLM, ollama_urls_from_env, pinned_run
+from src.pipeline import (DEFAULT_PLAN_VIDEOS, PLAN_TOOLS, SEARCH_TOOL, fits_fixed_plan, follow_up_calls,
+                          render_calls)
+from src.streaming import ToolCallStreamParser
+from src.tracing import get_tracer
+
+if TYPE_CHECKING:
+    from langchain_core.tools import Tool
+
 ollama_model='llama3-groq-tool-use:latest'
 
-def get_llm(model_name="ollama_model", debug=False):
+# Stop a router reply once this much text arrives without a tool call starting:
+# the router only picks tools, the main model writes answers
+ROUTER_TEXT_LIMIT = 200
+
+def get_llm(model_name="ollama_model", debug=False, num_ctx=None, base_url=None):
     """Initialize and return an LLM using Ollama with optional debug mode"""
     from langchain_ollama import OllamaLLM
     
+    # Only override Ollama's context window and host when asked to
+    extra = {"num_ctx": num_ctx} if num_ctx else {}
+    if base_url:
+        extra["base_url"] = base_url
+    
     if debug:
         # Create a wrapper class that prints raw responses
         class DebugOllamaLLM(OllamaLLM):
@@ -27,22 +51,169 @@ def get_llm(model_name="ollama_model", debug=False):
                 print(response)
                 print("-------------------------------\n")
                 return response
+            
+            def stream(self, prompt, **kwargs):
+                print("\n--- DEBUG: PROMPT TO LLM (streaming) ---")
+                print(prompt)
+                
+                received = []
+                try:
+                    for chunk in super().stream(prompt, **kwargs):
+                        received.append(chunk)
+                        yield chunk
+                finally:
+                    print("\n--- DEBUG: RAW LLM RESPONSE (streamed) ---")
+                    print("".join(received))
+                    print("-------------------------------\n")
                 
         return DebugOllamaLLM(
             model=model_name,
-            temperature=0.1
+            temperature=0.1,
+            **extra
         )
     else:
         return OllamaLLM(
             model=model_name,
-            temperature=0.1
+            temperature=0.1,
+            **extra
         )
 
-def create_youtube_agent(tools: List[Tool], model_name="ollama_model", verbose=True, debug=False):
-    """Create a very simple YouTube agent that doesn't rely on complex LangChain components"""
+def get_chat_llm(model_name="ollama_model", debug=False, num_ctx=None, keep_alive=None, base_url=None):
+    """Initialize and return a chat-API LLM that keeps the model and its prompt cache warm"""
+    from src.ollama_chat import OllamaChatLLM
+    
+    return OllamaChatLLM(
+        model=model_name,
+        temperature=0.1,
+        num_ctx=num_ctx,
+        keep_alive=keep_alive,
+        base_url=base_url,
+        debug=debug
+    )
+
+def parse_tool_calls(response: str, tool_names: List[str], verbose=False) -> List[Dict[str, Any]]:
+    """
+    Extract every tool call from an LLM response, in the order they were emitted.
+
+    Calls naming a known tool come first in the result; if none of the parsed calls
+    name a known tool, the last parsed call is returned so the caller can report it.
+    """
+    json_pattern = r'<json>\s*({.*?})\s*</json>|({.*?})'
+    json_matches = re.findall(json_pattern, response, re.DOTALL)
+    
+    # Flatten and filter matches
+    json_candidates = [m[0] if m[0] else m[1] for m in json_matches if m[0] or m[1]]
+    
+    calls = []
+    unknown = None
+    seen = set()
+    
+    # Try to parse each JSON candidate
+    for json_str in json_candidates:
+        try:
+            parsed = json.loads(json_str)
+            tool_name = parsed.get('action') or parsed.get('tool')
+            tool_input = parsed.get('action_input') or parsed.get('tool_input') or parsed.get('input')
+        except Exception as e:
+            if verbose:
+                print(f"Failed to parse JSON: {str(e)}")
+            continue
+        
+        if not tool_name:
+            continue
+        
+        if tool_name in tool_names:
+            # Models sometimes repeat the same call; run it only once
+            key = (tool_name, json.dumps(tool_input, sort_keys=True, default=str))
+            if tool_input and key not in seen:
+                seen.add(key)
+                calls.append({"tool": tool_name, "input": tool_input})
+        else:
+            unknown = {"tool": tool_name, "input": tool_input}
+    
+    if not calls and unknown and unknown["input"]:
+        return [unknown]
+    
+    return calls
+
+def _looks_like_error(result: Any) -> bool:
+    """Tools report failures as strings or [{"error": ...}] rather than raising"""
+    if isinstance(result, str):
+        return result.startswith(("Error", "Failed", "Could not", "Invalid", "No valid"))
+    if isinstance(result, list) and result and isinstance(result[0], dict):
+        return "error" in result[0]
+    return False
+
+def _clean_answer(response: str) -> str:
+    """Strip tool-call JSON and the 'Final Answer:' label from a final response"""
+    clean_response = re.sub(r'<json>.*?</json>', '', response, flags=re.DOTALL)
+    clean_response = re.sub(r'{.*?}', '', clean_response, flags=re.DOTALL)
+    return clean_response.replace('Final Answer:', '').strip()
+
+def create_youtube_agent(tools: List["Tool"], model_name="ollama_model", verbose=True, debug=False,
+                         max_parallel_tools=4, context_tokens=None, chat_mode=None, keep_alive=None,
+                         streaming=False, base_url=None, llm_slots=None, cache_responses=None,
+                         router_model=None, pipeline=None, base_urls=None):
+    """
+    Create a very simple YouTube agent that doesn't rely on complex LangChain components.
+    
+    llm_slots is an optional semaphore shared by agents (or threads using one agent)
+    to cap how many requests are in flight to Ollama at once. cache_responses
+    (default: YT_AGENT_LLM_CACHE) memoizes LLM replies for identical prompts.
     
-    # Initialize LLM
-    llm = get_llm(model_name, debug=debug)
+    router_model (default: YT_AGENT_ROUTER_MODEL) is a small model that picks the
+    tool calls for each iteration. When it doesn't produce a usable call (it wants
+    to answer, or its call can't be parsed) the iteration falls back to model_name,
+    so the large model only writes the final answer and repairs bad calls.
+    
+    pipeline (default: YT_AGENT_PIPELINE) runs the search -> transcripts -> channel
+    plan directly for queries that fit it, with one LLM call to write the answer;
+    other queries, and those whose search fails, go through the agent loop.
+    
+    base_urls (default: YT_AGENT_OLLAMA_URLS) spreads LLM calls over several Ollama
+    servers: each run sticks to the least-loaded healthy one and fails over to
+    another if it goes down.
+    """
+    
+    # Size the prompt budget to the model, and have Ollama allocate the same window
+    context_tokens = context_tokens or context_tokens_for_model(model_name)
+    
+    if chat_mode is None:
+        chat_mode = os.environ.get("YT_AGENT_CHAT_MODE", "").lower() in ("1", "true", "yes")
+    
+    if cache_responses is None:
+        cache_responses = llm_cache_enabled()
+    
+    if router_model is None:
+        router_model = os.environ.get("YT_AGENT_ROUTER_MODEL") or None
+    if router_model == model_name:
+        router_model = None
+    
+    if base_urls is None:
+        base_urls = ollama_urls_from_env()
+    endpoint_pool = OllamaEndpointPool(base_urls) if len(base_urls) > 1 else None
+    if base_urls and not base_url:
+        base_url = base_urls[0]
+    
+    def build_llm(name):
+        def make_llm(url):
+            if chat_mode:
+                return get_chat_llm(name, debug=debug, num_ctx=context_tokens, keep_alive=keep_alive, base_url=url)
+            return get_llm(name, debug=debug, num_ctx=context_tokens, base_url=url)
+        
+        tier_llm = PooledLLM(endpoint_pool, make_llm) if endpoint_pool else make_llm(base_url)
+        if cache_responses:
+            tier_llm = CachedLLM(
+                tier_llm, name,
+                options={"temperature": 0.1, "num_ctx": context_tokens, "chat": chat_mode},
+                persistent=get_response_cache(),
+                ttl=float(os.environ.get("YT_AGENT_LLM_CACHE_TTL", DEFAULT_LLM_CACHE_TTL))
+            )
+        return tier_llm
+    
+    # Initialize LLM (and the router model, if routing)
+    llm = build_llm(model_name)
+    router_llm = build_llm(router_model) if router_model else None
     
     # Build a manual prompt template
     tool_descriptions = "\n".join([f"- {tool.name}: {tool.description}" for tool in tools])
@@ -57,7 +228,7 @@ def create_youtube_agent(tools: List[Tool], model_name="ollama_model", verbose=T
     Available tools:
     {tool_descriptions}
 
-    To use a tool, you must respond in this exact format:
+    To use a tool, you must respond in this exact format (you may include several <json> blocks in one response to run independent tools at the same time):
 
     <json>
     {{
@@ -82,6 +253,20 @@ def create_youtube_agent(tools: List[Tool], model_name="ollama_model", verbose=T
     }}
     </json>
 
+    For example, to extract transcripts from two search results at once:
+    <json>
+    {{
+    "action": "extract_video_transcript",
+    "action_input": "https://www.youtube.com/watch?v=first_video_id"
+    }}
+    </json>
+    <json>
+    {{
+    "action": "extract_video_transcript",
+    "action_input": "https://www.youtube.com/watch?v=second_video_id"
+    }}
+    </json>
+
     After using a tool, examine the results carefully to determine if you need additional information from other tools.
     Always use the exact URLs returned by the search tool when extracting transcripts or analyzing channels.
 
@@ -90,118 +275,294 @@ def create_youtube_agent(tools: List[Tool], model_name="ollama_model", verbose=T
 
     Think step by step to solve the user's request thoroughly. Always aim to provide comprehensive analysis rather than basic information.
 
-    User query: {user_query}
+    """
+    query_template = """User query: {user_query}
     """
     
-    # Create a simple executor function
-    def simple_agent_executor(query):
-        # Format the prompt with the user query - FIX HERE
-        # Replace the placeholder with the actual query
-        formatted_prompt = prompt_template.format(
-            tool_descriptions=tool_descriptions,
-            user_query=query
-        )
+    # The instructions don't depend on the query, so format them once. In chat mode they
+    # become a byte-identical system message that Ollama can serve from its prompt cache.
+    static_prompt = prompt_template.format(tool_descriptions=tool_descriptions)
+    
+    tool_names = [tool.name for tool in tools]
+    
+    if pipeline is None:
+        pipeline = os.environ.get("YT_AGENT_PIPELINE", "").lower() in ("1", "true", "yes")
+    pipeline = pipeline and all(name in tool_names for name in PLAN_TOOLS)
+    plan_videos = int(os.environ.get("YT_AGENT_PIPELINE_VIDEOS", DEFAULT_PLAN_VIDEOS))
+    
+    def run_tool_call(call, parent_span=None, keep_result=False):
+        """Execute one parsed tool call, returning a verbatim header and a compactable result body"""
+        with get_tracer().span("tool.call", parent=parent_span, tool=call['tool']) as span:
+            result = _run_tool_call(call, span, keep_result)
+            span.set(result_chars=len(result["body"]))
+            return result
+    
+    def _run_tool_call(call, span, keep_result=False):
+        tool_name = call['tool']
+        tool_input = call['input']
+        span.set(input_chars=len(str(tool_input)))
         
-        # Keep track of the conversation context
-        conversation_context = formatted_prompt
+        # Find the tool
+        tool = next((t for t in tools if t.name == tool_name), None)
         
-        # Maximum number of tool-calling iterations
-        max_iterations = 5
-        iterations = 0
+        if not tool:
+            if verbose:
+                print(f"Unknown tool: {tool_name}")
+            span.record_error("unknown tool")
+            return {"header": f"\nTool '{tool_name}' is not available. Please use one of the available tools.", "body": ""}
         
-        while iterations < max_iterations:
+        if not isinstance(tool_input, (str, dict)):
+            # Our tools take a single string; a JSON array such as a list of video URLs goes in as its JSON text
+            tool_input = json.dumps(tool_input)
+        
+        try:
+            # Execute the tool
+            tool_result = tool.invoke(tool_input)
+            
             if verbose:
-                print(f"\nIteration {iterations + 1}:")
+                print(f"Tool result: {str(tool_result)[:100]}...")
             
-            # Get LLM response
-            response = llm.invoke(conversation_context)
+            if _looks_like_error(tool_result):
+                span.record_error(str(tool_result)[:200])
             
-            # Try to extract JSON from the response
-            json_pattern = r'<json>\s*({.*?})\s*</json>|({.*?})'
-            json_matches = re.findall(json_pattern, response, re.DOTALL)
+            result = {"header": f"\nTool: {tool_name}\nTool Input: {tool_input}\nTool Result: ", "body": str(tool_result)}
+            if keep_result:
+                # The raw value, for callers that act on it (e.g. the pipeline reading search hits)
+                result["result"] = tool_result
+            return result
+        except Exception as e:
+            if verbose:
+                print(f"Error executing tool: {str(e)}")
+            span.record_error(str(e))
+            return {"header": f"\nError executing tool {tool_name}: {str(e)}\nPlease try a different approach or provide an answer based on what you know.", "body": ""}
+    
+    # Create a simple executor function
+    def simple_agent_executor(query, on_token=None, use_cache=True):
+        # Keep track of the conversation context within the model's token budget
+        if chat_mode:
+            conversation_context = ConversationContext(
+                static_prompt.rstrip(),
+                max_tokens=context_tokens,
+                user_message=query_template.format(user_query=query).rstrip()
+            )
+        else:
+            conversation_context = ConversationContext(
+                static_prompt + query_template.format(user_query=query),
+                max_tokens=context_tokens
+            )
+        stats = {"prompt_tokens": [], "llm_calls": 0, "llm_timings": [], "early_stops": 0,
+                 "tiers": {}, "router_fallbacks": 0, "pipeline": False}
+        use_streaming = streaming or on_token is not None
+        tracer = get_tracer()
+        
+        def invoke_llm(suffix="", on_call=None, allow_tools=True, tier="main"):
+            """Call the LLM, returning the response text and any tool calls already started while streaming"""
+            tier_llm, tier_model = (router_llm, router_model) if tier == "router" else (llm, model_name)
+            # The router's replies are never shown, so always stream them to stop as early as possible
+            tier_streaming = use_streaming or tier == "router"
+            start = time.perf_counter()
+            with tracer.span("llm.call", model=tier_model, tier=tier, chat_mode=chat_mode,
+                             streaming=tier_streaming) as span, \
+                    llm_slots or nullcontext():
+                response, streamed_calls = call_llm(span, suffix, on_call, allow_tools, tier_llm, tier_model,
+                                                    tier_streaming, tier == "router")
+                span.set(response_chars=len(response), tool_calls=len(streamed_calls))
             
-            # Flatten and filter matches
-            json_candidates = [m[0] if m[0] else m[1] for m in json_matches if m[0] or m[1]]
+            tier_stats = stats["tiers"].setdefault(tier, {"model": tier_model, "calls": 0, "latency_ms": 0.0})
+            tier_stats["calls"] += 1
+            tier_stats["latency_ms"] = round(tier_stats["latency_ms"] + (time.perf_counter() - start) * 1000, 1)
+            return response, streamed_calls
+        
+        def call_llm(span, suffix, on_call, allow_tools, tier_llm, tier_model, streamed, router):
+            # Only the caching wrapper understands the per-call opt-out
+            llm_kwargs = {"cache": False} if not use_cache and isinstance(tier_llm, CachedLLM) else {}
+            
+            if chat_mode:
+                messages = conversation_context.messages(suffix)
+                prompt_chars = sum(len(m["content"]) for m in messages)
+            else:
+                prompt = conversation_context.render(suffix)
+                prompt_chars = len(prompt)
+            stats["prompt_tokens"].append(conversation_context.prompt_tokens)
+            stats["llm_calls"] += 1
+            span.set(prompt_chars=prompt_chars, prompt_tokens=conversation_context.prompt_tokens,
+                     compacted_turns=conversation_context.compacted_turns)
+            tracer.incr("llm_calls", model=tier_model)
+            tracer.incr("llm_prompt_chars", prompt_chars, model=tier_model)
+            if verbose:
+                compacted = f", {conversation_context.compacted_turns} turn(s) compacted" if conversation_context.compacted_turns else ""
+                print(f"Prompt tokens: ~{conversation_context.prompt_tokens}{compacted}")
             
-            tool_name = None
-            tool_input = None
+            metrics = {}
+            streamed_calls = []
             
-            # Try to parse each JSON candidate
-            for json_str in json_candidates:
+            if not streamed:
+                if chat_mode:
+                    response, metrics = tier_llm.chat(messages, **llm_kwargs)
+                else:
+                    response = tier_llm.invoke(prompt, **llm_kwargs)
+            else:
+                # Parse the stream as it arrives: tool calls start running as soon as they are
+                # complete, and generation is cut off once the model moves past them
+                parser = ToolCallStreamParser(
+                    tool_names if allow_tools else [], on_call=on_call, on_text=None if router else on_token,
+                    text_limit=ROUTER_TEXT_LIMIT if router else None
+                )
+                chunks = tier_llm.stream_chat(messages, metrics, **llm_kwargs) if chat_mode else tier_llm.stream(prompt, **llm_kwargs)
                 try:
-                    parsed = json.loads(json_str)
-                    tool_name = parsed.get('action') or parsed.get('tool')
-                    tool_input = parsed.get('action_input') or parsed.get('tool_input') or parsed.get('input')
-                    
-                    if tool_name and tool_name in [t.name for t in tools]:
-                        break
-                except Exception as e:
+                    for chunk in chunks:
+                        if parser.feed(chunk):
+                            if parser.calls and hasattr(chunks, "keep_partial"):
+                                # Cut off on purpose after complete tool calls: cache the prefix we act on
+                                chunks.keep_partial()
+                            break
+                finally:
+                    chunks.close()
+                response = parser.finish()
+                streamed_calls = parser.calls
+                
+                if parser.stopped_early:
+                    stats["early_stops"] += 1
+                    span.set(early_stop=True)
+                    tracer.incr("llm_early_stops", model=tier_model)
                     if verbose:
-                        print(f"Failed to parse JSON: {str(e)}")
-                    continue
+                        print("Stopped generation after tool call")
+            
+            if metrics:
+                stats["llm_timings"].append(metrics)
+                span.set(**metrics)
+                tracer.incr("llm_prompt_eval_tokens", metrics["prompt_eval_count"], model=tier_model)
+                tracer.incr("llm_generated_tokens", metrics["eval_count"], model=tier_model)
+                if verbose:
+                    print(f"Prompt eval: {metrics['prompt_eval_ms']} ms ({metrics['prompt_eval_count']} tokens), "
+                          f"generation: {metrics['eval_ms']} ms ({metrics['eval_count']} tokens)")
+            return response, streamed_calls
+        
+        def run_pipeline():
+            """Make the fixed plan's tool calls without the LLM; returns False if the agent loop should take over"""
+            with tracer.span("agent.pipeline") as span:
+                search_call = {"tool": SEARCH_TOOL, "input": query}
+                search = run_tool_call(search_call, span, keep_result=True)
+                videos = search.pop("result", None)
+                if not isinstance(videos, list) or not videos or _looks_like_error(videos):
+                    span.set(fallback=True)
+                    return False
+                
+                # Transcripts and the channel analysis only need the search hits, so run them together
+                calls = follow_up_calls(videos, plan_videos)
+                with ThreadPoolExecutor(max_workers=max_parallel_tools) as pool:
+                    futures = [pool.submit(contextvars.copy_context().run, run_tool_call, call, span) for call in calls]
+                    results = [future.result() for future in futures]
+                span.set(tool_calls=len(calls) + 1)
             
-            # If we found a valid tool call
-            if tool_name and tool_input:
+            conversation_context.add_turn(render_calls([search_call]), [search])
+            conversation_context.add_turn(render_calls(calls), results)
+            return True
+        
+        if pipeline and fits_fixed_plan(query):
+            if run_pipeline():
+                stats["pipeline"] = True
                 if verbose:
-                    print(f"Using tool: {tool_name}")
-                    print(f"Tool input: {tool_input}")
+                    print("Ran the search/transcript/channel plan without the agent loop")
+                final_response, _ = invoke_llm(
+                    "\n\nPlease provide a final answer based on all the information above.",
+                    allow_tools=False
+                )
+                return _clean_answer(final_response), stats
+            if verbose:
+                print("Search failed, falling back to the agent loop")
+        
+        # Maximum number of tool-calling iterations
+        max_iterations = 5
+        iterations = 0
+        
+        while iterations < max_iterations:
+            if verbose:
+                print(f"\nIteration {iterations + 1}:")
+            
+            # Run independent calls concurrently; results keep the order they were requested in
+            with tracer.span("agent.iteration", index=iterations + 1) as iteration_span, \
+                    ThreadPoolExecutor(max_workers=max_parallel_tools) as pool:
+                futures = []
                 
-                # Find the tool
-                tool = next((t for t in tools if t.name == tool_name), None)
+                def start_tool_call(call):
+                    # Carry context variables (e.g. the outbound request priority) into the pool thread
+                    return pool.submit(contextvars.copy_context().run, run_tool_call, call, iteration_span)
                 
-                if tool:
-                    try:
-                        # Execute the tool
-                        tool_result = tool.invoke(tool_input)
-                        
-                        if verbose:
-                            print(f"Tool result: {str(tool_result)[:100]}...")
-                        
-                        # Add the tool result to the conversation
-                        tool_execution_text = f"\nTool: {tool_name}\nTool Input: {tool_input}\nTool Result: {tool_result}\n\nBased on this information, provide a final answer or use another tool if needed."
-                        conversation_context = conversation_context + "\n" + response + tool_execution_text
-                    except Exception as e:
-                        if verbose:
-                            print(f"Error executing tool: {str(e)}")
-                        tool_execution_text = f"\nError executing tool {tool_name}: {str(e)}\nPlease try a different approach or provide an answer based on what you know."
-                        conversation_context = conversation_context + "\n" + response + tool_execution_text
-                else:
-                    if verbose:
-                        print(f"Unknown tool: {tool_name}")
-                    tool_execution_text = f"\nTool '{tool_name}' is not available. Please use one of the available tools."
-                    conversation_context = conversation_context + "\n" + response + tool_execution_text
+                response = None
+                if router_llm is not None:
+                    # Let the small model pick the tools; anything else goes to the main model
+                    response, tool_calls = invoke_llm(on_call=lambda call: futures.append(start_tool_call(call)),
+                                                      tier="router")
+                    if not tool_calls:
+                        tool_calls = parse_tool_calls(response, tool_names, verbose=verbose)
+                        if tool_calls and all(call['tool'] in tool_names for call in tool_calls):
+                            futures = [start_tool_call(call) for call in tool_calls]
+                        else:
+                            if tool_calls or "<json>" in response or "{" in response:
+                                # It tried to call a tool and got it wrong
+                                stats["router_fallbacks"] += 1
+                                tracer.incr("router_fallbacks", model=router_model)
+                            if verbose:
+                                print(f"Router model {router_model} made no usable tool call, using {model_name}")
+                            response = None
+                
+                if response is None:
+                    # Get LLM response, starting any tool calls spotted while it streams
+                    response, tool_calls = invoke_llm(on_call=lambda call: futures.append(start_tool_call(call)))
+                    
+                    # Extract every tool call from the response
+                    if not tool_calls:
+                        tool_calls = parse_tool_calls(response, tool_names, verbose=verbose)
+                        futures = [start_tool_call(call) for call in tool_calls]
+                
+                if verbose:
+                    for call in tool_calls:
+                        print(f"Using tool: {call['tool']}")
+                        print(f"Tool input: {call['input']}")
+                
+                tool_results = [future.result() for future in futures]
+                iteration_span.set(tool_calls=len(tool_calls))
+            
+            # If we found at least one tool call
+            if tool_calls:
+                footer = ""
+                if any(call['tool'] in tool_names for call in tool_calls):
+                    footer = "\n\nBased on this information, provide a final answer or use another tool if needed."
+                conversation_context.add_turn(response, tool_results, footer)
             else:
                 # If no tool call was detected, treat the response as a final answer
-                # Clean up any markdown or JSON artifacts
-                clean_response = re.sub(r'<json>.*?</json>', '', response, flags=re.DOTALL)
-                clean_response = re.sub(r'{.*?}', '', clean_response, flags=re.DOTALL)
-                clean_response = clean_response.replace('Final Answer:', '').strip()
-                
                 if verbose:
                     print("Final answer provided.")
                 
-                return clean_response
+                return _clean_answer(response), stats
             
             iterations += 1
         
         # If we've reached the maximum number of iterations, generate a final response
-        final_prompt = conversation_context + "\n\nPlease provide a final answer based on all the information above."
-        final_response = llm.invoke(final_prompt)
-        
-        # Clean up the final response
-        clean_response = re.sub(r'<json>.*?</json>', '', final_response, flags=re.DOTALL)
-        clean_response = re.sub(r'{.*?}', '', clean_response, flags=re.DOTALL)
-        clean_response = clean_response.replace('Final Answer:', '').strip()
+        final_response, _ = invoke_llm(
+            "\n\nPlease provide a final answer based on all the information above.",
+            allow_tools=False
+        )
         
-        return clean_response
+        return _clean_answer(final_response), stats
     
     # Create an interface that matches LangChain's AgentExecutor
     class SimpleAgentExecutor:
         def __init__(self, executor_function):
             self.executor_function = executor_function
+            self.endpoint_pool = endpoint_pool
         
-        def invoke(self, inputs):
-            result = self.executor_function(inputs.get("input", ""))
-            return {"output": result}
+        def invoke(self, inputs, on_token=None):
+            query = inputs.get("input", "")
+            with get_tracer().span("agent.run", model=model_name, query_chars=len(query)) as span, \
+                    pinned_run() as pins:
+                # {"cache": False} in the inputs skips the response cache for this run
+                result, stats = self.executor_function(query, on_token=on_token, use_cache=inputs.get("cache", True))
+                if pins:
+                    stats["ollama_endpoint"] = next(iter(pins.values()))
+                    span.set(endpoint=stats["ollama_endpoint"])
+                span.set(llm_calls=stats["llm_calls"], output_chars=len(result))
+            return {"output": result, "stats": stats}
             
     return SimpleAgentExecutor(simple_agent_executor)
\ No newline at end of file
@@ -0,0 +1,138 @@
+# src/batch.py
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
+import os
+import threading
+import time
+
+from src.rate_limit import BATCH, request_priority
+
+DEFAULT_BATCH_WORKERS = 4
+DEFAULT_MAX_INFLIGHT_LLM = 2
+
+QUERY_KEYS = ("query", "input", "question")
+ID_KEYS = ("id", "request_id")
+
+
+def load_batch_queries(path: str) -> List[Dict[str, str]]:
+    """
+    Read queries from a JSONL file.
+
+    Each line needs a "query" (or "input"/"question") field and may carry an
+    "id" (or "request_id"); lines without an id are numbered by position.
+    """
+    queries = []
+    seen = set()
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            query = next((item[key] for key in QUERY_KEYS if item.get(key)), None)
+            if query is None:
+                raise ValueError(f"Line {line_number} of {path} has no query field ({', '.join(QUERY_KEYS)})")
+            query_id = str(next((item[key] for key in ID_KEYS if item.get(key) is not None), line_number))
+            if query_id in seen:
+                raise ValueError(f"Duplicate query id {query_id!r} on line {line_number} of {path}")
+            seen.add(query_id)
+            queries.append({"id": query_id, "query": query})
+    return queries
+
+
+def completed_query_ids(output_path: str) -> Set[str]:
+    """Return the ids already answered without error in an earlier (possibly interrupted) run"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write can leave a partial last line
+                continue
+            if record.get("error") is None and "id" in record:
+                done.add(str(record["id"]))
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def iter_batch(agent, queries: List[Dict[str, str]], workers: int = DEFAULT_BATCH_WORKERS) -> Iterator[Dict[str, Any]]:
+    """Run queries through the agent on a worker pool, yielding a result record as each one finishes"""
+
+    def run(item: Dict[str, str]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        error = None
+        output = ""
+        stats: Dict[str, Any] = {}
+        try:
+            # Let interactive queries sharing this process go ahead of batch scrapes
+            with request_priority(BATCH):
+                response = agent.invoke({"input": item["query"]})
+            output = response["output"]
+            stats = response.get("stats", {})
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {
+            "id": item["id"],
+            "query": item["query"],
+            "output": output,
+            "error": error,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "llm_calls": stats.get("llm_calls", 0),
+            "prompt_tokens": sum(stats.get("prompt_tokens", [])),
+            "early_stops": stats.get("early_stops", 0),
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = [pool.submit(run, item) for item in queries]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # On interruption, drop queued queries rather than running the whole batch
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def run_batch(queries: List[Dict[str, str]], output_path: str, agent_factory: Callable[..., Any],
+              workers: int = DEFAULT_BATCH_WORKERS, max_inflight_llm: int = DEFAULT_MAX_INFLIGHT_LLM,
+              resume: bool = True, on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Answer a list of queries concurrently, appending one JSON line per finished query to output_path.
+
+    agent_factory is called once with llm_slots=<semaphore> and must return an agent
+    (e.g. a functools.partial of create_youtube_agent); the semaphore keeps at most
+    max_inflight_llm requests in flight to Ollama however many workers are running
+    tools. With resume, queries already answered in output_path are skipped.
+    """
+    skipped = completed_query_ids(output_path) if resume else set()
+    pending = [item for item in queries if item["id"] not in skipped]
+
+    summary = {"total": len(queries), "skipped": len(queries) - len(pending), "completed": 0, "failed": 0}
+    if not pending:
+        return summary
+
+    agent = agent_factory(llm_slots=threading.BoundedSemaphore(max(1, max_inflight_llm)))
+
+    start = time.perf_counter()
+    with open(output_path, "a" if resume else "w") as out:
+        if resume and out.tell() and not _ends_with_newline(output_path):
+            # Don't glue the first new record onto a line cut off by the interruption
+            out.write("\n")
+        for record in iter_batch(agent, pending, workers=workers):
+            # Flush per record so an interrupted run loses at most the queries still in flight
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            summary["failed" if record["error"] else "completed"] += 1
+            if on_result:
+                on_result(record)
+
+    summary["elapsed_s"] = round(time.perf_counter() - start, 2)
+    return summary
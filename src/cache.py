@@ -0,0 +1,335 @@
+# src/cache.py
+from typing import Any, Callable, Dict, Hashable, Optional
+from collections import OrderedDict
+import copy
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "yt-agent")
+
+# Transcripts rarely change once published, so a week is a safe default
+DEFAULT_TRANSCRIPT_TTL = 7 * 24 * 3600
+DEFAULT_TRANSCRIPT_MAX_ENTRIES = 500
+
+# Search results and channel pages change often, so only share them briefly
+DEFAULT_RESULT_TTL = 300
+DEFAULT_RESULT_MAX_ENTRIES = 256
+
+# Channel IDs never change for a given handle, so the name -> ID index can live long
+DEFAULT_CHANNEL_INDEX_TTL = 30 * 24 * 3600
+DEFAULT_CHANNEL_INDEX_MAX_ENTRIES = 5000
+
+
+def get_cache_dir() -> str:
+    """Return the directory used for on-disk caches, creating it if needed"""
+    cache_dir = os.environ.get("YT_AGENT_CACHE_DIR") or DEFAULT_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def cache_disabled() -> bool:
+    """Check whether on-disk caching has been switched off via the environment"""
+    return os.environ.get("YT_AGENT_DISABLE_CACHE", "").lower() in ("1", "true", "yes")
+
+
+class PersistentCache:
+    """
+    SQLite-backed key/value cache with TTL expiry, LRU eviction and hit/miss counters.
+    """
+
+    def __init__(self, path: str, table: str = "entries", ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+        # Tools may run on worker threads, so share one connection behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB, created_at REAL, last_access REAL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            # Touch the entry so it moves to the back of the eviction order
+            self._conn.execute(
+                f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, evicting least recently used entries over the size cap"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+
+            if self.max_entries is not None:
+                count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN ("
+                        f"SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                        (overflow,)
+                    )
+                    self.evictions += overflow
+
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Remove a single entry if present"""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters"""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+            self.hits = self.misses = self.expirations = self.evictions = 0
+
+    def __contains__(self, key: str) -> bool:
+        """Check for a live entry without counting a hit or refreshing its LRU position"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and (self.ttl is None or time.time() - row[0] <= self.ttl)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters along with the current entry count"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "entries": len(self)
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_transcript_cache = None
+_transcript_cache_lock = threading.Lock()
+
+
+def get_transcript_cache() -> Optional[PersistentCache]:
+    """Return the shared transcript cache, or None when caching is disabled"""
+    global _transcript_cache
+
+    if cache_disabled():
+        return None
+
+    with _transcript_cache_lock:
+        if _transcript_cache is None:
+            ttl = float(os.environ.get("YT_AGENT_TRANSCRIPT_TTL", DEFAULT_TRANSCRIPT_TTL))
+            max_entries = int(os.environ.get("YT_AGENT_TRANSCRIPT_CACHE_SIZE", DEFAULT_TRANSCRIPT_MAX_ENTRIES))
+            _transcript_cache = PersistentCache(
+                os.path.join(get_cache_dir(), "transcripts.sqlite3"),
+                table="transcripts",
+                ttl=ttl,
+                max_entries=max_entries
+            )
+        return _transcript_cache
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    function and everyone who asks for that key meanwhile waits for its result.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+
+
+class ResultCache:
+    """
+    Short-TTL in-memory LRU for scraped results, fetched through a SingleFlight
+    so concurrent agent runs asking for the same thing share one request.
+
+    Callers get their own copy of a cached value, so mutating it is safe.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_RESULT_TTL, max_entries: int = DEFAULT_RESULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.flight = SingleFlight()
+        self._lock = threading.Lock()
+        # key -> (value, stored at)
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any],
+                     cacheable: Callable[[Any], bool] = lambda value: True) -> Any:
+        """
+        Return a fresh cached value for key, or fetch it (once, however many threads ask).
+
+        Values for which cacheable() is False, such as error results, are shared with
+        concurrent callers but not kept. With caching disabled only the coalescing applies.
+        """
+        use_cache = not cache_disabled()
+        if use_cache:
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return copy.deepcopy(value)
+        self.misses += 1
+
+        def fetch_and_store():
+            value = fetch()
+            if use_cache and cacheable(value):
+                self.set(key, value)
+            return value
+
+        return copy.deepcopy(self.flight.do(key, fetch_and_store))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "shared": self.flight.shared, "entries": len(self._entries)}
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide short-lived cache for search results and channel pages"""
+    global _result_cache
+
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(
+                ttl=float(os.environ.get("YT_AGENT_RESULT_TTL", DEFAULT_RESULT_TTL)),
+                max_entries=int(os.environ.get("YT_AGENT_RESULT_CACHE_SIZE", DEFAULT_RESULT_MAX_ENTRIES))
+            )
+        return _result_cache
+
+
+_channel_index = None
+_channel_index_lock = threading.Lock()
+
+
+def get_channel_index() -> Optional[PersistentCache]:
+    """Return the persistent channel name -> channel ID index, or None when caching is disabled"""
+    global _channel_index
+
+    if cache_disabled():
+        return None
+
+    with _channel_index_lock:
+        if _channel_index is None:
+            _channel_index = PersistentCache(
+                os.path.join(get_cache_dir(), "channels.sqlite3"),
+                table="channel_ids",
+                ttl=DEFAULT_CHANNEL_INDEX_TTL,
+                max_entries=DEFAULT_CHANNEL_INDEX_MAX_ENTRIES
+            )
+        return _channel_index
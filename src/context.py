@@ -0,0 +1,164 @@
+# src/context.py
+from typing import Any, Dict, List, Optional
+import os
+
+# Working context budgets (tokens) per model family. These are what we ask Ollama
+# to allocate via num_ctx, not the model maxima, so they stay modest by default.
+MODEL_CONTEXT_TOKENS = {
+    "llama3-groq-tool-use": 8192,
+    "llama3.3": 16384,
+    "llama3.1": 16384,
+    "llama3": 8192,
+    "mistral": 16384,
+    "gemma3": 16384,
+    "qwen2.5": 16384,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# Tokens held back for the model's reply
+DEFAULT_RESERVE_TOKENS = 1024
+
+# Rough characters-per-token ratio for English text with the llama/mistral tokenizers
+CHARS_PER_TOKEN = 4
+
+# Successively tighter caps (in characters) applied to tool results that need compacting
+COMPACTION_STEPS = (4000, 2000, 1000, 400, 0)
+
+# Older results are only cut below this size once the latest turn has been trimmed too,
+# so short results such as a list of search hits survive a single oversized transcript
+OLDER_RESULT_FLOOR = 1000
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting; errs slightly high for prose"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def context_tokens_for_model(model_name: str) -> int:
+    """Return the context budget for a model, honouring YT_AGENT_CONTEXT_TOKENS"""
+    override = os.environ.get("YT_AGENT_CONTEXT_TOKENS")
+    if override:
+        return int(override)
+
+    family = model_name.split(":")[0]
+    # Prefer the longest matching family name, so llama3.3 wins over llama3
+    for name in sorted(MODEL_CONTEXT_TOKENS, key=len, reverse=True):
+        if family.startswith(name):
+            return MODEL_CONTEXT_TOKENS[name]
+    return DEFAULT_CONTEXT_TOKENS
+
+
+def compact_text(text: str, limit: int) -> str:
+    """Cut text down to limit characters, noting how much was dropped"""
+    if len(text) <= limit:
+        return text
+    if limit <= 0:
+        return f"[{len(text)} characters omitted to fit the context window]"
+    return text[:limit] + f" ... [{len(text) - limit} more characters omitted to fit the context window]"
+
+
+class ConversationContext:
+    """
+    Conversation state for one agent run, rendered to a prompt that fits a token budget.
+
+    The system prompt is always kept verbatim, as are the most recent turns when they
+    fit. Tool results from older turns are compacted first, oldest first, and the
+    latest results are only cut down when trimming older ones is not enough.
+
+    The context renders either as one flat prompt string or as chat messages. For chat,
+    pass the query separately as user_message so the system prompt stays identical
+    across queries and the server can reuse its cached prefix.
+    """
+
+    def __init__(self, system_prompt: str, max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+                 reserve_tokens: int = DEFAULT_RESERVE_TOKENS, keep_recent: int = 1,
+                 user_message: str = ""):
+        self.system_prompt = system_prompt
+        self.user_message = user_message
+        self.max_tokens = max_tokens
+        self.reserve_tokens = reserve_tokens
+        self.keep_recent = keep_recent
+        self.turns: List[Dict[str, Any]] = []
+
+        # Size of the most recent render, for reporting
+        self.prompt_tokens = 0
+        self.compacted_turns = 0
+
+    @property
+    def budget(self) -> int:
+        return max(0, self.max_tokens - self.reserve_tokens)
+
+    def add_turn(self, response: str, results: Optional[List[Dict[str, str]]] = None, footer: str = "") -> None:
+        """
+        Record an LLM response and the tool results it produced.
+
+        Each result is a dict with a verbatim "header" and a compactable "body".
+        """
+        self.turns.append({"response": response, "results": results or [], "footer": footer})
+
+    def _result_text(self, turn: Dict[str, Any], limit: Optional[int]) -> str:
+        results = [
+            result["header"] + (result["body"] if limit is None else compact_text(result["body"], limit))
+            for result in turn["results"]
+        ]
+        return "\n".join(results) + turn["footer"]
+
+    def _render(self, limits: List[Optional[int]], suffix: str) -> str:
+        parts = [self.system_prompt, self.user_message]
+        for turn, limit in zip(self.turns, limits):
+            parts.append("\n" + turn["response"] + self._result_text(turn, limit))
+        return "".join(parts) + suffix
+
+    def _fit(self, suffix: str) -> List[Optional[int]]:
+        """Work out per-turn result limits that bring the prompt within budget"""
+        limits: List[Optional[int]] = [None] * len(self.turns)
+        prompt = self._render(limits, suffix)
+
+        # Compact older turns first (oldest first) down to a floor, then the recent ones,
+        # and only then squeeze everything further
+        recent_start = max(0, len(self.turns) - self.keep_recent)
+        older = range(recent_start)
+        recent = range(recent_start, len(self.turns))
+        phases = (
+            [(older, step) for step in COMPACTION_STEPS if step >= OLDER_RESULT_FLOOR]
+            + [(recent, step) for step in COMPACTION_STEPS if step > 0]
+            + [(older, step) for step in COMPACTION_STEPS if step < OLDER_RESULT_FLOOR]
+            + [(recent, 0)]
+        )
+
+        compacted = 0
+        for group, step in phases:
+            for index in group:
+                if estimate_tokens(prompt) <= self.budget:
+                    break
+                if not self.turns[index]["results"]:
+                    continue
+                if limits[index] is None:
+                    compacted += 1
+                limits[index] = step
+                prompt = self._render(limits, suffix)
+
+        self.prompt_tokens = estimate_tokens(prompt)
+        self.compacted_turns = compacted
+        return limits
+
+    def render(self, suffix: str = "") -> str:
+        """Build the prompt, compacting tool results until it fits the budget"""
+        return self._render(self._fit(suffix), suffix)
+
+    def messages(self, suffix: str = "") -> List[Dict[str, str]]:
+        """Build chat messages under the same budget: system, query, then assistant/tool turns"""
+        limits = self._fit(suffix)
+
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if self.user_message:
+            messages.append({"role": "user", "content": self.user_message})
+        for turn, limit in zip(self.turns, limits):
+            messages.append({"role": "assistant", "content": turn["response"]})
+            messages.append({"role": "user", "content": self._result_text(turn, limit).strip()})
+        if suffix:
+            if messages[-1]["role"] == "user":
+                messages[-1] = {"role": "user", "content": messages[-1]["content"] + suffix}
+            else:
+                messages.append({"role": "user", "content": suffix.strip()})
+        return messages
@@ -0,0 +1,211 @@
+# src/extractor.py
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+import codecs
+import json
+import re
+
+YT_INITIAL_DATA_MARKER = "var ytInitialData = "
+YT_INITIAL_DATA_END = ";</script>"
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Past this much unread body it's cheaper to drop the connection than to read it out
+DEFAULT_DRAIN_LIMIT = 8 * 1024 * 1024
+
+# Keep enough of the buffer tail to match a marker split across two chunks
+_TAIL_KEEP = 256
+
+
+class InitialDataNotFound(ValueError):
+    """Raised when a page ends without a ytInitialData payload"""
+
+
+def _decode_chunks(chunks: Iterable[Union[bytes, str]]) -> Iterator[str]:
+    """Decode a stream of byte chunks as UTF-8 without splitting multi-byte characters"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class _Payload:
+    """
+    Sliding window over the ytInitialData payload of a streamed page.
+
+    pos is a cursor into buffer; the methods read more of the page as needed and
+    drop text behind the cursor, so only a small window is ever held in memory.
+    """
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        self._stream = _decode_chunks(chunks)
+        self._decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.exhausted = False
+
+        # Skip ahead to the start of the payload, holding only a short tail in memory
+        while True:
+            start = self.buffer.find(YT_INITIAL_DATA_MARKER)
+            if start != -1:
+                self.buffer = self.buffer[start + len(YT_INITIAL_DATA_MARKER):]
+                return
+            self.buffer = self.buffer[-_TAIL_KEEP:]
+            if not self._read_more():
+                raise InitialDataNotFound("Could not find ytInitialData in page")
+
+    def _read_more(self) -> bool:
+        try:
+            self.buffer += next(self._stream)
+            return True
+        except StopIteration:
+            self.exhausted = True
+            return False
+
+    def _payload_ends(self) -> bool:
+        return self.buffer.find(YT_INITIAL_DATA_END, self.pos) != -1
+
+    def find(self, pattern: "re.Pattern") -> Optional["re.Match"]:
+        """Next match of pattern in the payload at or after the cursor (None once the payload ends)"""
+        while True:
+            end = self.buffer.find(YT_INITIAL_DATA_END, self.pos)
+            match = pattern.search(self.buffer, self.pos, end if end != -1 else len(self.buffer))
+            if match is not None:
+                return match
+            if end != -1:
+                self.pos = end
+                return None
+            # Drop everything already scanned, keeping a tail for split keys
+            self.buffer = self.buffer[max(self.pos, len(self.buffer) - _TAIL_KEEP):]
+            self.pos = 0
+            if not self._read_more():
+                return None
+
+    def peek(self) -> str:
+        """The next non-whitespace character after the cursor, or "" at the end of the page"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            self.buffer, self.pos = "", 0
+            if not self._read_more():
+                return ""
+
+    def decode(self) -> Any:
+        """Decode the JSON value at the cursor and move past it; raises JSONDecodeError if malformed"""
+        self.peek()
+        while True:
+            try:
+                value, self.pos = self._decoder.raw_decode(self.buffer, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if self._payload_ends() or self.exhausted:
+                    raise
+                # The value is still arriving; pull in more of the page and retry
+                self.buffer = self.buffer[self.pos:]
+                self.pos = 0
+                self._read_more()
+
+
+def iter_renderers(chunks: Iterable[Union[bytes, str]], renderer_keys: Union[str, Sequence[str]],
+                   max_results: Optional[int] = None,
+                   container_key: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (key, renderer) pairs for each renderer object found in a page's ytInitialData.
+
+    The page is consumed chunk by chunk. Only the ytInitialData payload is scanned, and
+    each matching renderer is decoded on its own as soon as its closing brace has
+    arrived, so the multi-megabyte payload is never held or parsed as a whole. Iteration
+    stops after max_results renderers, leaving the rest of the stream unread.
+
+    By default renderers are matched at any depth. With container_key (e.g.
+    "itemSectionRenderer"), only the items of such containers' "contents" lists
+    count, so renderers nested inside those items (videos in a "People also
+    watched" shelf, say) are skipped.
+    """
+    if isinstance(renderer_keys, str):
+        renderer_keys = [renderer_keys]
+
+    if container_key is None:
+        key_pattern = re.compile(
+            r'"(' + "|".join(re.escape(key) for key in renderer_keys) + r')"\s*:\s*\{'
+        )
+    else:
+        key_pattern = re.compile(r'"' + re.escape(container_key) + r'"\s*:\s*\{[^{}\[\]]*?"contents"\s*:\s*\[')
+
+    payload = _Payload(chunks)
+    found = 0
+    while max_results is None or found < max_results:
+        match = payload.find(key_pattern)
+        if match is None:
+            return
+
+        if container_key is None:
+            payload.pos = match.end() - 1
+            try:
+                renderer = payload.decode()
+            except json.JSONDecodeError:
+                # Malformed renderer in a complete payload, skip past it
+                payload.pos = match.end()
+                continue
+            found += 1
+            yield match.group(1), renderer
+            continue
+
+        # Decode the container's items one at a time, stepping over whatever is nested in them
+        payload.pos = match.end()
+        while (max_results is None or found < max_results) and payload.peek() not in ("]", ""):
+            try:
+                item = payload.decode()
+            except json.JSONDecodeError:
+                payload.pos += 1
+                break
+            key = next((key for key in renderer_keys if key in item), None) if isinstance(item, dict) else None
+            if key is not None:
+                found += 1
+                yield key, item[key]
+            if payload.peek() == ",":
+                payload.pos += 1
+
+
+def iter_response_renderers(response, renderer_keys: Union[str, Sequence[str]],
+                            max_results: Optional[int] = None, container_key: Optional[str] = None,
+                            chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Stream renderers out of a requests response opened with stream=True, closing it when done"""
+    try:
+        yield from iter_renderers(
+            response.iter_content(chunk_size=chunk_size),
+            renderer_keys,
+            max_results=max_results,
+            container_key=container_key
+        )
+    finally:
+        _drain(response)
+        response.close()
+
+
+def _drain(response, limit: int = DEFAULT_DRAIN_LIMIT, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """
+    Read out and discard the rest of a body left unread after an early stop.
+
+    urllib3 only returns a connection to the pool once its response has been
+    read to the end; closing it part-way drops the socket and the next request
+    has to open (and handshake) a new one.
+    """
+    raw = getattr(response, "raw", None)
+    if raw is None:
+        return
+    drained = 0
+    try:
+        while drained <= limit:
+            chunk = raw.read(chunk_size, decode_content=False)
+            if not chunk:
+                return
+            drained += len(chunk)
+    except Exception:
+        # A broken connection can't be reused anyway; close() deals with it
+        pass
@@ -0,0 +1,129 @@
+# src/http_client.py
+from typing import Any, Dict, Optional, Tuple, Union
+import os
+import threading
+
+DEFAULT_BASE_URL = "https://www.youtube.com"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (5.0, 20.0)  # (connect, read) seconds
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+# Statuses worth retrying: throttling and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class YouTubeHttpClient:
+    """
+    Connection-pooled HTTP client shared by the YouTube scraping tools.
+
+    A single requests.Session keeps connections alive across tool calls so
+    repeated scrapes skip the TCP/TLS handshake. The transport adapter can be
+    swapped out, and base_url redirected, so tests can run against a local fake server.
+
+    With a scheduler (see src.rate_limit) every GET is rate limited, queued by
+    priority and retried on throttling there; urllib3 then only retries
+    connection errors so the two don't both back off on the same 429.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 compression: bool = True, transport: Any = None,
+                 headers: Optional[Dict[str, str]] = None, scheduler: Any = None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.scheduler = scheduler
+
+        self.session = requests.Session()
+        # Create a session without proxies
+        self.session.proxies = {}
+
+        if compression:
+            self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        else:
+            self.session.headers["Accept-Encoding"] = "identity"
+        if headers:
+            self.session.headers.update(headers)
+
+        if transport is None:
+            retry = Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=RETRY_STATUSES if scheduler is None else (),
+                allowed_methods=frozenset(["GET", "HEAD"]),
+                respect_retry_after_header=scheduler is None,
+                raise_on_status=False
+            )
+            transport = HTTPAdapter(
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+                max_retries=retry
+            )
+
+        self.transport = transport
+        self.session.mount("http://", transport)
+        self.session.mount("https://", transport)
+
+    def url(self, path: str) -> str:
+        """Resolve a path such as /results against the configured base URL"""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return self.base_url + "/" + path.lstrip("/")
+
+    def get(self, path: str, params: Optional[Dict[str, str]] = None, priority: Optional[int] = None, **kwargs):
+        """Issue a GET request through the shared session (and the scheduler, if there is one)"""
+        kwargs.setdefault("timeout", self.timeout)
+        if self.scheduler is None:
+            return self.session.get(self.url(path), params=params, **kwargs)
+        return self.scheduler.submit(lambda: self.session.get(self.url(path), params=params, **kwargs), priority)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def _timeout_from_env() -> Union[float, Tuple[float, float]]:
+    value = os.environ.get("YT_AGENT_HTTP_TIMEOUT")
+    if not value:
+        return DEFAULT_TIMEOUT
+    if "," in value:
+        connect, read = value.split(",", 1)
+        return (float(connect), float(read))
+    return float(value)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> YouTubeHttpClient:
+    """Return the module-level client, building it from the environment on first use"""
+    from src.rate_limit import get_scheduler
+
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = YouTubeHttpClient(
+                base_url=os.environ.get("YT_AGENT_YOUTUBE_BASE_URL", DEFAULT_BASE_URL),
+                pool_size=int(os.environ.get("YT_AGENT_HTTP_POOL_SIZE", DEFAULT_POOL_SIZE)),
+                timeout=_timeout_from_env(),
+                retries=int(os.environ.get("YT_AGENT_HTTP_RETRIES", DEFAULT_RETRIES)),
+                backoff_factor=float(os.environ.get("YT_AGENT_HTTP_BACKOFF", DEFAULT_BACKOFF_FACTOR)),
+                scheduler=get_scheduler()
+            )
+        return _client
+
+
+def set_http_client(client: Optional[YouTubeHttpClient]) -> Optional[YouTubeHttpClient]:
+    """Replace the shared client (e.g. with one pointed at a fake server) and return the old one"""
+    global _client
+
+    with _client_lock:
+        previous = _client
+        _client = client
+        return previous
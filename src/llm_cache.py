@@ -0,0 +1,206 @@
+# src/llm_cache.py
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+import time
+
+from src.cache import PersistentCache, cache_disabled, get_cache_dir
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_LLM_CACHE_TTL = 24 * 3600
+DEFAULT_LLM_CACHE_MAX_ENTRIES = 2000
+
+
+def llm_cache_enabled() -> bool:
+    return os.environ.get("YT_AGENT_LLM_CACHE", "").lower() in ("1", "true", "yes")
+
+
+def _replay(response: str) -> Iterator[str]:
+    # A generator rather than iter() so callers can close() it like a live stream
+    yield response
+
+
+class CachingStream:
+    """
+    Passes a response stream through and stores it in the cache once it has run to the end.
+
+    A stream closed early is not stored, since a consumer that raised or a client
+    that disconnected leaves a cut-off reply. The agent, which closes the stream
+    on purpose once it has the tool calls it needs, calls keep_partial() first:
+    that prefix is the response it acts on.
+    """
+
+    def __init__(self, cache: "CachedLLM", key: str, chunks: Iterator[str]):
+        self.cache = cache
+        self.key = key
+        self.chunks = chunks
+        self.received: List[str] = []
+        self._keep = False
+        self._done = False
+
+    def __iter__(self) -> "CachingStream":
+        return self
+
+    def __next__(self) -> str:
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self._keep = True
+            self.close()
+            raise
+        self.received.append(chunk)
+        return chunk
+
+    def keep_partial(self) -> None:
+        """Store what has been received so far when the stream is closed"""
+        self._keep = True
+
+    def close(self) -> None:
+        if self._done:
+            return
+        self._done = True
+        if hasattr(self.chunks, "close"):
+            self.chunks.close()
+        if self._keep and self.received:
+            self.cache.store(self.key, "".join(self.received))
+
+
+class CachedLLM:
+    """
+    Memoizes LLM responses in a small in-memory LRU backed by a persistent SQLite tier.
+
+    Keys cover the model, the sampling options and a SHA-256 of the exact prompt
+    (or chat messages), so any change to the conversation is a miss. Wraps both
+    the OllamaLLM interface (invoke/stream) and OllamaChatLLM (chat/stream_chat);
+    every method takes cache=False to bypass the cache for that call.
+    """
+
+    def __init__(self, llm: Any, model_name: str, options: Optional[Dict[str, Any]] = None,
+                 memory_entries: int = DEFAULT_MEMORY_ENTRIES, persistent: Optional[PersistentCache] = None,
+                 ttl: Optional[float] = DEFAULT_LLM_CACHE_TTL):
+        self.llm = llm
+        self.model_name = model_name
+        self.options = options or {}
+        self.memory_entries = memory_entries
+        self.persistent = persistent
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        # key -> (response, stored at)
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, mode: str, payload: Any) -> str:
+        prompt_hash = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+        return json.dumps([self.model_name, self.options, mode, prompt_hash], sort_keys=True)
+
+    def lookup(self, key: str) -> Optional[str]:
+        from src.tracing import get_tracer
+
+        value = None
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self.ttl is not None and time.time() - entry[1] > self.ttl:
+                    del self._memory[key]
+                else:
+                    value = entry[0]
+                    self._memory.move_to_end(key)
+        if value is None and self.persistent is not None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self._remember(key, value)
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        get_tracer().incr("llm_cache_requests", result="hit" if value is not None else "miss")
+        return value
+
+    def store(self, key: str, value: str) -> None:
+        self._remember(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, value)
+
+    def _remember(self, key: str, value: str) -> None:
+        with self._lock:
+            self._memory[key] = (value, time.time())
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    # OllamaLLM interface
+
+    def invoke(self, prompt: str, cache: bool = True, **kwargs) -> str:
+        if not cache:
+            return self.llm.invoke(prompt, **kwargs)
+        key = self.key("generate", prompt)
+        response = self.lookup(key)
+        if response is None:
+            response = self.llm.invoke(prompt, **kwargs)
+            self.store(key, response)
+        return response
+
+    def stream(self, prompt: str, cache: bool = True, **kwargs) -> Iterator[str]:
+        if not cache:
+            return self.llm.stream(prompt, **kwargs)
+        key = self.key("generate", prompt)
+        response = self.lookup(key)
+        if response is not None:
+            return _replay(response)
+        return CachingStream(self, key, self.llm.stream(prompt, **kwargs))
+
+    # OllamaChatLLM interface
+
+    def chat(self, messages: List[Dict[str, str]], cache: bool = True) -> Tuple[str, Dict[str, Any]]:
+        if not cache:
+            return self.llm.chat(messages)
+        key = self.key("chat", messages)
+        response = self.lookup(key)
+        if response is not None:
+            # No timings: nothing was evaluated
+            return response, {}
+        response, metrics = self.llm.chat(messages)
+        self.store(key, response)
+        return response, metrics
+
+    def stream_chat(self, messages: List[Dict[str, str]], metrics: Optional[Dict[str, Any]] = None,
+                    cache: bool = True) -> Iterator[str]:
+        if not cache:
+            return self.llm.stream_chat(messages, metrics)
+        key = self.key("chat", messages)
+        response = self.lookup(key)
+        if response is not None:
+            return _replay(response)
+        return CachingStream(self, key, self.llm.stream_chat(messages, metrics))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
+
+
+_response_cache: Optional[PersistentCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[PersistentCache]:
+    """Return the shared persistent LLM response cache, or None when on-disk caching is disabled"""
+    global _response_cache
+
+    if cache_disabled():
+        return None
+
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = PersistentCache(
+                os.path.join(get_cache_dir(), "llm_responses.sqlite3"),
+                table="llm_responses",
+                ttl=float(os.environ.get("YT_AGENT_LLM_CACHE_TTL", DEFAULT_LLM_CACHE_TTL)),
+                max_entries=int(os.environ.get("YT_AGENT_LLM_CACHE_SIZE", DEFAULT_LLM_CACHE_MAX_ENTRIES))
+            )
+        return _response_cache
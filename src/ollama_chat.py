@@ -0,0 +1,133 @@
+# src/ollama_chat.py
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import os
+
+# How long Ollama should keep the model (and its prompt cache) loaded between calls
+DEFAULT_KEEP_ALIVE = "30m"
+
+
+def _ms(nanoseconds: Optional[int]) -> float:
+    return round((nanoseconds or 0) / 1e6, 1)
+
+
+def response_metrics(response: Any) -> Dict[str, Any]:
+    """Pull prompt-eval and generation timings (in ms) out of an Ollama response"""
+    return {
+        "prompt_eval_count": response.get("prompt_eval_count") or 0,
+        "prompt_eval_ms": _ms(response.get("prompt_eval_duration")),
+        "eval_count": response.get("eval_count") or 0,
+        "eval_ms": _ms(response.get("eval_duration")),
+        "load_ms": _ms(response.get("load_duration")),
+        "total_ms": _ms(response.get("total_duration")),
+    }
+
+
+class OllamaChatLLM:
+    """
+    Thin wrapper over the Ollama chat API for cache-friendly multi-turn prompting.
+
+    Every call sends the same system message and options and a keep_alive, so
+    Ollama keeps the model loaded and can reuse the evaluated prefix of the
+    conversation instead of re-reading the whole instruction block each time.
+    """
+
+    def __init__(self, model: str, temperature: float = 0.1, num_ctx: Optional[int] = None,
+                 keep_alive: Union[str, float, None] = None, base_url: Optional[str] = None,
+                 debug: bool = False):
+        from ollama import Client
+
+        self.model = model
+        self.keep_alive = keep_alive if keep_alive is not None else os.environ.get("YT_AGENT_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+        self.base_url = base_url
+        self.debug = debug
+
+        # Options must stay identical between calls; changing num_ctx forces a reload
+        self.options: Dict[str, Any] = {"temperature": temperature}
+        if num_ctx:
+            self.options["num_ctx"] = num_ctx
+
+        self.client = Client(host=base_url) if base_url else Client()
+
+    def chat(self, messages: List[Dict[str, str]]) -> Tuple[str, Dict[str, Any]]:
+        """Send the conversation and return the reply text with its timing metrics"""
+        if self.debug:
+            print("\n--- DEBUG: CHAT MESSAGES TO LLM ---")
+            for message in messages:
+                print(f"[{message['role']}]\n{message['content']}")
+
+        response = self.client.chat(
+            model=self.model,
+            messages=messages,
+            options=self.options,
+            keep_alive=self.keep_alive
+        )
+        content = response["message"]["content"]
+        metrics = response_metrics(response)
+
+        if self.debug:
+            print("\n--- DEBUG: RAW LLM RESPONSE ---")
+            print(content)
+            print(f"--- prompt eval {metrics['prompt_eval_ms']} ms ({metrics['prompt_eval_count']} tokens), "
+                  f"generation {metrics['eval_ms']} ms ({metrics['eval_count']} tokens) ---\n")
+
+        return content, metrics
+
+    def stream_chat(self, messages: List[Dict[str, str]],
+                    metrics: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Stream the reply text chunk by chunk.
+
+        Closing the generator early drops the connection, which stops generation on
+        the server. Timing metrics are written into `metrics` if the stream completes.
+        """
+        if self.debug:
+            print("\n--- DEBUG: CHAT MESSAGES TO LLM (streaming) ---")
+            for message in messages:
+                print(f"[{message['role']}]\n{message['content']}")
+
+        stream = self.client.chat(
+            model=self.model,
+            messages=messages,
+            options=self.options,
+            keep_alive=self.keep_alive,
+            stream=True
+        )
+        received = []
+        try:
+            for part in stream:
+                content = part["message"]["content"]
+                if content:
+                    received.append(content)
+                    yield content
+                if part.get("done") and metrics is not None:
+                    metrics.update(response_metrics(part))
+        finally:
+            stream.close()
+            if self.debug:
+                print("\n--- DEBUG: RAW LLM RESPONSE (streamed) ---")
+                print("".join(received))
+                print("-------------------------------\n")
+
+    def invoke(self, prompt: str, **kwargs) -> str:
+        """Single-prompt call, matching the OllamaLLM interface"""
+        content, _ = self.chat([{"role": "user", "content": prompt}])
+        return content
+
+
+def warm_model(model: str, keep_alive: Union[str, float, None] = None, num_ctx: Optional[int] = None,
+               base_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load a model into memory ahead of the first query (or keep it loaded) with an empty prompt.
+
+    num_ctx should match what the agent sends, otherwise Ollama reloads the model on the first real call.
+    """
+    from ollama import Client
+
+    client = Client(host=base_url) if base_url else Client()
+    response = client.generate(
+        model=model,
+        prompt="",
+        options={"num_ctx": num_ctx} if num_ctx else None,
+        keep_alive=keep_alive if keep_alive is not None else os.environ.get("YT_AGENT_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+    )
+    return response_metrics(response)
@@ -0,0 +1,201 @@
+# src/ollama_pool.py
+"""
+Spread LLM calls over several Ollama servers.
+
+OllamaEndpointPool tracks how many requests each endpoint has in flight and
+which ones have recently failed. PooledLLM sends each call to the least-loaded
+healthy endpoint, except that within pinned_run() (the agent wraps every run in
+one) all calls stick to the endpoint the run started on, so that server's
+prompt cache keeps serving the growing conversation. A call that fails before
+producing any output is retried on another endpoint and the run re-pins there.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+import contextvars
+import os
+import threading
+import time
+
+DEFAULT_FAILURE_COOLDOWN = 30.0
+
+# pool id -> endpoint url for the current agent run, or None outside a run
+_pins: contextvars.ContextVar = contextvars.ContextVar("yt_agent_ollama_pins", default=None)
+
+
+@contextmanager
+def pinned_run() -> Iterator[Dict[int, str]]:
+    """Keep every pooled LLM call made inside the block on one endpoint per pool; yields the pins"""
+    pins: Dict[int, str] = {}
+    token = _pins.set(pins)
+    try:
+        yield pins
+    finally:
+        _pins.reset(token)
+
+
+def ollama_urls_from_env() -> List[str]:
+    """Endpoints listed in YT_AGENT_OLLAMA_URLS (comma-separated), if any"""
+    return [url.strip() for url in os.environ.get("YT_AGENT_OLLAMA_URLS", "").split(",") if url.strip()]
+
+
+class Endpoint:
+    __slots__ = ("url", "in_flight", "calls", "failures", "down_until")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+
+class OllamaEndpointPool:
+    """Load and health bookkeeping for a set of Ollama base URLs"""
+
+    def __init__(self, base_urls: List[str], failure_cooldown: float = DEFAULT_FAILURE_COOLDOWN,
+                 clock: Callable[[], float] = time.monotonic):
+        if not base_urls:
+            raise ValueError("OllamaEndpointPool needs at least one base URL")
+        self.endpoints = [Endpoint(url.rstrip("/")) for url in dict.fromkeys(base_urls)]
+        self.failure_cooldown = failure_cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def choose(self, exclude=(), preferred: Optional[str] = None) -> Optional[Endpoint]:
+        """
+        Pick the endpoint for the next call and count it as in flight.
+
+        preferred wins while it is healthy; otherwise the healthy endpoint with
+        the fewest requests in flight. If every endpoint is cooling down after a
+        failure, the one that failed longest ago gets another chance. Returns
+        None once every endpoint has been excluded.
+        """
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.url not in exclude]
+            if not candidates:
+                return None
+            now = self.clock()
+            healthy = [e for e in candidates if e.down_until <= now]
+            chosen = next((e for e in healthy if e.url == preferred), None)
+            if chosen is None and healthy:
+                chosen = min(healthy, key=lambda e: (e.in_flight, e.calls))
+            if chosen is None:
+                chosen = min(candidates, key=lambda e: e.down_until)
+            chosen.in_flight += 1
+            chosen.calls += 1
+            return chosen
+
+    def release(self, endpoint: Endpoint, failed: bool = False) -> None:
+        with self._lock:
+            endpoint.in_flight -= 1
+            if failed:
+                endpoint.failures += 1
+                endpoint.down_until = self.clock() + self.failure_cooldown
+            else:
+                endpoint.down_until = 0.0
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            now = self.clock()
+            return [
+                {"url": e.url, "in_flight": e.in_flight, "calls": e.calls, "failures": e.failures,
+                 "healthy": e.down_until <= now}
+                for e in self.endpoints
+            ]
+
+
+def _close(chunks: Any) -> None:
+    if chunks is not None and hasattr(chunks, "close"):
+        chunks.close()
+
+
+class PooledLLM:
+    """
+    Presents the OllamaLLM (invoke/stream) and OllamaChatLLM (chat/stream_chat)
+    interfaces over a pool, building one client per endpoint with make_llm(base_url).
+    """
+
+    def __init__(self, pool: OllamaEndpointPool, make_llm: Callable[[str], Any]):
+        self.pool = pool
+        self.make_llm = make_llm
+        self._llms: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _llm(self, url: str) -> Any:
+        with self._lock:
+            if url not in self._llms:
+                self._llms[url] = self.make_llm(url)
+            return self._llms[url]
+
+    def _choose(self, tried) -> Optional[Endpoint]:
+        pins = _pins.get()
+        endpoint = self.pool.choose(exclude=tried, preferred=pins.get(id(self.pool)) if pins is not None else None)
+        if endpoint is not None and pins is not None:
+            pins[id(self.pool)] = endpoint.url
+        return endpoint
+
+    def _failed(self, endpoint: Endpoint) -> None:
+        from src.tracing import get_tracer
+
+        get_tracer().incr("ollama_endpoint_failures", endpoint=endpoint.url)
+        self.pool.release(endpoint, failed=True)
+
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        tried = set()
+        last_error: Optional[Exception] = None
+        while True:
+            endpoint = self._choose(tried)
+            if endpoint is None:
+                raise last_error
+            try:
+                result = getattr(self._llm(endpoint.url), method)(*args, **kwargs)
+            except Exception as e:
+                self._failed(endpoint)
+                tried.add(endpoint.url)
+                last_error = e
+                continue
+            self.pool.release(endpoint)
+            return result
+
+    def _stream(self, method: str, *args, **kwargs) -> Iterator[str]:
+        tried = set()
+        last_error: Optional[Exception] = None
+        while True:
+            endpoint = self._choose(tried)
+            if endpoint is None:
+                raise last_error
+            chunks = None
+            started = False
+            try:
+                chunks = getattr(self._llm(endpoint.url), method)(*args, **kwargs)
+                for chunk in chunks:
+                    started = True
+                    yield chunk
+            except Exception as e:
+                _close(chunks)
+                self._failed(endpoint)
+                # Output already handed on can't be taken back, so only fail over before the first chunk
+                if started:
+                    raise
+                tried.add(endpoint.url)
+                last_error = e
+                continue
+            except BaseException:
+                # The caller closed the stream early (e.g. after a tool call)
+                _close(chunks)
+                self.pool.release(endpoint)
+                raise
+            self.pool.release(endpoint)
+            return
+
+    def invoke(self, prompt: str, **kwargs) -> str:
+        return self._call("invoke", prompt, **kwargs)
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        return self._stream("stream", prompt, **kwargs)
+
+    def chat(self, messages: List[Dict[str, str]]):
+        return self._call("chat", messages)
+
+    def stream_chat(self, messages: List[Dict[str, str]], metrics: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        return self._stream("stream_chat", messages, metrics)
@@ -0,0 +1,50 @@
+# src/pipeline.py
+"""
+The fixed search -> transcripts -> channel plan that the agent's prompt prescribes.
+
+For topic questions the agent nearly always makes these calls in this order, so
+pipeline mode runs them without asking the LLM and spends a single LLM call on
+the answer. Queries about a specific video, channel or time range don't fit the
+plan and go through the open-ended agent loop instead.
+"""
+from typing import Any, Dict, List
+import json
+import re
+
+SEARCH_TOOL = "search_youtube_videos"
+TRANSCRIPT_TOOL = "extract_video_transcript"
+CHANNEL_TOOL = "analyze_channel_content"
+PLAN_TOOLS = (SEARCH_TOOL, TRANSCRIPT_TOOL, CHANNEL_TOOL)
+
+DEFAULT_PLAN_VIDEOS = 2
+
+# Signs the user is asking about something the plan wouldn't find by searching
+_OFF_PLAN = re.compile(
+    r"https?://|youtu\.?be|www\.|(?:^|\s)@\w"            # a specific video, page or handle
+    r"|\bchannels?\b|\bcreators?\b|\byoutubers?\b"        # a specific channel
+    r"|\b\d{1,2}:\d{2}\b|\btimestamps?\b|\bsegments?\b"   # part of a video
+    r"|\bcompare\b|\bversus\b|\bvs\.?(?:\s|$)",           # several separate searches
+    re.IGNORECASE
+)
+
+
+def fits_fixed_plan(query: str) -> bool:
+    """True for topic questions that a search of the query itself answers"""
+    return bool(re.search(r"\w", query)) and not _OFF_PLAN.search(query)
+
+
+def follow_up_calls(videos: List[Dict[str, Any]], max_videos: int = DEFAULT_PLAN_VIDEOS) -> List[Dict[str, Any]]:
+    """Transcript calls for the top search hits, plus an analysis of the top hit's channel"""
+    calls = [{"tool": TRANSCRIPT_TOOL, "input": video["url"]} for video in videos[:max_videos] if video.get("url")]
+    channel = next((video["channel"] for video in videos if video.get("channel")), None)
+    if channel:
+        calls.append({"tool": CHANNEL_TOOL, "input": channel})
+    return calls
+
+
+def render_calls(calls: List[Dict[str, Any]]) -> str:
+    """Write calls the way the model would have, so the conversation reads as if it made them"""
+    return "\n".join(
+        "<json>\n" + json.dumps({"action": call["tool"], "action_input": call["input"]}, indent=0) + "\n</json>"
+        for call in calls
+    )
@@ -0,0 +1,169 @@
+# src/prefetch.py
+from typing import Any, Callable, Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+import os
+import threading
+import time
+
+DEFAULT_PREFETCH_WORKERS = 2
+DEFAULT_PREFETCH_BUDGET = 8
+DEFAULT_PREFETCH_TTL = 300.0
+
+
+class TranscriptPrefetcher:
+    """
+    Speculatively fetches transcript segments for videos the agent is likely to ask for next.
+
+    prefetch() starts background fetches for the top search hits; take() hands a
+    prefetched (or still running) fetch to the tool call that needs it. At most
+    `budget` prefetches are held at once: the oldest unclaimed one is dropped (and
+    cancelled if it hasn't started) to make room, and unclaimed results expire
+    after `ttl` seconds.
+    """
+
+    def __init__(self, fetch: Callable[[str], List[Dict[str, Any]]], top_n: int = 2,
+                 max_workers: int = DEFAULT_PREFETCH_WORKERS, budget: int = DEFAULT_PREFETCH_BUDGET,
+                 ttl: float = DEFAULT_PREFETCH_TTL, skip: Optional[Callable[[str], bool]] = None):
+        self.fetch = fetch
+        self.top_n = top_n
+        self.budget = max(1, budget)
+        self.ttl = ttl
+        self.skip = skip
+
+        self.started = 0
+        self.used = 0
+        self.wasted = 0
+
+        self._lock = threading.Lock()
+        # video_id -> (future, started at), oldest first
+        self._pending: "OrderedDict[str, Any]" = OrderedDict()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="prefetch")
+
+    def prefetch(self, video_ids: List[str]) -> List[str]:
+        """Start fetching the first top_n videos not already prefetched; returns the ids started"""
+        from src.tracing import get_tracer
+
+        started = []
+        for video_id in video_ids[:self.top_n]:
+            if self.skip and self.skip(video_id):
+                continue
+            with self._lock:
+                self._expire()
+                if video_id in self._pending:
+                    continue
+                while len(self._pending) >= self.budget:
+                    self._drop_oldest()
+                self._pending[video_id] = (self._pool.submit(self.fetch, video_id), time.monotonic())
+                self.started += 1
+            started.append(video_id)
+        if started:
+            get_tracer().incr("transcript_prefetch", len(started), result="started")
+        return started
+
+    def take(self, video_id: str, timeout: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Claim a prefetch for video_id, waiting for it if it is still running.
+
+        Returns None when nothing was prefetched or the prefetch failed, in which
+        case the caller should fetch the transcript itself.
+        """
+        from src.tracing import get_tracer
+
+        with self._lock:
+            self._expire()
+            entry = self._pending.pop(video_id, None)
+        if entry is None:
+            return None
+
+        future: Future = entry[0]
+        try:
+            segments = future.result(timeout=timeout)
+        except (Exception, FutureTimeout):
+            get_tracer().incr("transcript_prefetch", result="failed")
+            return None
+        with self._lock:
+            self.used += 1
+        get_tracer().incr("transcript_prefetch", result="used")
+        return segments
+
+    def _drop_oldest(self) -> None:
+        _, (future, _) = self._pending.popitem(last=False)
+        future.cancel()
+        self.wasted += 1
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._pending:
+            future, started_at = next(iter(self._pending.values()))
+            if now - started_at <= self.ttl:
+                break
+            self._drop_oldest()
+
+    def cancel_all(self) -> None:
+        """Drop every unclaimed prefetch, cancelling those that haven't started"""
+        with self._lock:
+            while self._pending:
+                self._drop_oldest()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"started": self.started, "used": self.used, "wasted": self.wasted, "pending": len(self._pending)}
+
+    def close(self) -> None:
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_prefetcher: Optional[TranscriptPrefetcher] = None
+_prefetcher_configured = False
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> Optional[TranscriptPrefetcher]:
+    """
+    Return the shared prefetcher, or None when prefetching is off.
+
+    YT_AGENT_PREFETCH_TRANSCRIPTS sets how many top search hits to prefetch (default 0, off).
+    """
+    global _prefetcher, _prefetcher_configured
+
+    with _prefetcher_lock:
+        if not _prefetcher_configured:
+            _prefetcher_configured = True
+            top_n = int(os.environ.get("YT_AGENT_PREFETCH_TRANSCRIPTS", "0") or 0)
+            if top_n > 0:
+                _prefetcher = _build_prefetcher(top_n)
+        return _prefetcher
+
+
+def _build_prefetcher(top_n: int) -> TranscriptPrefetcher:
+    from src import tools
+
+    def fetch(video_id):
+        # Look the source up at call time so set_transcript_source() applies
+        return tools._transcript_source(video_id)
+
+    def already_cached(video_id):
+        from src.cache import get_transcript_cache
+
+        cache = get_transcript_cache()
+        return cache is not None and video_id in cache
+
+    return TranscriptPrefetcher(
+        fetch,
+        top_n=top_n,
+        budget=int(os.environ.get("YT_AGENT_PREFETCH_BUDGET", DEFAULT_PREFETCH_BUDGET)),
+        skip=already_cached
+    )
+
+
+def set_prefetcher(prefetcher: Optional[TranscriptPrefetcher]) -> Optional[TranscriptPrefetcher]:
+    """Replace the shared prefetcher (None turns prefetching off) and return the old one"""
+    global _prefetcher, _prefetcher_configured
+
+    with _prefetcher_lock:
+        previous = _prefetcher
+        _prefetcher = prefetcher
+        _prefetcher_configured = True
+        return previous
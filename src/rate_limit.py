@@ -0,0 +1,264 @@
+# src/rate_limit.py
+"""
+Shared scheduler for outbound YouTube requests.
+
+Every scrape goes through one OutboundScheduler, which combines:
+
+- a token bucket capping the steady request rate (with a small burst allowance),
+- an adaptive concurrency limit (AIMD): +1/limit per success, halved on 429/5xx,
+- a global pause (at most max_backoff) when YouTube sends Retry-After, and exponential backoff with
+  jitter otherwise, retrying throttled requests instead of handing the LLM an error,
+- a priority queue so interactive queries are admitted ahead of batch work.
+
+Priority comes from request_priority(), a context manager around a contextvar,
+so the batch runner can mark all of its traffic without threading a parameter
+through the tools.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+INTERACTIVE = 0
+BATCH = 10
+
+DEFAULT_RATE = 10.0  # requests per second
+DEFAULT_BURST = 10
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_SCHEDULER_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_MAX_BACKOFF = 30.0
+
+# Throttling and transient server errors: back off and retry
+THROTTLE_STATUSES = (429, 500, 502, 503, 504)
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("yt_agent_request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Send outbound requests made inside the block at this priority (lower goes first)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class OutboundScheduler:
+    """
+    Rate limits, prioritizes and retries outbound requests shared by all threads.
+
+    submit(send) waits for a slot, calls send() and, if the response is throttled,
+    backs off and tries again up to `retries` times before returning it as is.
+    Clock and sleep are injectable for tests.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, initial_concurrency: Optional[float] = None,
+                 min_concurrency: int = 1, retries: int = DEFAULT_SCHEDULER_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE, max_backoff: float = DEFAULT_MAX_BACKOFF,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(initial_concurrency or self.max_concurrency)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.sleep = sleep
+
+        self.counters = {"sent": 0, "throttled": 0, "retried": 0, "gave_up": 0}
+
+        self._tokens = float(self.burst)
+        self._refilled_at = clock()
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._in_flight = 0
+        # (priority, arrival) min-heap of requests waiting for a slot
+        self._queue: List[Tuple[int, int]] = []
+        self._arrivals = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self, priority: Optional[int] = None) -> float:
+        """Block until this request may be sent; returns the time it was admitted"""
+        entry = (current_priority() if priority is None else priority, next(self._arrivals))
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = self.clock()
+                    self._refill(now)
+                    timeout = None
+                    if self._queue[0] == entry and self._in_flight < int(self.limit):
+                        if now < self._paused_until:
+                            timeout = self._paused_until - now
+                        elif self.rate <= 0 or self._tokens >= 1:
+                            if self.rate > 0:
+                                self._tokens -= 1
+                            heapq.heappop(self._queue)
+                            self._in_flight += 1
+                            self.counters["sent"] += 1
+                            # The next request in line may be able to go too
+                            self._cond.notify_all()
+                            return now
+                        else:
+                            timeout = (1 - self._tokens) / self.rate
+                    self._cond.wait(timeout)
+            except BaseException:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+                raise
+
+    def release(self, admitted_at: float, status: Optional[int] = None,
+                retry_after: Optional[float] = None) -> None:
+        """Report how a request admitted at admitted_at went (status None: it never got a response)"""
+        with self._cond:
+            self._in_flight -= 1
+            now = self.clock()
+            if status in THROTTLE_STATUSES:
+                self.counters["throttled"] += 1
+                # Only requests sent since the last decrease say anything about the current limit,
+                # so a burst of 429s from one congestion event halves it once
+                if admitted_at >= self._last_decrease:
+                    self.limit = max(self.min_concurrency, self.limit / 2)
+                    self._last_decrease = now
+                    self._tokens = 0.0
+                if retry_after is not None:
+                    # A request asked to wait longer than max_backoff gives up, so don't hold
+                    # everyone else back for the full Retry-After either
+                    self._paused_until = max(self._paused_until, now + min(retry_after, self.max_backoff))
+            elif status is not None and status < 400:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+        return random.uniform(0, min(self.max_backoff, self.backoff_base * 2 ** attempt))
+
+    def submit(self, send: Callable[[], Any], priority: Optional[int] = None) -> Any:
+        """
+        Send a request through the scheduler, retrying it while it is throttled.
+
+        send() must return a response with status_code and headers. The last
+        response is returned as is once retries run out, or straight away if the
+        server asks for a longer pause than max_backoff.
+        """
+        from src.tracing import get_tracer
+
+        priority = current_priority() if priority is None else priority
+        attempt = 0
+        while True:
+            admitted_at = self.acquire(priority)
+            try:
+                response = send()
+            except BaseException:
+                self.release(admitted_at)
+                raise
+            status = response.status_code
+            retry_after = parse_retry_after(response.headers.get("Retry-After")) if status in THROTTLE_STATUSES else None
+            self.release(admitted_at, status, retry_after)
+
+            if status not in THROTTLE_STATUSES:
+                return response
+            get_tracer().incr("http_throttled", status=str(status))
+            if attempt >= self.retries or (retry_after is not None and retry_after > self.max_backoff):
+                with self._cond:
+                    self.counters["gave_up"] += 1
+                return response
+
+            response.close()
+            if retry_after is None:
+                self.sleep(self.backoff(attempt))
+            attempt += 1
+            with self._cond:
+                self.counters["retried"] += 1
+            get_tracer().incr("http_retries")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = self.clock()
+            self._refill(now)
+            return {
+                **self.counters,
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self._in_flight,
+                "queued": len(self._queue),
+                "tokens": round(self._tokens, 2),
+                "paused_for": round(max(0.0, self._paused_until - now), 2),
+            }
+
+
+_scheduler: Optional[OutboundScheduler] = None
+_scheduler_configured = False
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Optional[OutboundScheduler]:
+    """
+    Return the shared outbound scheduler, or None when it is turned off.
+
+    YT_AGENT_HTTP_RATE sets requests per second (0 turns the scheduler off),
+    YT_AGENT_HTTP_BURST the bucket size and YT_AGENT_HTTP_CONCURRENCY the most
+    requests in flight at once.
+    """
+    global _scheduler, _scheduler_configured
+
+    with _scheduler_lock:
+        if not _scheduler_configured:
+            _scheduler_configured = True
+            rate = float(os.environ.get("YT_AGENT_HTTP_RATE", DEFAULT_RATE))
+            if rate > 0:
+                _scheduler = OutboundScheduler(
+                    rate=rate,
+                    burst=int(os.environ.get("YT_AGENT_HTTP_BURST", DEFAULT_BURST)),
+                    max_concurrency=int(os.environ.get("YT_AGENT_HTTP_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+                    retries=int(os.environ.get("YT_AGENT_HTTP_RETRIES", DEFAULT_SCHEDULER_RETRIES)),
+                    backoff_base=float(os.environ.get("YT_AGENT_HTTP_BACKOFF", DEFAULT_BACKOFF_BASE))
+                )
+        return _scheduler
+
+
+def set_scheduler(scheduler: Optional[OutboundScheduler]) -> Optional[OutboundScheduler]:
+    """Replace the shared scheduler (None turns it off) and return the old one"""
+    global _scheduler, _scheduler_configured
+
+    with _scheduler_lock:
+        previous = _scheduler
+        _scheduler = scheduler
+        _scheduler_configured = True
+        return previous
@@ -0,0 +1,308 @@
+# src/server.py
+"""
+Long-lived HTTP service around the agent.
+
+The tools, LLM client and agent are built once at startup and the Ollama model
+is loaded (and periodically re-warmed while idle) so the first query doesn't
+pay for the model load. A local Ollama serves one generation at a time, so
+queries beyond max_concurrent wait in a bounded queue; once that is full new
+queries are turned away with 503 instead of piling up.
+
+Endpoints:
+    POST /query   {"query": "...", "stream": false}
+                  -> {"output": "...", "stats": {...}, "queue_ms": ..., "latency_ms": ...}
+                  With "stream": true the reply is NDJSON: {"token": "..."} lines
+                  followed by a final {"done": true, "output": ..., ...} line.
+    GET  /health  queue depth, capacity, counters and latency percentiles
+"""
+from typing import Any, Callable, Deque, Dict, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import json
+import os
+import time
+
+DEFAULT_MAX_CONCURRENT = 1
+DEFAULT_MAX_QUEUE = 8
+DEFAULT_QUEUE_TIMEOUT = 120.0
+DEFAULT_WARM_INTERVAL = 240.0
+LATENCY_WINDOW = 500
+
+
+class ServiceOverloaded(Exception):
+    """Raised when a query can't be admitted because the queue is full or it waited too long"""
+
+    def __init__(self, message: str, retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "mean": 0.0}
+    ordered = sorted(values)
+
+    def rank(pct: float) -> float:
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+    return {"p50": round(rank(50), 1), "p90": round(rank(90), 1), "p99": round(rank(99), 1),
+            "mean": round(sum(ordered) / len(ordered), 1)}
+
+
+class AgentService:
+    """Admission control, queueing, model warm-keeping and stats around one agent"""
+
+    def __init__(self, agent, max_concurrent: int = DEFAULT_MAX_CONCURRENT, max_queue: int = DEFAULT_MAX_QUEUE,
+                 queue_timeout: float = DEFAULT_QUEUE_TIMEOUT, warm: Optional[Callable[[], Any]] = None,
+                 warm_interval: float = DEFAULT_WARM_INTERVAL, model_name: Optional[str] = None):
+        self.agent = agent
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.warm = warm
+        self.warm_interval = warm_interval
+        self.model_name = model_name
+
+        self.waiting = 0
+        self.running = 0
+        self.counters = {"accepted": 0, "completed": 0, "failed": 0, "rejected": 0, "timed_out": 0}
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.queue_waits: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.model_warm = False
+        self.last_warm_error: Optional[str] = None
+        self.started_at = time.time()
+        self.last_activity = time.monotonic()
+
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent + 1, thread_name_prefix="agent")
+        self._warm_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        if self.warm:
+            await self._warm_once()
+            self._warm_task = asyncio.create_task(self._keep_warm())
+
+    async def stop(self) -> None:
+        if self._warm_task:
+            self._warm_task.cancel()
+            try:
+                await self._warm_task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _warm_once(self) -> None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.warm)
+            self.model_warm = True
+            self.last_warm_error = None
+        except Exception as e:
+            self.model_warm = False
+            self.last_warm_error = str(e)
+
+    async def _keep_warm(self) -> None:
+        # Real queries refresh Ollama's keep_alive too, so only ping while idle
+        while True:
+            await asyncio.sleep(self.warm_interval)
+            if not self.running and time.monotonic() - self.last_activity >= self.warm_interval:
+                await self._warm_once()
+
+    async def submit(self, query: str, on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Queue a query and run it once a slot frees up; raises ServiceOverloaded if it can't be admitted"""
+        # Count admitted queries rather than asking the semaphore: a query that has
+        # been admitted may not have reached acquire() yet
+        if self.waiting + self.running >= self.max_concurrent + self.max_queue:
+            self.counters["rejected"] += 1
+            raise ServiceOverloaded(f"Queue is full ({self.waiting} waiting)")
+
+        self.counters["accepted"] += 1
+        self.waiting += 1
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.counters["timed_out"] += 1
+            raise ServiceOverloaded(f"Timed out after {self.queue_timeout:g}s in the queue")
+        finally:
+            self.waiting -= 1
+
+        queue_ms = (time.monotonic() - queued_at) * 1000
+        self.queue_waits.append(queue_ms)
+        self.running += 1
+        start = time.monotonic()
+        try:
+            invoke = functools.partial(self.agent.invoke, {"input": query}, on_token=on_token) \
+                if on_token else functools.partial(self.agent.invoke, {"input": query})
+            response = await asyncio.get_running_loop().run_in_executor(self._executor, invoke)
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            self.running -= 1
+            self.last_activity = time.monotonic()
+            self._slots.release()
+
+        latency_ms = (time.monotonic() - start) * 1000
+        self.latencies.append(latency_ms)
+        self.counters["completed"] += 1
+        return {
+            "output": response["output"],
+            "stats": response.get("stats", {}),
+            "queue_ms": round(queue_ms, 1),
+            "latency_ms": round(latency_ms, 1),
+        }
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok" if self.model_warm or not self.warm else "degraded",
+            "model": self.model_name,
+            "model_warm": self.model_warm,
+            "warm_error": self.last_warm_error,
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            **self.counters,
+            "latency_ms": _percentiles(list(self.latencies)),
+            "queue_wait_ms": _percentiles(list(self.queue_waits)),
+            "ollama_endpoints": self.agent.endpoint_pool.stats() if getattr(self.agent, "endpoint_pool", None) else None,
+        }
+
+
+def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None):
+    from aiohttp import web
+
+    return web.json_response({"error": message}, status=status, headers=headers)
+
+
+def create_app(service: AgentService):
+    """Build the aiohttp application serving /query and /health for a service"""
+    from aiohttp import web
+
+    async def handle_query(request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return _error(400, "Request body must be JSON")
+        query = body.get("query") if isinstance(body, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            return _error(400, "Missing 'query'")
+
+        if not body.get("stream"):
+            try:
+                return web.json_response(await service.submit(query))
+            except ServiceOverloaded as e:
+                return _error(503, str(e), {"Retry-After": str(e.retry_after)})
+            except Exception as e:
+                return _error(500, f"Error running agent: {str(e)}")
+
+        return await _stream_query(request, query)
+
+    async def _stream_query(request, query):
+        loop = asyncio.get_running_loop()
+        tokens: asyncio.Queue = asyncio.Queue()
+        response = None
+
+        def on_token(token):
+            # Called on the agent's worker thread
+            loop.call_soon_threadsafe(tokens.put_nowait, token)
+
+        async def write_line(payload):
+            # Headers go out with the first line so overload errors can still be plain 503s
+            nonlocal response
+            if response is None:
+                response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+                await response.prepare(request)
+            await response.write((json.dumps(payload) + "\n").encode("utf-8"))
+
+        task = asyncio.create_task(service.submit(query, on_token=on_token))
+        while not task.done() or not tokens.empty():
+            getter = asyncio.create_task(tokens.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                await write_line({"token": getter.result()})
+            else:
+                getter.cancel()
+
+        try:
+            final = {"done": True, **task.result()}
+        except ServiceOverloaded as e:
+            if response is None:
+                return _error(503, str(e), {"Retry-After": str(e.retry_after)})
+            final = {"done": True, "error": str(e)}
+        except Exception as e:
+            if response is None:
+                return _error(500, f"Error running agent: {str(e)}")
+            final = {"done": True, "error": f"Error running agent: {str(e)}"}
+
+        await write_line(final)
+        await response.write_eof()
+        return response
+
+    async def handle_health(request):
+        return web.json_response(service.health())
+
+    async def on_startup(app):
+        await service.start()
+
+    async def on_cleanup(app):
+        await service.stop()
+
+    app = web.Application()
+    app.router.add_post("/query", handle_query)
+    app.router.add_get("/health", handle_health)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def build_service(model_name: str, chat_mode: Optional[bool] = None, base_url: Optional[str] = None,
+                  max_concurrent: int = DEFAULT_MAX_CONCURRENT, max_queue: int = DEFAULT_MAX_QUEUE,
+                  queue_timeout: float = DEFAULT_QUEUE_TIMEOUT, keep_alive: Optional[str] = None,
+                  **agent_kwargs) -> AgentService:
+    """Create the tools, agent and model warmer once for the lifetime of the service"""
+    from src.agent import create_youtube_agent
+    from src.context import context_tokens_for_model
+    from src.ollama_chat import warm_model
+    from src.ollama_pool import ollama_urls_from_env
+    from src.tools import create_youtube_tools
+
+    agent = create_youtube_agent(
+        tools=create_youtube_tools(), model_name=model_name, verbose=False, chat_mode=chat_mode,
+        keep_alive=keep_alive, base_url=base_url, **agent_kwargs
+    )
+    num_ctx = agent_kwargs.get("context_tokens") or context_tokens_for_model(model_name)
+    router_model = agent_kwargs.get("router_model") or os.environ.get("YT_AGENT_ROUTER_MODEL")
+    urls = agent_kwargs.get("base_urls") or ollama_urls_from_env() or [base_url]
+
+    def warm():
+        # Every endpoint may serve any run; one being down only fails warming if all are
+        errors = []
+        metrics = None
+        for url in urls:
+            try:
+                # The router model runs on every iteration, so keep it loaded alongside the main one
+                if router_model and router_model != model_name:
+                    warm_model(router_model, keep_alive=keep_alive, num_ctx=num_ctx, base_url=url)
+                metrics = warm_model(model_name, keep_alive=keep_alive, num_ctx=num_ctx, base_url=url)
+            except Exception as e:
+                errors.append(f"{url or 'default'}: {e}")
+        if len(errors) == len(urls):
+            raise RuntimeError("; ".join(errors))
+        return metrics
+
+    return AgentService(
+        agent, max_concurrent=max_concurrent, max_queue=max_queue, queue_timeout=queue_timeout,
+        warm=warm, warm_interval=float(os.environ.get("YT_AGENT_WARM_INTERVAL", DEFAULT_WARM_INTERVAL)),
+        model_name=model_name
+    )
+
+
+def run_server(service: AgentService, host: str = "127.0.0.1", port: int = 8080) -> None:
+    from aiohttp import web
+
+    web.run_app(create_app(service), host=host, port=port)
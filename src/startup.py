@@ -0,0 +1,79 @@
+# src/startup.py
+"""
+Startup helpers for the interactive CLI.
+
+Importing langchain and friends takes about a second and loading a model into
+Ollama takes several more, so the CLI starts both on background threads and
+lets them run while the user is answering the model-name and debug prompts.
+"""
+from typing import Any, Callable, Dict, Optional
+import importlib
+import threading
+import time
+
+# Imported on first use by the tools and the LLM wrappers
+HEAVY_MODULES = (
+    "langchain_core.tools",
+    "langchain_ollama",
+    "requests",
+    "youtube_transcript_api",
+)
+
+
+class BackgroundTask:
+    """Runs a function once on a daemon thread and records its result, error and duration"""
+
+    def __init__(self, name: str, func: Callable[..., Any], *args, **kwargs):
+        self.name = name
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.duration: Optional[float] = None
+
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, args=(func, args, kwargs), name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self, func, args, kwargs) -> None:
+        try:
+            self.result = func(*args, **kwargs)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.duration = time.perf_counter() - self._started_at
+
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the task to finish; returns False if it is still running after timeout"""
+        self._thread.join(timeout)
+        return self.done()
+
+
+def preload_modules(modules=HEAVY_MODULES) -> Dict[str, float]:
+    """Import modules ahead of first use; returns seconds spent per module (missing ones are skipped)"""
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def start_preload(modules=HEAVY_MODULES) -> BackgroundTask:
+    return BackgroundTask("preload-modules", preload_modules, modules)
+
+
+def start_warm_up(model_name: str, num_ctx: Optional[int] = None, keep_alive: Optional[str] = None,
+                  base_url: Optional[str] = None) -> BackgroundTask:
+    """Load model_name into Ollama in the background; num_ctx should match what the agent will send"""
+    from src.context import context_tokens_for_model
+    from src.ollama_chat import warm_model
+
+    return BackgroundTask(
+        "warm-up", warm_model, model_name, keep_alive=keep_alive,
+        num_ctx=num_ctx or context_tokens_for_model(model_name), base_url=base_url
+    )
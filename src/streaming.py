@@ -0,0 +1,105 @@
+# src/streaming.py
+from typing import Any, Callable, Dict, List, Optional
+import re
+
+_JSON_BLOCK = re.compile(r'<json>\s*({.*?})\s*</json>', re.DOTALL)
+_OPEN_TAG = "<json>"
+
+# Models often announce a tool call first ("Let me search for that."); that much
+# text is held back before anything streams, in case a call follows
+DEFAULT_PREAMBLE_CHARS = 200
+
+
+class ToolCallStreamParser:
+    """
+    Incrementally parse an LLM token stream for <json> tool calls.
+
+    Each complete, valid call is handed to on_call as soon as its closing tag
+    arrives, so the tool can start while the model is still generating. Once at
+    least one call has been seen and the model moves on to anything other than
+    another <json> block, feed() returns True to signal the stream can be closed.
+
+    Text that can't be part of a tool call is passed to on_text as it arrives.
+    Everything from the first '<' or '{' onwards is held back until finish(),
+    and only released if the response turned out not to contain a tool call.
+    With tool_names to look for, nothing is passed on until preamble_chars of
+    text have arrived without a call starting, so a short preamble to a call
+    is never streamed as if it were the answer.
+
+    With text_limit, feed() also returns True once that many characters have
+    arrived without a tool call starting, for callers that only want tool calls.
+    """
+
+    def __init__(self, tool_names: List[str], on_call: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_text: Optional[Callable[[str], None]] = None, text_limit: Optional[int] = None,
+                 preamble_chars: int = DEFAULT_PREAMBLE_CHARS):
+        from src.agent import parse_tool_calls
+
+        self._parse_tool_calls = parse_tool_calls
+        self.tool_names = tool_names
+        self.on_call = on_call
+        self.on_text = on_text
+        self.text_limit = text_limit
+        self.preamble_chars = preamble_chars if tool_names else 0
+
+        self.text = ""
+        self.calls: List[Dict[str, Any]] = []
+        self.stopped_early = False
+
+        self._scan_pos = 0
+        self._released = 0
+        self._holding = False
+        self._seen = set()
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk of generated text; return True once generation can stop"""
+        self.text += chunk
+
+        for match in _JSON_BLOCK.finditer(self.text, self._scan_pos):
+            self._scan_pos = match.end()
+            for call in self._parse_tool_calls(match.group(0), self.tool_names):
+                key = (call["tool"], str(call["input"]))
+                if call["tool"] not in self.tool_names or key in self._seen:
+                    continue
+                self._seen.add(key)
+                self.calls.append(call)
+                if self.on_call:
+                    self.on_call(call)
+
+        self._release_text()
+
+        if self.calls:
+            tail = self.text[self._scan_pos:].lstrip()
+            # Keep going only while another <json> block may be starting
+            if tail and not (tail.startswith(_OPEN_TAG) or _OPEN_TAG.startswith(tail)):
+                self.stopped_early = True
+                return True
+        elif self.text_limit is not None and len(self.text) >= self.text_limit \
+                and "<" not in self.text and "{" not in self.text:
+            self.stopped_early = True
+            return True
+        return False
+
+    def _release_text(self) -> None:
+        if not self.on_text or self._holding:
+            return
+        held = [i for i in (self.text.find("<", self._released), self.text.find("{", self._released)) if i != -1]
+        end = min(held) if held else len(self.text)
+        if held:
+            self._holding = True
+        if not self._released and end < self.preamble_chars:
+            # Too short to tell an answer from the preamble to a call; finish() decides
+            return
+        if end > self._released:
+            self.on_text(self.text[self._released:end])
+            self._released = end
+
+    def finish(self) -> str:
+        """Flush held-back text when the response had no tool call, and return the response text"""
+        if self.calls:
+            # Drop whatever the model said after the last tool call
+            self.text = self.text[:self._scan_pos]
+        elif self.on_text and self._released < len(self.text):
+            self.on_text(self.text[self._released:])
+            self._released = len(self.text)
+        return self.text
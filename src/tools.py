@@ -1,80 +1,82 @@
 # src/tools.py
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Iterator, Optional, Tuple, Union
+import os
 import re
+import threading
+import time
+
+DEFAULT_TRANSCRIPT_CONCURRENCY = 4
+DEFAULT_TRANSCRIPT_TIMEOUT = 30.0
+
+_VIDEO_URL = re.compile(r"(?:https?://)?(?:www\.|m\.)?(?:youtube\.com/[^\s'\",\]}]+|youtu\.be/[^\s'\",\]}]+)")
+
+def _normalize(text: str) -> str:
+    """Case- and whitespace-insensitive cache key for a query or channel name"""
+    return " ".join(text.lower().split())
+
+def _is_result(value: Any) -> bool:
+    # Error results are strings or [{"error": ...}] and must not be cached
+    return isinstance(value, (list, tuple)) and not (value and isinstance(value[0], dict) and "error" in value[0])
 
 def search_youtube_videos(query: str, max_results: int = 5) -> List[Dict[str, str]]:
     """
     Search for YouTube videos based on the query.
     """
+    from src.cache import get_result_cache
+    from src.prefetch import get_prefetcher
+    
+    # Concurrent runs searching for the same thing share one scrape
+    videos = get_result_cache().get_or_fetch(
+        ("search", _normalize(query), max_results),
+        lambda: _fetch_search_results(query, max_results),
+        cacheable=_is_result
+    )
+    
+    # The agent usually asks for transcripts of the top hits next, so start on them now
+    prefetcher = get_prefetcher()
+    if prefetcher is not None and _is_result(videos):
+        prefetcher.prefetch([extract_video_id(video["url"]) for video in videos])
+    
+    return videos
+
+def _fetch_search_results(query: str, max_results: int) -> List[Dict[str, str]]:
     try:
-        import requests
-        import json
-        import re
-        
-        # Format query for URL
-        formatted_query = query.replace(' ', '+')
-        
-        # Make a direct request to YouTube
-        url = f"https://www.youtube.com/results?search_query={formatted_query}"
+        from src.http_client import get_http_client
+        from src.extractor import iter_response_renderers, InitialDataNotFound
         
-        # Create a session without proxies
-        session = requests.Session()
-        session.proxies = {}
-        
-        response = session.get(url)
+        # Make a request to YouTube through the shared connection pool
+        client = get_http_client()
+        response = client.get("/results", params={"search_query": query}, stream=True)
         
         if response.status_code != 200:
+            response.close()
             return [{"error": f"Failed to fetch search results: HTTP {response.status_code}"}]
         
-        # Extract initial data
-        content = response.text
-        initial_data_match = re.search(r'var ytInitialData = (.+?);</script>', content)
-        
-        if not initial_data_match:
-            return [{"error": "Could not extract video data from YouTube response"}]
-        
-        # Parse the JSON data
-        initial_data = json.loads(initial_data_match.group(1))
-        
-        # Extract video information
+        # Extract video information, stopping as soon as we have enough results
         videos = []
         try:
-            contents = initial_data['contents']['twoColumnSearchResultsRenderer']['primaryContents']['sectionListRenderer']['contents']
-            
-            for section in contents:
-                if 'itemSectionRenderer' not in section:
-                    continue
-                    
-                items = section['itemSectionRenderer']['contents']
+            # Only the results list itself; videos nested in shelves like "People also watched" don't count
+            renderers = iter_response_renderers(
+                response, "videoRenderer", max_results=max_results, container_key="itemSectionRenderer"
+            )
+            for _, video_data in renderers:
+                # Extract video title
+                title = video_data['title']['runs'][0]['text']
                 
-                for item in items:
-                    if 'videoRenderer' not in item:
-                        continue
-                        
-                    video_data = item['videoRenderer']
-                    
-                    # Extract video title
-                    title = video_data['title']['runs'][0]['text']
-                    
-                    # Extract video URL
-                    video_id = video_data['videoId']
-                    url = f"https://www.youtube.com/watch?v={video_id}"
-                    
-                    # Extract channel name
-                    channel = video_data['ownerText']['runs'][0]['text']
-                    
-                    videos.append({
-                        "title": title,
-                        "url": url,
-                        "channel": channel
-                    })
-                    
-                    # Limit results
-                    if len(videos) >= max_results:
-                        break
+                # Extract video URL
+                video_id = video_data['videoId']
+                url = f"https://www.youtube.com/watch?v={video_id}"
                 
-                if len(videos) >= max_results:
-                    break
+                # Extract channel name
+                channel = video_data['ownerText']['runs'][0]['text']
+                
+                videos.append({
+                    "title": title,
+                    "url": url,
+                    "channel": channel
+                })
+        except InitialDataNotFound:
+            return [{"error": "Could not extract video data from YouTube response"}]
         except (KeyError, IndexError) as e:
             # If there's an error parsing, return the error
             return [{"error": f"Error parsing YouTube results: {str(e)}"}]
@@ -84,157 +86,478 @@ def search_youtube_videos(query: str, max_results: int = 5) -> List[Dict[str, st
     except Exception as e:
         return [{"error": f"Error searching YouTube: {str(e)}"}]
 
-def extract_video_transcript(video_url: str) -> str:
+def extract_video_id(video_url: str) -> Optional[str]:
+    """
+    Extract the video ID from any of the common YouTube URL forms.
+    """
+    video_url = video_url.strip().strip('"\'')
+
+    if "youtube.com/watch" in video_url:
+        match = re.search(r"[?&]v=([^&#]+)", video_url)
+        if match:
+            return match.group(1)
+    elif "youtu.be/" in video_url:
+        return video_url.split("youtu.be/")[1].split("?")[0].split("#")[0].strip("/") or None
+    elif re.search(r"youtube\.com/(?:shorts|embed|live)/", video_url):
+        match = re.search(r"youtube\.com/(?:shorts|embed|live)/([^/?&#]+)", video_url)
+        if match:
+            return match.group(1)
+    elif re.fullmatch(r"[A-Za-z0-9_-]{11}", video_url):
+        # Bare video IDs are accepted as well
+        return video_url
+
+    return None
+
+def fetch_youtube_transcript(video_id: str) -> List[Dict[str, Any]]:
+    """
+    Fetch the raw transcript segments for a video from YouTube.
+    """
+    from youtube_transcript_api import YouTubeTranscriptApi
+    
+    return YouTubeTranscriptApi.get_transcript(video_id)
+
+_transcript_source = fetch_youtube_transcript
+
+def set_transcript_source(source: Callable[[str], List[Dict[str, Any]]]) -> Callable[[str], List[Dict[str, Any]]]:
+    """
+    Replace the function used to fetch transcript segments (e.g. with a local stub) and return the old one.
+    """
+    global _transcript_source
+    
+    previous = _transcript_source
+    _transcript_source = source
+    return previous
+
+def _fetch_segments(video_id: str) -> List[Dict[str, Any]]:
+    """Fetch transcript segments, claiming a speculative prefetch if one was started"""
+    from src.prefetch import get_prefetcher
+    
+    prefetcher = get_prefetcher()
+    if prefetcher is not None:
+        segments = prefetcher.take(video_id)
+        if segments is not None:
+            return segments
+    return _transcript_source(video_id)
+
+_RANGE = re.compile(r"\s+(?:(segments?)\s+)?(\d[\d:.]*)\s*-\s*(\d[\d:.]*)?\s*$", re.IGNORECASE)
+
+def parse_transcript_request(request: str) -> Tuple[str, Optional[str], Optional[str], Optional[str]]:
+    """
+    Split "<url> [range]" into (url, unit, start, end).
+    
+    The range is a time span such as "10:00-15:30", "600-930" (seconds) or "1:00:00-"
+    (to the end), or a segment window such as "segments 100-200". unit is
+    "segments", "time" or None when no range was given.
+    """
+    match = _RANGE.search(request.strip())
+    if not match:
+        return request.strip(), None, None, None
+    unit = "segments" if match.group(1) else "time"
+    return request.strip()[:match.start()].strip(), unit, match.group(2), match.group(3)
+
+def load_transcript(video_id: str):
     """
-    Extract the transcript from a YouTube video.
+    Return a video's CompactTranscript from the on-disk cache, or fetch, index and cache it.
+    """
+    from src.cache import get_transcript_cache
+    from src.tracing import get_tracer
+    from src.transcript_store import CompactTranscript
+    
+    # Serve repeat requests for the same video from the on-disk cache
+    cache = get_transcript_cache()
+    if cache is not None:
+        cached = cache.get(video_id)
+        # Entries from before compact storage are plain strings without timings
+        if isinstance(cached, str):
+            cached = None
+        get_tracer().incr("transcript_cache_requests", result="hit" if cached is not None else "miss")
+        if cached is not None:
+            return CompactTranscript.from_bytes(cached)
+    
+    transcript_list = _fetch_segments(video_id)
+    transcript = CompactTranscript.from_segments(transcript_list)
+    
+    # Keep the timestamped segments so follow-up questions can be answered by retrieval
+    _index_transcript(video_id, transcript_list)
+    
+    if cache is not None:
+        cache.set(video_id, transcript.to_bytes())
+    return transcript
+
+def extract_video_transcript(video_url: str, start: Optional[float] = None, end: Optional[float] = None) -> str:
+    """
+    Extract the transcript from a YouTube video, or the part of it between start and end seconds.
+    
+    The URL may be followed by a time range ("10:00-15:30") or a segment window
+    ("segments 100-200") so long videos can be read a page at a time.
     """
     try:
+        from src.transcript_store import format_timestamp, parse_timestamp
+        
+        video_url, unit, range_start, range_end = parse_transcript_request(video_url)
+        
         # Extract video ID from URL
-        video_id = None
-        if "youtube.com/watch" in video_url:
-            match = re.search(r"v=([^&]+)", video_url)
-            if match:
-                video_id = match.group(1)
-        elif "youtu.be/" in video_url:
-            video_id = video_url.split("youtu.be/")[1].split("?")[0]
+        video_id = extract_video_id(video_url)
         
         if not video_id:
             return "Invalid YouTube URL format"
-            
-        # Load transcript
-        from youtube_transcript_api import YouTubeTranscriptApi
         
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-        transcript_text = " ".join([item['text'] for item in transcript_list])
+        transcript = load_transcript(video_id)
         
-        return transcript_text
+        if unit == "segments":
+            first = int(range_start)
+            last = int(range_end) + 1 if range_end else len(transcript)
+            first, last = min(first, len(transcript)), min(max(first, last), len(transcript))
+        elif unit == "time" or start is not None or end is not None:
+            if unit == "time":
+                start = parse_timestamp(range_start)
+                end = parse_timestamp(range_end) if range_end else None
+            first, last = transcript.window(start, end)
+        else:
+            return transcript.text()
+        
+        if first >= last:
+            return (f"No transcript segments in that range; the video is {format_timestamp(transcript.duration)} long "
+                    f"with {len(transcript)} segments")
+        
+        header = (f"Transcript {format_timestamp(transcript.starts[first])}-"
+                  f"{format_timestamp(transcript.starts[last - 1] + transcript.durations[last - 1])} "
+                  f"(segments {first}-{last - 1} of {len(transcript)}, video length {format_timestamp(transcript.duration)})")
+        footer = f"\n[Continues at {format_timestamp(transcript.starts[last])}]" if last < len(transcript) else ""
+        return f"{header}:\n{transcript.text(first, last)}{footer}"
     except Exception as e:
         return f"Error extracting transcript: {str(e)}"
 
-def analyze_channel_content(channel_name: str, video_count: int = 3) -> str:
+def _index_transcript(video_id: str, transcript_list: List[Dict[str, Any]]) -> None:
+    from src.tracing import get_tracer
+    
+    tracer = get_tracer()
+    with tracer.span("transcript.index", video_id=video_id) as span:
+        try:
+            from src.transcript_index import get_transcript_index
+            
+            index = get_transcript_index()
+            if video_id not in index:
+                index.add_video(video_id, transcript_list)
+        except Exception as e:
+            # Retrieval is an optimisation; never fail a transcript fetch over it
+            span.record_error(f"Could not index transcript: {str(e)}")
+            tracer.incr("transcript_index_failures")
+
+def parse_video_urls(video_urls: Union[str, List[Any]]) -> List[str]:
     """
-    Analyze the content of a YouTube channel by examining its videos.
+    Pull video URLs out of a list, a JSON array, search results or free text.
+    """
+    if isinstance(video_urls, str):
+        matches = _VIDEO_URL.findall(video_urls)
+        if not matches:
+            # Fall back to whitespace/comma separated values such as bare video IDs
+            matches = [part for part in re.split(r"[\s,\[\]'\"]+", video_urls) if part]
+        items = matches
+    else:
+        items = [item.get("url", "") if isinstance(item, dict) else str(item) for item in video_urls]
+    
+    # Keep the first occurrence of each video, in order
+    urls = []
+    seen = set()
+    for url in items:
+        video_id = extract_video_id(url)
+        if video_id and video_id not in seen:
+            seen.add(video_id)
+            urls.append(url)
+    return urls
+
+def iter_video_transcripts(video_urls: List[str], concurrency: int = DEFAULT_TRANSCRIPT_CONCURRENCY,
+                           timeout: float = DEFAULT_TRANSCRIPT_TIMEOUT) -> Iterator[Tuple[str, str]]:
     """
+    Fetch transcripts for several videos concurrently, yielding (url, transcript) as each one finishes.
+    
+    At most `concurrency` fetches run at once. A fetch that has been running longer than
+    `timeout` seconds is reported as an error instead of holding up the remaining videos.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    
+    started = {}
+    lock = threading.Lock()
+    
+    def fetch(url):
+        with lock:
+            started[url] = time.monotonic()
+        return extract_video_transcript(url)
+    
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
     try:
-        import requests
-        import json
-        import re
+        pending = {pool.submit(fetch, url): url for url in video_urls}
         
-        # Format channel name for search
-        formatted_query = channel_name.replace(' ', '+')
+        while pending:
+            # Wake up in time to notice the earliest running fetch passing its deadline
+            now = time.monotonic()
+            with lock:
+                deadlines = [started[url] + timeout for url in pending.values() if url in started]
+            wait_for = max(0.0, min(deadlines) - now) if deadlines else timeout
+            
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    yield url, future.result()
+                except Exception as e:
+                    yield url, f"Error extracting transcript: {str(e)}"
+            
+            now = time.monotonic()
+            for future, url in list(pending.items()):
+                with lock:
+                    start = started.get(url)
+                if start is not None and now - start >= timeout:
+                    pending.pop(future)
+                    yield url, f"Error extracting transcript: timed out after {timeout:g}s"
+    finally:
+        # Don't wait on stragglers that already timed out or were never started
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+def extract_video_transcripts(video_urls: Union[str, List[Any]], concurrency: Optional[int] = None,
+                              timeout: Optional[float] = None) -> str:
+    """
+    Extract transcripts from several YouTube videos at once.
+    """
+    try:
+        urls = parse_video_urls(video_urls)
         
-        # Make a direct request to YouTube
-        url = f"https://www.youtube.com/results?search_query={formatted_query}&sp=EgIQAg%3D%3D"  # Channel filter
+        if not urls:
+            return "No valid YouTube URLs found"
         
-        # Create a session without proxies
-        session = requests.Session()
-        session.proxies = {}
+        if concurrency is None:
+            concurrency = int(os.environ.get("YT_AGENT_TRANSCRIPT_CONCURRENCY", DEFAULT_TRANSCRIPT_CONCURRENCY))
+        if timeout is None:
+            timeout = float(os.environ.get("YT_AGENT_TRANSCRIPT_TIMEOUT", DEFAULT_TRANSCRIPT_TIMEOUT))
         
-        response = session.get(url)
+        results = dict(iter_video_transcripts(urls, concurrency=concurrency, timeout=timeout))
         
-        if response.status_code != 200:
-            return f"Failed to fetch channel: HTTP {response.status_code}"
+        # Report in the order the videos were requested
+        return "\n\n".join(f"Transcript for {url}:\n{results[url]}" for url in urls)
+    except Exception as e:
+        return f"Error extracting transcripts: {str(e)}"
+
+def search_video_transcripts(request: str, top_k: Optional[int] = None) -> str:
+    """
+    Return the transcript passages most relevant to a question instead of whole transcripts.
+    
+    The input is a question, optionally with video URLs to restrict the search to;
+    videos that haven't been indexed yet are fetched first. Without URLs every
+    previously indexed transcript is searched.
+    """
+    try:
+        from concurrent.futures import ThreadPoolExecutor
+        from src.transcript_index import DEFAULT_TOP_K, get_transcript_index
+        from src.transcript_store import format_timestamp
         
-        # Extract initial data
-        content = response.text
-        initial_data_match = re.search(r'var ytInitialData = (.+?);</script>', content)
+        urls = parse_video_urls(_VIDEO_URL.findall(request))
+        question = _VIDEO_URL.sub(" ", request).strip(" \t\n,;:|-")
+        if not question:
+            return "Please include a question to search the transcripts for"
         
-        if not initial_data_match:
-            return "Could not extract channel data from YouTube response"
+        if top_k is None:
+            top_k = int(os.environ.get("YT_AGENT_RETRIEVAL_TOP_K", DEFAULT_TOP_K))
         
-        # Parse the JSON data
-        initial_data = json.loads(initial_data_match.group(1))
+        index = get_transcript_index()
+        video_ids = [extract_video_id(url) for url in urls]
+        missing = [video_id for video_id in video_ids if video_id not in index]
         
-        # Find the channel
-        channel_title = None
-        channel_id = None
+        errors = []
+        if missing:
+            concurrency = int(os.environ.get("YT_AGENT_TRANSCRIPT_CONCURRENCY", DEFAULT_TRANSCRIPT_CONCURRENCY))
+            with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(missing)))) as pool:
+                futures = {video_id: pool.submit(load_transcript, video_id) for video_id in missing}
+            for video_id, future in futures.items():
+                try:
+                    transcript = future.result()
+                    # Cached transcripts aren't indexed by load_transcript
+                    if video_id not in index:
+                        index.add_video(video_id, transcript.segments())
+                except Exception as e:
+                    errors.append(f"Could not fetch transcript for {video_id}: {str(e)}")
         
-        try:
-            contents = initial_data['contents']['twoColumnSearchResultsRenderer']['primaryContents']['sectionListRenderer']['contents']
-            
-            for section in contents:
-                if 'itemSectionRenderer' not in section:
-                    continue
-                    
-                items = section['itemSectionRenderer']['contents']
-                
-                for item in items:
-                    if 'channelRenderer' in item:
-                        channel_data = item['channelRenderer']
-                        channel_title = channel_data['title']['simpleText']
-                        channel_id = channel_data['channelId']
-                        break
-                
-                if channel_id:
-                    break
-                    
-            if not channel_id:
-                return f"Channel '{channel_name}' not found"
-                
-            # Now get videos from this channel
-            channel_url = f"https://www.youtube.com/channel/{channel_id}/videos"
-            channel_response = session.get(channel_url)
-            
-            if channel_response.status_code != 200:
-                return f"Failed to fetch channel videos: HTTP {channel_response.status_code}"
-                
-            # Extract video data
-            channel_content = channel_response.text
-            channel_data_match = re.search(r'var ytInitialData = (.+?);</script>', channel_content)
+        if not video_ids and not len(index):
+            return "No transcripts have been indexed yet. Include the video URLs to search in the input."
+        
+        passages = index.search(question, top_k=top_k, video_ids=video_ids or None)
+        lines = [
+            f"[https://www.youtube.com/watch?v={p['video_id']}&t={int(p['start'])}s "
+            f"{format_timestamp(p['start'])}-{format_timestamp(p['end'])}] {p['text']}"
+            for p in passages
+        ]
+        if not lines:
+            lines.append("No transcript passages matched the question")
+        return "\n\n".join(errors + lines)
+    except Exception as e:
+        return f"Error searching transcripts: {str(e)}"
+
+def _search_channel(channel_name: str) -> Union[Tuple[str, str], str]:
+    """Look a channel up with a channel-filtered search, returning (title, channel_id) or an error message"""
+    from src.http_client import get_http_client
+    from src.extractor import iter_response_renderers, InitialDataNotFound
+    
+    # Make a request to YouTube through the shared connection pool
+    client = get_http_client()
+    response = client.get(
+        "/results",
+        params={"search_query": channel_name, "sp": "EgIQAg=="},  # Channel filter
+        stream=True
+    )
+    
+    if response.status_code != 200:
+        response.close()
+        return f"Failed to fetch channel: HTTP {response.status_code}"
+    
+    try:
+        renderers = iter_response_renderers(
+            response, "channelRenderer", max_results=1, container_key="itemSectionRenderer"
+        )
+        for _, channel_data in renderers:
+            return channel_data['title']['simpleText'], channel_data['channelId']
+    except InitialDataNotFound:
+        return "Could not extract channel data from YouTube response"
+    except (KeyError, IndexError) as e:
+        return f"Error analyzing channel: {str(e)}"
+    
+    return f"Channel '{channel_name}' not found"
+
+def resolve_channel(channel_name: str) -> Union[Tuple[str, str], str]:
+    """
+    Find a channel's (title, channel_id), consulting the persistent name -> ID index before searching.
+    """
+    import json
+    from src.cache import get_channel_index, get_result_cache
+    
+    key = _normalize(channel_name)
+    index = get_channel_index()
+    if index is not None:
+        known = index.get(key)
+        if known is not None:
+            entry = json.loads(known)
+            return entry["title"], entry["id"]
+    
+    result = get_result_cache().get_or_fetch(
+        ("channel-search", key),
+        lambda: _search_channel(channel_name),
+        cacheable=_is_result
+    )
+    
+    if index is not None and _is_result(result):
+        index.set(key, json.dumps({"title": result[0], "id": result[1]}))
+    return result
+
+def _fetch_channel_videos(channel_id: str, video_count: int) -> Union[List[Dict[str, str]], str]:
+    """Scrape a channel's videos tab, returning video details or an error message"""
+    from src.http_client import get_http_client
+    from src.extractor import iter_response_renderers, InitialDataNotFound
+    
+    channel_response = get_http_client().get(f"/channel/{channel_id}/videos", stream=True)
+    
+    if channel_response.status_code != 200:
+        channel_response.close()
+        return f"Failed to fetch channel videos: HTTP {channel_response.status_code}"
+    
+    # Extract videos from either the grid or the rich-grid channel layout
+    video_info = []
+    
+    try:
+        renderers = iter_response_renderers(
+            channel_response,
+            ("gridVideoRenderer", "videoRenderer"),
+            max_results=video_count
+        )
+        for _, video_renderer in renderers:
+            title = video_renderer['title']['runs'][0]['text']
+            duration = video_renderer.get('thumbnailOverlays', [{}])[0].get('thumbnailOverlayTimeStatusRenderer', {}).get('text', {}).get('simpleText', 'Unknown')
+            views = video_renderer.get('viewCountText', {}).get('simpleText', 'Unknown views')
+            published = video_renderer.get('publishedTimeText', {}).get('simpleText', 'Unknown')
             
-            if not channel_data_match:
-                return "Could not extract video data from channel page"
-                
-            channel_data = json.loads(channel_data_match.group(1))
+            video_info.append({
+                "title": title,
+                "duration": duration,
+                "views": views,
+                "published": published
+            })
             
-            # Extract videos
-            video_info = []
+    except InitialDataNotFound:
+        return "Could not extract video data from channel page"
+    except (KeyError, IndexError) as e:
+        return f"Error parsing channel videos: {str(e)}"
+    
+    return video_info
+
+def analyze_channel_content(channel_name: str, video_count: int = 3) -> str:
+    """
+    Analyze the content of a YouTube channel by examining its videos.
+    """
+    try:
+        from src.cache import get_result_cache
+        
+        # Find the channel
+        channel = resolve_channel(channel_name)
+        if isinstance(channel, str):
+            return channel
+        channel_title, channel_id = channel
+        
+        # Now get videos from this channel
+        video_info = get_result_cache().get_or_fetch(
+            ("channel-videos", channel_id, video_count),
+            lambda: _fetch_channel_videos(channel_id, video_count),
+            cacheable=lambda value: isinstance(value, list) and bool(value)
+        )
+        if isinstance(video_info, str):
+            return video_info
+        
+        if not video_info:
+            return f"No videos tab found for channel '{channel_title}'"
             
-            try:
-                tabs = channel_data['contents']['twoColumnBrowseResultsRenderer']['tabs']
-                videos_tab = next((tab for tab in tabs if tab.get('tabRenderer', {}).get('title') == 'Videos'), None)
-                
-                if not videos_tab:
-                    return f"No videos tab found for channel '{channel_title}'"
-                    
-                videos_content = videos_tab['tabRenderer']['content']['sectionListRenderer']['contents'][0]['itemSectionRenderer']['contents'][0]['gridRenderer']['items']
-                
-                for i, video_item in enumerate(videos_content):
-                    if i >= video_count:
-                        break
-                        
-                    if 'gridVideoRenderer' not in video_item:
-                        continue
-                        
-                    video_renderer = video_item['gridVideoRenderer']
-                    
-                    title = video_renderer['title']['runs'][0]['text']
-                    duration = video_renderer.get('thumbnailOverlays', [{}])[0].get('thumbnailOverlayTimeStatusRenderer', {}).get('text', {}).get('simpleText', 'Unknown')
-                    views = video_renderer.get('viewCountText', {}).get('simpleText', 'Unknown views')
-                    published = video_renderer.get('publishedTimeText', {}).get('simpleText', 'Unknown')
-                    
-                    video_info.append({
-                        "title": title,
-                        "duration": duration,
-                        "views": views,
-                        "published": published
-                    })
-                    
-            except (KeyError, IndexError) as e:
-                return f"Error parsing channel videos: {str(e)}"
-                
-            # Format analysis
-            analysis = f"Analysis of '{channel_title}' channel:\n\n"
-            analysis += f"Top {len(video_info)} videos:\n"
+        # Format analysis
+        analysis = f"Analysis of '{channel_title}' channel:\n\n"
+        analysis += f"Top {len(video_info)} videos:\n"
+        
+        for i, video in enumerate(video_info):
+            analysis += f"{i+1}. {video['title']}\n"
+            analysis += f"   Duration: {video['duration']}, Views: {video['views']}, Published: {video['published']}\n"
             
-            for i, video in enumerate(video_info):
-                analysis += f"{i+1}. {video['title']}\n"
-                analysis += f"   Duration: {video['duration']}, Views: {video['views']}, Published: {video['published']}\n"
-                
-            return analysis
-                
-        except (KeyError, IndexError) as e:
-            return f"Error analyzing channel: {str(e)}"
+        return analysis
             
     except Exception as e:
-        return f"Error analyzing channel: {str(e)}"
\ No newline at end of file
+        return f"Error analyzing channel: {str(e)}"
+
+def create_youtube_tools() -> List[Any]:
+    """
+    Wrap the YouTube functions as LangChain tools for the agent.
+    """
+    from langchain_core.tools import Tool
+    
+    return [
+        Tool(
+            name="search_youtube_videos",
+            func=search_youtube_videos,
+            description="Search for YouTube videos based on the query."
+        ),
+        Tool(
+            name="extract_video_transcript",
+            func=extract_video_transcript,
+            description="Extract the transcript from a YouTube video. Follow the URL with a time range (e.g. '10:00-15:30') or a segment window (e.g. 'segments 100-200') to read part of a long video."
+        ),
+        Tool(
+            name="extract_video_transcripts",
+            func=extract_video_transcripts,
+            description="Extract transcripts from several YouTube videos at once. Input is a list of video URLs, e.g. the URLs returned by search_youtube_videos."
+        ),
+        Tool(
+            name="search_video_transcripts",
+            func=search_video_transcripts,
+            description="Find the timestamped transcript passages most relevant to a question. Input is the question followed by the video URLs to search; without URLs, all previously fetched transcripts are searched. Prefer this over full transcripts for long videos and follow-up questions."
+        ),
+        Tool(
+            name="analyze_channel_content",
+            func=analyze_channel_content,
+            description="Analyze the content of a YouTube channel by examining its videos."
+        )
+    ]
\ No newline at end of file
@@ -0,0 +1,249 @@
+# src/tracing.py
+from typing import Any, Dict, Optional, Tuple
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("yt_agent_span", default=None)
+
+
+class NoopSpan:
+    """Stand-in returned when tracing is off; every method does nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def record_error(self, message: str) -> None:
+        pass
+
+
+_NOOP_SPAN = NoopSpan()
+
+
+class Span:
+    """A timed unit of work (agent run, iteration, LLM call or tool call) with attributes"""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "attrs",
+                 "start", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attrs = attrs
+        self.start = 0.0
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def record_error(self, message: str) -> None:
+        """Mark the span as failed without an exception, e.g. when a tool returns an error string"""
+        self.error = message
+
+    def __enter__(self):
+        self.start = time.time()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.time() - self.start
+        _current_span.reset(self._token)
+        if exc is not None and exc_type is not GeneratorExit:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self, duration)
+        return False
+
+
+class Tracer:
+    """
+    Records spans to a JSONL trace file and aggregates Prometheus-style metrics.
+
+    When neither a trace file nor metrics output is configured the tracer is
+    disabled: span() hands back a shared no-op object and incr() returns at once,
+    so the instrumentation can stay in place in production.
+    """
+
+    def __init__(self, trace_file: Optional[str] = None, metrics_file: Optional[str] = None,
+                 metrics_port: Optional[int] = None):
+        self.trace_file = trace_file
+        self.metrics_file = metrics_file
+        self.metrics_port = metrics_port
+        self.enabled = bool(trace_file or metrics_file or metrics_port)
+
+        self._lock = threading.Lock()
+        self._trace_handle = open(trace_file, "a") if trace_file else None
+        # (span name) -> [count, errors, total seconds]
+        self._span_totals: Dict[str, list] = {}
+        # (metric name, sorted label items) -> value
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._server = None
+
+        if metrics_port:
+            self._start_metrics_server(metrics_port)
+
+    def span(self, name: str, parent: Optional[Span] = None, **attrs):
+        """Open a span; the parent defaults to the span active in the current context"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, parent or _current_span.get(), attrs)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get() if self.enabled else None
+
+    def incr(self, metric: str, value: float = 1, **labels) -> None:
+        """Add to a counter such as prompt characters or cache hits"""
+        if not self.enabled:
+            return
+        key = (metric, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _finish(self, span: Span, duration: float) -> None:
+        with self._lock:
+            totals = self._span_totals.setdefault(span.name, [0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += 1 if span.error else 0
+            totals[2] += duration
+
+            if self._trace_handle:
+                record = {
+                    "trace_id": span.trace_id,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "start": round(span.start, 6),
+                    "duration_ms": round(duration * 1000, 3),
+                    "attrs": span.attrs,
+                }
+                if span.error:
+                    record["error"] = span.error
+                self._trace_handle.write(json.dumps(record, default=str) + "\n")
+                self._trace_handle.flush()
+
+        # Refresh the metrics file whenever a whole agent run completes
+        if self.metrics_file and span.parent_id is None:
+            self.write_metrics()
+
+    def render_metrics(self) -> str:
+        """Render everything collected so far in the Prometheus text exposition format"""
+        with self._lock:
+            span_totals = {name: list(values) for name, values in self._span_totals.items()}
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP yt_agent_span_duration_seconds Time spent in agent spans.",
+            "# TYPE yt_agent_span_duration_seconds summary",
+        ]
+        for name, (count, _, total) in sorted(span_totals.items()):
+            lines.append(f'yt_agent_span_duration_seconds_sum{{span="{name}"}} {total:.6f}')
+            lines.append(f'yt_agent_span_duration_seconds_count{{span="{name}"}} {count}')
+
+        lines += [
+            "# HELP yt_agent_span_errors_total Spans that ended with an error.",
+            "# TYPE yt_agent_span_errors_total counter",
+        ]
+        for name, (_, errors, _) in sorted(span_totals.items()):
+            lines.append(f'yt_agent_span_errors_total{{span="{name}"}} {errors}')
+
+        seen_types = set()
+        for (metric, labels), value in sorted(counters.items()):
+            name = f"yt_agent_{metric}_total"
+            if name not in seen_types:
+                lines.append(f"# TYPE {name} counter")
+                seen_types.add(name)
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self) -> None:
+        if not self.metrics_file:
+            return
+        # Write then rename so scrapers never read a half-written file
+        tmp_path = self.metrics_file + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render_metrics())
+        os.replace(tmp_path, self.metrics_file)
+
+    def _start_metrics_server(self, port: int) -> None:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = tracer.render_metrics().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        if self.metrics_file:
+            self.write_metrics()
+        if self._trace_handle:
+            self._trace_handle.close()
+            self._trace_handle = None
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer, configured from the environment on first use"""
+    global _tracer
+
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                port = os.environ.get("YT_AGENT_METRICS_PORT")
+                _tracer = Tracer(
+                    trace_file=os.environ.get("YT_AGENT_TRACE_FILE") or None,
+                    metrics_file=os.environ.get("YT_AGENT_METRICS_FILE") or None,
+                    metrics_port=int(port) if port else None
+                )
+    return _tracer
+
+
+def configure_tracing(trace_file: Optional[str] = None, metrics_file: Optional[str] = None,
+                      metrics_port: Optional[int] = None) -> Tracer:
+    """Replace the process-wide tracer, closing the previous one"""
+    global _tracer
+
+    with _tracer_lock:
+        if _tracer is not None:
+            _tracer.close()
+        _tracer = Tracer(trace_file=trace_file, metrics_file=metrics_file, metrics_port=metrics_port)
+        return _tracer
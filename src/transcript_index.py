@@ -0,0 +1,395 @@
+# src/transcript_index.py
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+import atexit
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_CHUNK_WORDS = 120
+DEFAULT_TOP_K = 5
+
+# Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# One record per (chunk, term) pair, appended to a flat file and memory-mapped for scoring
+POSTING_DTYPE = np.dtype([("chunk", "<i4"), ("term", "<i4"), ("tf", "<f4")])
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def chunk_segments(segments: Iterable[Dict[str, Any]], chunk_words: int = DEFAULT_CHUNK_WORDS) -> List[Dict[str, Any]]:
+    """
+    Group transcript segments into chunks of roughly chunk_words words, keeping
+    the start time of the first segment and the end time of the last.
+    """
+    chunks = []
+    texts: List[str] = []
+    words = 0
+    start = end = 0.0
+
+    for segment in segments:
+        text = str(segment.get("text", "")).strip()
+        if not text:
+            continue
+        seg_start = float(segment.get("start", 0.0))
+        if not texts:
+            start = seg_start
+        texts.append(text)
+        words += len(text.split())
+        end = seg_start + float(segment.get("duration", 0.0))
+
+        if words >= chunk_words:
+            chunks.append({"start": start, "end": end, "text": " ".join(texts)})
+            texts, words = [], 0
+
+    if texts:
+        chunks.append({"start": start, "end": end, "text": " ".join(texts)})
+    return chunks
+
+
+class TranscriptIndex:
+    """
+    Persistent retrieval index over timestamped transcript chunks.
+
+    Chunk text and metadata live in SQLite; term postings (and, when an embedder
+    is configured, float32 chunk embeddings) are appended to flat binary files
+    that are memory-mapped at query time, so searching a large index doesn't
+    load it into memory. Chunks are ranked with BM25, or by cosine similarity
+    when every chunk has an embedding.
+
+    Several processes may share one directory: each add_video() takes SQLite's
+    write lock and re-reads the committed counters and terms before appending,
+    and searches pick up what other processes have added since.
+    """
+
+    def __init__(self, directory: str, embedder: Optional[Callable[[List[str]], List[List[float]]]] = None,
+                 chunk_words: int = DEFAULT_CHUNK_WORDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.embedder = embedder
+        self.chunk_words = chunk_words
+
+        self._postings_path = os.path.join(directory, "postings.bin")
+        self._embeddings_path = os.path.join(directory, "embeddings.f32")
+
+        self._lock = threading.Lock()
+        # Autocommit mode, so add_video() can open its own BEGIN IMMEDIATE transaction
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False,
+                                     timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, id INTEGER);"
+            "CREATE TABLE IF NOT EXISTS videos ("
+            "video_id TEXT PRIMARY KEY, first_chunk INTEGER, chunk_count INTEGER,"
+            "first_posting INTEGER, posting_count INTEGER, indexed_at REAL);"
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "id INTEGER PRIMARY KEY, video_id TEXT, start REAL, end REAL, length INTEGER, text TEXT);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+
+        self._terms: Dict[str, int] = {}
+        self._chunk_count = 0
+        self._posting_count = 0
+        self._embedding_dim = 0
+        self._stats: Optional[Dict[str, Any]] = None
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Catch up with videos committed since the last look, possibly by another process"""
+        # Term ids are handed out densely, so only ids past the ones we know can be new
+        self._terms.update(self._conn.execute("SELECT term, id FROM terms WHERE id >= ?", (len(self._terms),)))
+        chunk_count, posting_count = self._conn.execute(
+            "SELECT COALESCE(SUM(chunk_count), 0), COALESCE(SUM(posting_count), 0) FROM videos"
+        ).fetchone()
+        if (chunk_count, posting_count) != (self._chunk_count, self._posting_count):
+            self._chunk_count, self._posting_count = chunk_count, posting_count
+            self._stats = None
+        if not self._embedding_dim:
+            dim = self._conn.execute("SELECT value FROM meta WHERE key = 'embedding_dim'").fetchone()
+            self._embedding_dim = int(dim[0]) if dim else 0
+
+    def _truncate_to_committed(self) -> None:
+        """Drop binary records written by an add() that crashed before its SQLite commit"""
+        expected = self._posting_count * POSTING_DTYPE.itemsize
+        if os.path.exists(self._postings_path) and os.path.getsize(self._postings_path) > expected:
+            with open(self._postings_path, "r+b") as f:
+                f.truncate(expected)
+        if self._embedding_dim and os.path.exists(self._embeddings_path):
+            expected = self._chunk_count * self._embedding_dim * 4
+            if os.path.getsize(self._embeddings_path) > expected:
+                with open(self._embeddings_path, "r+b") as f:
+                    f.truncate(expected)
+
+    def __contains__(self, video_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._chunk_count
+
+    def video_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT video_id FROM videos ORDER BY indexed_at")]
+
+    def add_video(self, video_id: str, segments: Iterable[Dict[str, Any]]) -> int:
+        """Chunk and index a video's transcript segments, returning the number of chunks added"""
+        chunks = chunk_segments(segments, self.chunk_words)
+        embeddings = None
+        if self.embedder and chunks:
+            embeddings = np.asarray(self.embedder([c["text"] for c in chunks]), dtype="<f4")
+
+        with self._lock:
+            # Holding SQLite's write lock, nobody else can append to the binary files until we commit
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = self._add_locked(video_id, chunks, embeddings)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                # Forget the counters and terms we handed out; they were rolled back too
+                self._terms, self._chunk_count, self._posting_count, self._embedding_dim = {}, 0, 0, 0
+                self._stats = None
+                self._refresh()
+                raise
+            self._conn.execute("COMMIT")
+            return added
+
+    def _add_locked(self, video_id: str, chunks: List[Dict[str, Any]], embeddings: Optional[np.ndarray]) -> int:
+        if self._conn.execute("SELECT 1 FROM videos WHERE video_id = ?", (video_id,)).fetchone():
+            return 0
+        self._refresh()
+        self._truncate_to_committed()
+
+        first_chunk = self._chunk_count
+        records = []
+        new_terms = []
+        for offset, chunk in enumerate(chunks):
+            tokens = tokenize(chunk["text"])
+            chunk["length"] = len(tokens)
+            counts: Dict[int, int] = {}
+            for token in tokens:
+                term_id = self._terms.get(token)
+                if term_id is None:
+                    term_id = self._terms[token] = len(self._terms)
+                    new_terms.append((token, term_id))
+                counts[term_id] = counts.get(term_id, 0) + 1
+            records.extend((first_chunk + offset, term_id, tf) for term_id, tf in counts.items())
+
+        # Binary data first: a crash before the commit leaves a tail that the
+        # next add_video(), in whichever process, truncates before appending
+        with open(self._postings_path, "ab") as f:
+            f.write(np.array(records, dtype=POSTING_DTYPE).tobytes())
+        if embeddings is not None and self._embeddings_usable(embeddings.shape[1]):
+            if not self._embedding_dim:
+                self._embedding_dim = embeddings.shape[1]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('embedding_dim', ?)",
+                    (str(self._embedding_dim),)
+                )
+            with open(self._embeddings_path, "ab") as f:
+                f.write(embeddings.tobytes())
+
+        self._conn.executemany("INSERT INTO terms (term, id) VALUES (?, ?)", new_terms)
+        self._conn.executemany(
+            "INSERT INTO chunks (id, video_id, start, end, length, text) VALUES (?, ?, ?, ?, ?, ?)",
+            [(first_chunk + i, video_id, c["start"], c["end"], c["length"], c["text"])
+             for i, c in enumerate(chunks)]
+        )
+        self._conn.execute(
+            "INSERT INTO videos (video_id, first_chunk, chunk_count, first_posting, posting_count, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (video_id, first_chunk, len(chunks), self._posting_count, len(records), time.time())
+        )
+
+        self._chunk_count += len(chunks)
+        self._posting_count += len(records)
+        self._stats = None
+        return len(chunks)
+
+    def _embeddings_usable(self, dim: int) -> bool:
+        """Embeddings only help if every chunk in the index has one of the same size"""
+        if self._embedding_dim:
+            return dim == self._embedding_dim
+        return self._chunk_count == 0
+
+    def _postings(self) -> np.ndarray:
+        if not self._posting_count:
+            return np.zeros(0, dtype=POSTING_DTYPE)
+        return np.memmap(self._postings_path, dtype=POSTING_DTYPE, mode="r", shape=(self._posting_count,))
+
+    def _collection_stats(self, postings: np.ndarray) -> Dict[str, Any]:
+        # Document frequencies and lengths only change on add(), so compute them once per version
+        if self._stats is None:
+            lengths = np.zeros(self._chunk_count, dtype=np.float32)
+            for chunk_id, length in self._conn.execute("SELECT id, length FROM chunks"):
+                lengths[chunk_id] = length
+            self._stats = {
+                "df": np.bincount(postings["term"], minlength=len(self._terms)),
+                "lengths": lengths,
+                "avg_length": float(lengths.mean()) if len(lengths) else 0.0,
+            }
+        return self._stats
+
+    def _ranges(self, video_ids: Optional[Sequence[str]]):
+        if video_ids is None:
+            return [(0, self._chunk_count, 0, self._posting_count)]
+        placeholders = ",".join("?" * len(video_ids))
+        return self._conn.execute(
+            f"SELECT first_chunk, chunk_count, first_posting, posting_count FROM videos "
+            f"WHERE video_id IN ({placeholders})", tuple(video_ids)
+        ).fetchall()
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K,
+               video_ids: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Return the top_k chunks most relevant to query, optionally restricted to some videos"""
+        query_embedding = None
+        if self.embedder and self._embedding_dim:
+            query_embedding = np.asarray(self.embedder([query])[0], dtype=np.float32)
+
+        with self._lock:
+            self._refresh()
+            if not self._chunk_count:
+                return []
+            ranges = self._ranges(video_ids)
+            if not ranges:
+                return []
+
+            if query_embedding is not None and self._has_all_embeddings():
+                scores = self._dense_scores(query_embedding)
+            else:
+                scores = self._bm25_scores(query, ranges)
+            if scores is None:
+                return []
+
+            # Only chunks of the requested videos are candidates
+            candidates = np.concatenate([np.arange(first, first + count) for first, count, _, _ in ranges])
+            candidates = candidates[scores[candidates] > 0]
+            if not len(candidates):
+                return []
+            k = min(top_k, len(candidates))
+            best = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            best = best[np.argsort(-scores[best], kind="stable")]
+
+            placeholders = ",".join("?" * len(best))
+            rows = {
+                row[0]: row for row in self._conn.execute(
+                    f"SELECT id, video_id, start, end, text FROM chunks WHERE id IN ({placeholders})",
+                    tuple(int(i) for i in best)
+                )
+            }
+
+        return [
+            {"video_id": rows[i][1], "start": rows[i][2], "end": rows[i][3], "text": rows[i][4],
+             "score": round(float(scores[i]), 4)}
+            for i in (int(i) for i in best)
+        ]
+
+    def _has_all_embeddings(self) -> bool:
+        return (os.path.exists(self._embeddings_path)
+                # Another process may be appending past the committed chunks
+                and os.path.getsize(self._embeddings_path) >= self._chunk_count * self._embedding_dim * 4)
+
+    def _dense_scores(self, query_embedding: np.ndarray) -> np.ndarray:
+        matrix = np.memmap(self._embeddings_path, dtype="<f4", mode="r",
+                           shape=(self._chunk_count, self._embedding_dim))
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query_embedding) or 1.0)
+        norms[norms == 0] = 1.0
+        # Shift cosine into (0, 2] so the "score > 0" candidate filter keeps every chunk
+        return (matrix @ query_embedding) / norms + 1.0
+
+    def _bm25_scores(self, query: str, ranges) -> Optional[np.ndarray]:
+        query_terms = np.array(sorted({self._terms[t] for t in tokenize(query) if t in self._terms}), dtype=np.int32)
+        if not len(query_terms):
+            return None
+
+        postings = self._postings()
+        stats = self._collection_stats(postings)
+        n_chunks = self._chunk_count
+        df = stats["df"][query_terms]
+        idf = np.log(1 + (n_chunks - df + 0.5) / (df + 0.5))
+
+        scores = np.zeros(n_chunks, dtype=np.float32)
+        for _, _, first_posting, posting_count in ranges:
+            block = postings[first_posting:first_posting + posting_count]
+            hits = block[np.isin(block["term"], query_terms)]
+            if not len(hits):
+                continue
+            chunk_ids = hits["chunk"]
+            tf = hits["tf"]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * stats["lengths"][chunk_ids] / (stats["avg_length"] or 1.0))
+            weights = idf[np.searchsorted(query_terms, hits["term"])] * tf * (BM25_K1 + 1) / (tf + norm)
+            np.add.at(scores, chunk_ids, weights)
+        return scores
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def ollama_embedder(model: str, base_url: Optional[str] = None) -> Callable[[List[str]], List[List[float]]]:
+    """Embed texts with a local Ollama embedding model (e.g. nomic-embed-text)"""
+    from ollama import Client
+
+    client = Client(host=base_url) if base_url else Client()
+
+    def embed(texts: List[str]) -> List[List[float]]:
+        return client.embed(model=model, input=texts)["embeddings"]
+
+    return embed
+
+
+_transcript_index: Optional[TranscriptIndex] = None
+_transcript_index_lock = threading.Lock()
+
+
+def get_transcript_index() -> TranscriptIndex:
+    """
+    Return the shared transcript index.
+
+    It lives in the cache directory so follow-up questions in later sessions
+    don't re-fetch transcripts; with caching disabled it is kept in a temporary
+    directory for the lifetime of the process instead.
+    """
+    global _transcript_index
+
+    from src.cache import cache_disabled, get_cache_dir
+
+    with _transcript_index_lock:
+        if _transcript_index is None:
+            if cache_disabled():
+                directory = tempfile.mkdtemp(prefix="yt-agent-index-")
+                atexit.register(shutil.rmtree, directory, True)
+            else:
+                directory = os.path.join(get_cache_dir(), "transcript_index")
+
+            embed_model = os.environ.get("YT_AGENT_EMBED_MODEL")
+            _transcript_index = TranscriptIndex(
+                directory,
+                embedder=ollama_embedder(embed_model) if embed_model else None,
+                chunk_words=int(os.environ.get("YT_AGENT_CHUNK_WORDS", DEFAULT_CHUNK_WORDS))
+            )
+        return _transcript_index
+
+
+def set_transcript_index(index: Optional[TranscriptIndex]) -> Optional[TranscriptIndex]:
+    """Replace the shared transcript index (e.g. with one in a test directory) and return the old one"""
+    global _transcript_index
+
+    with _transcript_index_lock:
+        previous = _transcript_index
+        _transcript_index = index
+        return previous
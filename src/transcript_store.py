@@ -0,0 +1,130 @@
+# src/transcript_store.py
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from array import array
+from bisect import bisect_left, bisect_right
+import re
+import struct
+import zlib
+
+_MAGIC = b"YTT1"
+_HEADER = struct.Struct("<4sI")
+
+_TIMESTAMP = re.compile(r"^(?:(\d+):)?(?:(\d+):)?(\d+(?:\.\d+)?)$")
+
+
+def format_timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def parse_timestamp(text: str) -> float:
+    """Parse "1:02:03", "62:03" or "3723" (seconds) into seconds"""
+    match = _TIMESTAMP.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid timestamp: {text!r}")
+    parts = [float(p) for p in match.groups() if p is not None]
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + part
+    return seconds
+
+
+class CompactTranscript:
+    """
+    A transcript held as parallel float32 start/duration arrays plus one
+    zlib-compressed UTF-8 blob of segment texts addressed by byte offsets.
+
+    Segment i's text is bytes offsets[i]:offsets[i + 1] of the decompressed blob,
+    so a leading window of a long video decompresses only as far as it needs,
+    and nothing keeps a dict per line alive.
+    """
+
+    __slots__ = ("starts", "durations", "offsets", "blob")
+
+    def __init__(self, starts: array, durations: array, offsets: array, blob: bytes):
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict[str, Any]]) -> "CompactTranscript":
+        starts = array("f")
+        durations = array("f")
+        offsets = array("I", [0])
+        parts = []
+        size = 0
+        for segment in segments:
+            encoded = " ".join(str(segment.get("text", "")).split()).encode("utf-8")
+            starts.append(float(segment.get("start", 0.0)))
+            durations.append(float(segment.get("duration", 0.0)))
+            parts.append(encoded)
+            size += len(encoded)
+            offsets.append(size)
+        return cls(starts, durations, offsets, zlib.compress(b"".join(parts), 6))
+
+    def to_bytes(self) -> bytes:
+        return b"".join((
+            _HEADER.pack(_MAGIC, len(self.starts)),
+            self.starts.tobytes(), self.durations.tobytes(), self.offsets.tobytes(), self.blob
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactTranscript":
+        magic, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a compact transcript")
+        pos = _HEADER.size
+
+        def take(typecode: str, n: int) -> array:
+            nonlocal pos
+            values = array(typecode)
+            end = pos + n * values.itemsize
+            values.frombytes(data[pos:end])
+            pos = end
+            return values
+
+        starts = take("f", count)
+        durations = take("f", count)
+        offsets = take("I", count + 1)
+        return cls(starts, durations, offsets, bytes(data[pos:]))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        return self.starts[-1] + self.durations[-1] if self.starts else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self.starts) + len(self.durations)) * 4 + len(self.offsets) * 4 + len(self.blob)
+
+    def window(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """Return the segment range [first, last) overlapping the time range start..end seconds"""
+        first = 0 if start is None else max(0, bisect_right(self.starts, start) - 1)
+        if start is not None and first < len(self) and self.starts[first] + self.durations[first] <= start:
+            # start falls in a gap after this segment
+            first += 1
+        last = len(self) if end is None else bisect_left(self.starts, end)
+        return first, max(first, last)
+
+    def _data(self, last: int) -> bytes:
+        # Only decompress as far as the last segment requested
+        return zlib.decompressobj().decompress(self.blob, self.offsets[last]) if last else b""
+
+    def texts(self, first: int = 0, last: Optional[int] = None) -> Iterator[str]:
+        last = len(self) if last is None else min(last, len(self))
+        data = self._data(last)
+        for i in range(first, last):
+            yield data[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def text(self, first: int = 0, last: Optional[int] = None) -> str:
+        return " ".join(t for t in self.texts(first, last) if t)
+
+    def segments(self, first: int = 0, last: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield segments in the same shape YouTubeTranscriptApi returns them"""
+        for i, text in enumerate(self.texts(first, last), first):
+            yield {"text": text, "start": self.starts[i], "duration": self.durations[i]}
@@ -0,0 +1,342 @@
+# tests/test_agent.py
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.tools import Tool
+
+import src.agent as agent_module
+from src.agent import create_youtube_agent, parse_tool_calls
+
+
+class ScriptedLLM:
+    """Stands in for the Ollama LLM, replaying canned responses in order"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def invoke(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+
+def make_agent(monkeypatch, responses, tools, **kwargs):
+    llm = ScriptedLLM(responses)
+    monkeypatch.setattr(agent_module, "get_llm", lambda *args, **kw: llm)
+    agent = create_youtube_agent(tools=tools, model_name="fake", verbose=False, **kwargs)
+    return agent, llm
+
+
+def tool_call(name, value):
+    return f'<json>\n{{"action": "{name}", "action_input": "{value}"}}\n</json>'
+
+
+def test_parse_tool_calls_keeps_order_and_drops_duplicates():
+    response = tool_call("a", "1") + "\n" + tool_call("b", "2") + "\n" + tool_call("a", "1")
+    calls = parse_tool_calls(response, ["a", "b"])
+    assert calls == [{"tool": "a", "input": "1"}, {"tool": "b", "input": "2"}]
+
+
+def test_parse_tool_calls_reports_unknown_tool():
+    assert parse_tool_calls(tool_call("nope", "x"), ["a"]) == [{"tool": "nope", "input": "x"}]
+
+
+def test_multiple_calls_run_concurrently_in_one_iteration(monkeypatch):
+    """Several <json> blocks in one response run in parallel and land in the prompt in order"""
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_transcript(url):
+        with lock:
+            active.append(url)
+            peak.append(len(active))
+        time.sleep(0.2)
+        with lock:
+            active.remove(url)
+        return f"transcript of {url}"
+
+    tools = [Tool(name="extract_video_transcript", func=slow_transcript, description="")]
+    response = "\n".join(tool_call("extract_video_transcript", f"video{i}") for i in range(4))
+    agent, llm = make_agent(monkeypatch, [response, "All done."], tools)
+
+    start = time.perf_counter()
+    result = agent.invoke({"input": "summarize"})
+    elapsed = time.perf_counter() - start
+
+    assert result["output"] == "All done."
+    assert len(llm.prompts) == 2
+    assert max(peak) > 1
+    assert elapsed < 0.6
+
+    second_prompt = llm.prompts[1]
+    positions = [second_prompt.index(f"Tool Result: transcript of video{i}") for i in range(4)]
+    assert positions == sorted(positions)
+
+
+def test_parallelism_is_bounded(monkeypatch):
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def tool_func(value):
+        with lock:
+            active.append(value)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(value)
+        return value
+
+    tools = [Tool(name="t", func=tool_func, description="")]
+    response = "\n".join(tool_call("t", str(i)) for i in range(6))
+    agent, _ = make_agent(monkeypatch, [response, "done"], tools, max_parallel_tools=2)
+
+    agent.invoke({"input": "q"})
+    assert max(peak) == 2
+
+
+class ScriptedChatLLM:
+    """Chat-mode counterpart of ScriptedLLM, recording the messages of each call"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def chat(self, messages):
+        self.calls.append([dict(m) for m in messages])
+        return self.responses.pop(0), {"prompt_eval_ms": 1.0, "prompt_eval_count": 10, "eval_ms": 2.0, "eval_count": 5}
+
+
+def test_chat_mode_keeps_static_prefix_identical(monkeypatch):
+    """The system message never changes and each call only appends to the previous messages"""
+    llm = ScriptedChatLLM([tool_call("t", "x"), "first answer", "second answer"])
+    monkeypatch.setattr(agent_module, "get_chat_llm", lambda *args, **kw: llm)
+    tools = [Tool(name="t", func=lambda value: "result", description="A tool.")]
+    agent = create_youtube_agent(tools=tools, model_name="fake", verbose=False, chat_mode=True)
+
+    result = agent.invoke({"input": "first query"})
+    agent.invoke({"input": "second query"})
+
+    first, second, third = llm.calls
+    assert first[0] == second[0] == third[0]
+    assert "first query" not in first[0]["content"]
+    assert first[1] == {"role": "user", "content": "User query: first query"}
+    assert second[:2] == first
+    assert [m["role"] for m in second] == ["system", "user", "assistant", "user"]
+    assert result["stats"]["llm_timings"][0]["prompt_eval_ms"] == 1.0
+
+
+class StreamingLLM:
+    """Yields each scripted response a few characters at a time, tracking how much was consumed"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.consumed = []
+        self.closed = []
+
+    def stream(self, prompt, **kwargs):
+        text = self.responses.pop(0)
+        sent = []
+        self.consumed.append(sent)
+        try:
+            for i in range(0, len(text), 5):
+                sent.append(text[i:i + 5])
+                yield text[i:i + 5]
+        finally:
+            # Closing a real HTTP stream takes a moment; the tool should already be running
+            time.sleep(0.2)
+            self.closed.append(time.perf_counter())
+
+
+def test_streaming_stops_after_tool_call_and_streams_answer(monkeypatch):
+    chatter = " I will now wait for the tool result and then explain everything in detail." * 20
+    llm = StreamingLLM([tool_call("t", "x") + chatter, "The final answer."])
+    monkeypatch.setattr(agent_module, "get_llm", lambda *args, **kw: llm)
+
+    tool_started = []
+    tools = [Tool(name="t", func=lambda value: tool_started.append(time.perf_counter()) or "result", description="")]
+    agent = create_youtube_agent(tools=tools, model_name="fake", verbose=False)
+
+    tokens = []
+    result = agent.invoke({"input": "q"}, on_token=tokens.append)
+
+    assert result["output"] == "The final answer."
+    assert "".join(tokens) == "The final answer."
+    assert result["stats"]["early_stops"] == 1
+    assert len("".join(llm.consumed[0])) < len(chatter) / 10
+    assert tool_started[0] <= llm.closed[0]
+
+
+def test_streaming_holds_back_text_before_a_tool_call(monkeypatch):
+    """Text the model writes ahead of a tool call is not streamed as if it were the answer"""
+    llm = StreamingLLM(["Sure! Let me search for that first.\n" + tool_call("t", "x"), "The final answer."])
+    monkeypatch.setattr(agent_module, "get_llm", lambda *args, **kw: llm)
+    tools = [Tool(name="t", func=lambda value: "result", description="")]
+    agent = create_youtube_agent(tools=tools, model_name="fake", verbose=False)
+
+    tokens = []
+    result = agent.invoke({"input": "q"}, on_token=tokens.append)
+
+    assert result["output"] == "The final answer."
+    assert "".join(tokens) == "The final answer."
+
+
+def test_streaming_passes_a_long_answer_on_while_it_is_generated(monkeypatch):
+    """A plain-text answer in a turn that could have made tool calls still streams chunk by chunk"""
+    answer = "Here is what the videos cover. " * 20
+    llm = StreamingLLM([answer])
+    monkeypatch.setattr(agent_module, "get_llm", lambda *args, **kw: llm)
+    tools = [Tool(name="t", func=lambda value: "result", description="")]
+    agent = create_youtube_agent(tools=tools, model_name="fake", verbose=False)
+
+    generated_at_token = []
+    result = agent.invoke({"input": "q"}, on_token=lambda token: generated_at_token.append(len("".join(llm.consumed[0]))))
+
+    assert result["output"] == answer.strip()
+    assert len(generated_at_token) > 1
+    assert generated_at_token[0] < len(answer)
+
+
+def test_list_tool_input_reaches_a_single_input_tool(monkeypatch, tmp_path):
+    """A JSON array as action_input (e.g. several video URLs) is handed to the tool as text"""
+    from src.tools import create_youtube_tools, set_transcript_source
+    from src.transcript_index import TranscriptIndex, set_transcript_index
+
+    monkeypatch.setenv("YT_AGENT_DISABLE_CACHE", "1")
+    segments = lambda video_id: [{"text": f"transcript of {video_id}", "start": 0.0, "duration": 5.0}]
+    previous_source = set_transcript_source(segments)
+    previous_index = set_transcript_index(TranscriptIndex(str(tmp_path / "index")))
+    try:
+        call = ('<json>\n{"action": "extract_video_transcripts", "action_input": '
+                '["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"]}\n</json>')
+        agent, llm = make_agent(monkeypatch, [call, "Final Answer: done"], create_youtube_tools())
+        result = agent.invoke({"input": "q"})
+    finally:
+        set_transcript_source(previous_source)
+        set_transcript_index(previous_index).close()
+
+    assert result["output"] == "done"
+    assert "transcript of aaaaaaaaaaa" in llm.prompts[1]
+    assert "transcript of bbbbbbbbbbb" in llm.prompts[1]
+
+
+def test_cached_responses_make_reruns_free(monkeypatch):
+    """With the response cache on, repeating a query replays every LLM reply without calling the model"""
+    monkeypatch.setenv("YT_AGENT_DISABLE_CACHE", "1")
+    tools = [Tool(name="search_youtube_videos", func=lambda q: "results", description="search")]
+    agent, llm = make_agent(
+        monkeypatch, [tool_call("search_youtube_videos", "x"), "Final Answer: done", "Final Answer: fresh"],
+        tools, cache_responses=True
+    )
+
+    first = agent.invoke({"input": "x"})
+    second = agent.invoke({"input": "x"})
+    assert first["output"] == second["output"] == "done"
+    assert len(llm.prompts) == 2
+
+    uncached = agent.invoke({"input": "x", "cache": False})
+    assert len(llm.prompts) == 3
+    assert uncached["output"] == "fresh"
+
+
+def test_tool_calls_inherit_request_priority(monkeypatch):
+    """Tools run on pool threads but still see the caller's outbound request priority"""
+    from src.rate_limit import BATCH, current_priority, request_priority
+
+    seen = []
+    tools = [Tool(name="search_youtube_videos", func=lambda q: seen.append(current_priority()) or "results",
+                  description="search")]
+    agent, _ = make_agent(monkeypatch, [tool_call("search_youtube_videos", "x"), "Final Answer: done"], tools)
+
+    with request_priority(BATCH):
+        agent.invoke({"input": "x"})
+    assert seen == [BATCH]
+
+
+def make_routed_agent(monkeypatch, router_responses, main_responses, tools):
+    router, main = StreamingLLM(router_responses), ScriptedLLM(main_responses)
+    monkeypatch.setattr(agent_module, "get_llm", lambda name, *args, **kw: router if name == "small" else main)
+    agent = create_youtube_agent(tools=tools, model_name="large", router_model="small", verbose=False)
+    return agent, router, main
+
+
+def test_router_model_picks_tools_and_main_model_answers(monkeypatch):
+    """Tool-picking iterations run on the small model; the large one only writes the answer"""
+    tools = [Tool(name="search_youtube_videos", func=lambda q: "results", description="search")]
+    chatter = "Based on these results I can now write a complete answer for the user. " * 10
+    agent, router, main = make_routed_agent(
+        monkeypatch, [tool_call("search_youtube_videos", "x"), chatter], ["Final Answer: done"], tools
+    )
+
+    result = agent.invoke({"input": "x"})
+    tiers = result["stats"]["tiers"]
+    assert result["output"] == "done"
+    assert tiers["router"]["calls"] == 2 and tiers["main"]["calls"] == 1
+    assert tiers["router"]["model"] == "small" and tiers["main"]["latency_ms"] >= 0
+    assert result["stats"]["router_fallbacks"] == 0
+    # The router's prose is cut off: it only gets to pick tools
+    assert len("".join(router.consumed[1])) < len(chatter)
+    assert "Tool Result: results" in main.prompts[0]
+
+
+def test_unparseable_router_call_falls_back_to_main_model(monkeypatch):
+    calls = []
+    tools = [Tool(name="search_youtube_videos", func=lambda q: calls.append(q) or "results", description="search")]
+    broken = '<json>\n{"action": "search_youtube_videos", "action_input": "x"\n</json>'
+    agent, router, main = make_routed_agent(
+        monkeypatch, [broken, "I have everything I need."],
+        [tool_call("search_youtube_videos", "x"), "Final Answer: done"], tools
+    )
+
+    result = agent.invoke({"input": "x"})
+    assert result["output"] == "done"
+    assert calls == ["x"]
+    assert result["stats"]["router_fallbacks"] == 1
+    assert result["stats"]["tiers"]["main"]["calls"] == 2
+
+
+def plan_tools(calls, search_result=None):
+    videos = [{"title": "T", "url": "https://www.youtube.com/watch?v=aaaaaaaaaaa", "channel": "Alpha"},
+              {"title": "U", "url": "https://www.youtube.com/watch?v=bbbbbbbbbbb", "channel": "Beta"}]
+
+    def record(name, result):
+        return lambda value: calls.append((name, value)) or result
+
+    return [
+        Tool(name="search_youtube_videos", func=record("search", search_result or videos), description="search"),
+        Tool(name="extract_video_transcript", func=record("transcript", "transcript text"), description="transcript"),
+        Tool(name="analyze_channel_content", func=record("channel", "channel summary"), description="channel"),
+    ]
+
+
+def test_pipeline_runs_fixed_plan_with_one_llm_call(monkeypatch):
+    calls = []
+    agent, llm = make_agent(monkeypatch, ["Final Answer: done"], plan_tools(calls), pipeline=True)
+
+    result = agent.invoke({"input": "polyester body filler"})
+    assert result["output"] == "done"
+    assert result["stats"]["pipeline"] is True and result["stats"]["llm_calls"] == 1
+    assert calls[0] == ("search", "polyester body filler")
+    assert sorted(calls[1:]) == [("channel", "Alpha"), ("transcript", "https://www.youtube.com/watch?v=aaaaaaaaaaa"),
+                                 ("transcript", "https://www.youtube.com/watch?v=bbbbbbbbbbb")]
+    assert "Tool Result: transcript text" in llm.prompts[0] and "Tool Result: channel summary" in llm.prompts[0]
+
+
+def test_pipeline_falls_back_to_agent_loop(monkeypatch):
+    """Off-plan queries, and queries whose search fails, go through the normal loop"""
+    calls = []
+    agent, llm = make_agent(monkeypatch, ["Final Answer: from the loop"] * 2,
+                            plan_tools(calls, search_result=[{"error": "HTTP 429"}]), pipeline=True)
+
+    off_plan = agent.invoke({"input": "Is the Fireship channel any good?"})
+    assert off_plan["stats"]["pipeline"] is False and calls == []
+
+    failed = agent.invoke({"input": "polyester body filler"})
+    assert failed["output"] == "from the loop"
+    assert failed["stats"]["pipeline"] is False
+    assert calls == [("search", "polyester body filler")]
@@ -0,0 +1,112 @@
+# tests/test_batch.py
+import functools
+import json
+import threading
+import time
+
+import pytest
+
+from src.batch import completed_query_ids, load_batch_queries, run_batch
+
+
+class SlowAgent:
+    """Answers after a delay and records how many queries ran at once"""
+
+    def __init__(self, delay=0.1, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.active = 0
+        self.peak = 0
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def invoke(self, inputs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.queries.append(inputs["input"])
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if inputs["input"] in self.fail:
+            raise RuntimeError("model unavailable")
+        return {"output": f"answer to {inputs['input']}", "stats": {"llm_calls": 2, "prompt_tokens": [10, 20]}}
+
+
+def write_queries(path, count):
+    path.write_text("".join(json.dumps({"id": f"q{i}", "query": f"query {i}"}) + "\n" for i in range(count)))
+    return load_batch_queries(str(path))
+
+
+def test_load_accepts_alternative_keys_and_numbers_lines(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    path.write_text('{"request_id": "r1", "input": "a"}\n\n{"question": "b"}\n')
+    assert load_batch_queries(str(path)) == [{"id": "r1", "query": "a"}, {"id": "3", "query": "b"}]
+
+    path.write_text('{"id": "x"}\n')
+    with pytest.raises(ValueError):
+        load_batch_queries(str(path))
+
+
+def test_batch_runs_concurrently_and_streams_results(tmp_path):
+    queries = write_queries(tmp_path / "queries.jsonl", 8)
+    agent = SlowAgent(fail={"query 3"})
+    output = tmp_path / "results.jsonl"
+    seen = []
+
+    summary = run_batch(queries, str(output), lambda llm_slots: agent, workers=4, on_result=seen.append)
+
+    assert agent.peak == 4
+    assert summary["completed"] == 7 and summary["failed"] == 1
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r["id"] for r in records] == [r["id"] for r in seen]
+    failed = next(r for r in records if r["id"] == "q3")
+    assert failed["error"] == "RuntimeError: model unavailable"
+    assert all(r["prompt_tokens"] == 30 for r in records if not r["error"])
+
+
+def test_resume_skips_finished_queries(tmp_path):
+    queries = write_queries(tmp_path / "queries.jsonl", 4)
+    output = tmp_path / "results.jsonl"
+    # An interrupted run: two answers, one failure and a half-written line
+    output.write_text(
+        json.dumps({"id": "q0", "error": None}) + "\n" + json.dumps({"id": "q1", "error": None}) + "\n"
+        + json.dumps({"id": "q2", "error": "timeout"}) + "\n" + '{"id": "q3", "out'
+    )
+    assert completed_query_ids(str(output)) == {"q0", "q1"}
+
+    agent = SlowAgent(delay=0)
+    summary = run_batch(queries, str(output), lambda llm_slots: agent)
+
+    assert sorted(agent.queries) == ["query 2", "query 3"]
+    assert summary["skipped"] == 2
+    assert completed_query_ids(str(output)) == {"q0", "q1", "q2", "q3"}
+
+
+def test_inflight_cap_limits_concurrent_llm_calls(tmp_path, monkeypatch):
+    pytest.importorskip("langchain_core")
+    import src.agent as agent_module
+    from src.agent import create_youtube_agent
+
+    class SlowLLM:
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def invoke(self, prompt, **kwargs):
+            with self.lock:
+                SlowLLM.active += 1
+                SlowLLM.peak = max(SlowLLM.peak, SlowLLM.active)
+            time.sleep(0.1)
+            with self.lock:
+                SlowLLM.active -= 1
+            return "Final Answer: done"
+
+    monkeypatch.setattr(agent_module, "get_llm", lambda *args, **kw: SlowLLM())
+    queries = write_queries(tmp_path / "queries.jsonl", 6)
+    factory = functools.partial(create_youtube_agent, tools=[], model_name="fake", verbose=False)
+
+    summary = run_batch(queries, str(tmp_path / "results.jsonl"), factory, workers=6, max_inflight_llm=2)
+
+    assert summary["completed"] == 6
+    assert SlowLLM.peak == 2
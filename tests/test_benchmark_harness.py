@@ -0,0 +1,25 @@
+# tests/test_benchmark_harness.py
+import pytest
+
+pytest.importorskip("langchain_ollama")
+
+from benchmarks.run_agent import run_benchmark
+
+
+@pytest.mark.parametrize("chat_mode,streaming", [(False, False), (True, True)])
+def test_agent_runs_end_to_end_against_fake_servers(chat_mode, streaming):
+    """One query goes search -> transcripts -> channel -> answer without leaving localhost"""
+    document = run_benchmark(
+        [{"id": "q1", "query": "ollama python library"}],
+        chat_mode=chat_mode, streaming=streaming,
+        youtube_latency=0.0, load_ms=0.0, prompt_ms_per_token=0.0, gen_ms_per_token=0.0,
+        track_memory=False
+    )
+
+    result = document["results"][0]
+    assert result["error"] is None
+    assert result["llm_calls"] == 4
+    assert result["tool_calls"] == 3
+    assert result["output_chars"] > 0
+    assert result["prompt_bytes"] > 0
+    assert document["summary"]["latency_ms"]["p50"] > 0
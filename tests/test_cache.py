@@ -0,0 +1,168 @@
+# tests/test_cache.py
+import os
+import time
+
+from src.cache import PersistentCache
+from src.tools import extract_video_id
+
+
+def make_cache(tmp_path, **kwargs):
+    return PersistentCache(os.path.join(str(tmp_path), "cache.sqlite3"), **kwargs)
+
+
+def test_hit_and_miss_counters(tmp_path):
+    """A stored value is returned and counted as a hit, unknown keys as misses"""
+    cache = make_cache(tmp_path)
+
+    assert cache.get("abc") is None
+    cache.set("abc", "transcript text")
+    assert cache.get("abc") == "transcript text"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_ttl_expiry(tmp_path):
+    """Entries older than the TTL are dropped on read"""
+    cache = make_cache(tmp_path, ttl=0.05)
+    cache.set("abc", "old")
+    time.sleep(0.1)
+
+    assert cache.get("abc") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_lru_eviction(tmp_path):
+    """The least recently read entry is evicted once the size cap is exceeded"""
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_persists_across_instances(tmp_path):
+    """A new cache on the same file sees earlier entries"""
+    make_cache(tmp_path).set("abc", "kept")
+    assert make_cache(tmp_path).get("abc") == "kept"
+
+
+def test_url_forms_share_video_id():
+    """watch?v= and youtu.be/ URLs normalize to the same cache key"""
+    forms = [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ&t=42",
+        "https://youtu.be/dQw4w9WgXcQ",
+        "https://youtu.be/dQw4w9WgXcQ?t=42",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+        "dQw4w9WgXcQ",
+    ]
+    assert {extract_video_id(url) for url in forms} == {"dQw4w9WgXcQ"}
+    assert extract_video_id("https://example.com/video") is None
+
+
+def test_single_flight_shares_one_fetch():
+    import threading
+
+    from src.cache import SingleFlight
+
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return ["result"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", fetch))) for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [["result"]] * 5
+    assert flight.shared == 4
+
+
+def test_result_cache_expires_and_skips_errors(monkeypatch):
+    from src.cache import ResultCache
+
+    monkeypatch.delenv("YT_AGENT_DISABLE_CACHE", raising=False)
+    cache = ResultCache(ttl=0.1)
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return [{"error": "No videos found"}] if len(fetches) == 1 else [{"title": "t"}]
+
+    def is_ok(value):
+        return "error" not in value[0]
+
+    assert cache.get_or_fetch("q", fetch, is_ok) == [{"error": "No videos found"}]
+    first = cache.get_or_fetch("q", fetch, is_ok)
+    first[0]["title"] = "changed by caller"
+    assert cache.get_or_fetch("q", fetch, is_ok) == [{"title": "t"}]
+    assert len(fetches) == 2
+
+    time.sleep(0.15)
+    cache.get_or_fetch("q", fetch, is_ok)
+    assert len(fetches) == 3
+
+
+def test_concurrent_lookups_share_scrapes_and_channel_ids_persist(tmp_path, monkeypatch):
+    import threading
+
+    import src.cache as cache_module
+    from benchmarks.fake_youtube import FakeYouTubeServer
+    from src.cache import ResultCache
+    from src.http_client import YouTubeHttpClient, set_http_client
+    from src.tools import analyze_channel_content, search_youtube_videos
+
+    monkeypatch.delenv("YT_AGENT_DISABLE_CACHE", raising=False)
+    monkeypatch.setattr(cache_module, "_result_cache", ResultCache())
+    monkeypatch.setattr(cache_module, "_channel_index", make_cache(tmp_path, table="channel_ids"))
+
+    with FakeYouTubeServer(latency=0.2) as youtube:
+        client = YouTubeHttpClient(base_url=youtube.url)
+        previous = set_http_client(client)
+        try:
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(search_youtube_videos("Python Asyncio")))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            search_youtube_videos("python   asyncio")
+            assert youtube.request_count == 1
+            assert all(r == results[0] for r in results)
+
+            first = analyze_channel_content("Tech Channel")
+            # A fresh process: the short-lived results are gone but the channel ID is remembered
+            monkeypatch.setattr(cache_module, "_result_cache", ResultCache())
+            youtube.request_paths.clear()
+            second = analyze_channel_content("tech channel")
+        finally:
+            set_http_client(previous)
+            client.close()
+
+    assert first == second
+    assert len(youtube.request_paths) == 1
+    assert youtube.request_paths[0].startswith("/channel/")
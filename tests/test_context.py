@@ -0,0 +1,58 @@
+# tests/test_context.py
+from src.context import ConversationContext, context_tokens_for_model, estimate_tokens
+
+
+def result(body):
+    return {"header": "\nTool: extract_video_transcript\nTool Input: url\nTool Result: ", "body": body}
+
+
+def test_fits_without_compaction_when_small():
+    context = ConversationContext("system", max_tokens=1000, reserve_tokens=0)
+    context.add_turn("call", [result("short")], "\nfooter")
+    assert context.render() == "system\ncall\nTool: extract_video_transcript\nTool Input: url\nTool Result: short\nfooter"
+    assert context.compacted_turns == 0
+
+
+def test_older_results_compacted_before_latest():
+    context = ConversationContext("S" * 400, max_tokens=1500, reserve_tokens=0)
+    context.add_turn("first", [result("a" * 3000)])
+    context.add_turn("second", [result("b" * 3000)])
+
+    prompt = context.render()
+
+    assert prompt.startswith("S" * 400)
+    assert "b" * 3000 in prompt
+    assert "a" * 3000 not in prompt
+    assert "omitted to fit the context window" in prompt
+    assert context.prompt_tokens <= 1500
+    assert context.compacted_turns == 1
+
+
+def test_prompt_size_stays_flat_over_many_turns():
+    context = ConversationContext("system prompt", max_tokens=4000, reserve_tokens=500)
+    sizes = []
+    for i in range(20):
+        context.add_turn(f"turn {i}", [result("x" * 20000)])
+        context.render()
+        sizes.append(context.prompt_tokens)
+
+    assert max(sizes) <= 3500
+    assert estimate_tokens("x" * 20000) > 3500
+
+
+def test_model_budgets():
+    assert context_tokens_for_model("llama3.3:70b-instruct-q2_K") == 16384
+    assert context_tokens_for_model("llama3-groq-tool-use:latest") == 8192
+    assert context_tokens_for_model("unknown-model") == 8192
+
+
+def test_short_older_results_survive_oversized_latest_turn():
+    """A huge latest result is trimmed before a short older one is wiped out"""
+    context = ConversationContext("system", max_tokens=2000, reserve_tokens=0)
+    context.add_turn("search", [result("video list " * 50)])
+    context.add_turn("transcript", [result("t" * 50000)])
+
+    prompt = context.render()
+
+    assert "video list " * 50 in prompt
+    assert context.prompt_tokens <= 2000
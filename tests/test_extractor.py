@@ -0,0 +1,102 @@
+# tests/test_extractor.py
+import json
+import os
+
+import pytest
+
+from src.extractor import InitialDataNotFound, iter_renderers
+
+
+def make_page(video_ids):
+    initial_data = {"contents": {"items": [
+        {"videoRenderer": {"videoId": vid, "title": {"runs": [{"text": f"Café {vid}"}]}}}
+        for vid in video_ids
+    ]}}
+    return (
+        "<html><script>var ytcfg = {\"videoRenderer\": {\"videoId\": \"decoy\"}};</script>"
+        "<script>var ytInitialData = " + json.dumps(initial_data, ensure_ascii=False) + ";</script>"
+        "<script>var after = {\"videoRenderer\": {\"videoId\": \"decoy\"}};</script></html>"
+    ).encode("utf-8")
+
+
+SEARCH_PAGE = os.path.join(os.path.dirname(__file__), "fixtures", "search-python-tutorial.html")
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 100000])
+def test_chunk_boundaries_do_not_matter(chunk_size):
+    """Renderers are found even when keys, objects and UTF-8 characters straddle chunks"""
+    page = make_page(["a", "b", "c"])
+    found = [r["videoId"] for _, r in iter_renderers(split(page, chunk_size), "videoRenderer")]
+    assert found == ["a", "b", "c"]
+
+
+def test_stops_reading_after_max_results():
+    """The stream is left partially unread once max_results renderers were yielded"""
+    chunks = split(make_page([str(i) for i in range(50)]), 32)
+    consumed = []
+
+    def tracked():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    found = [r["videoId"] for _, r in iter_renderers(tracked(), "videoRenderer", max_results=2)]
+    assert found == ["0", "1"]
+    assert len(consumed) < len(chunks) / 2
+
+
+def test_multiple_keys_report_which_matched():
+    page = b'var ytInitialData = {"a": {"gridVideoRenderer": {"x": 1}}, "b": {"videoRenderer": {"x": 2}}};</script>'
+    assert list(iter_renderers([page], ("gridVideoRenderer", "videoRenderer"))) == [
+        ("gridVideoRenderer", {"x": 1}),
+        ("videoRenderer", {"x": 2}),
+    ]
+
+
+def test_missing_initial_data_raises():
+    with pytest.raises(InitialDataNotFound):
+        list(iter_renderers([b"<html>no data here</html>"], "videoRenderer"))
+
+
+def primary_video_ids(page):
+    """What a full parse that walks only the primary results list finds"""
+    content = page.decode("utf-8")
+    start = content.index("var ytInitialData = ") + len("var ytInitialData = ")
+    initial_data = json.loads(content[start:content.index(";</script>", start)])
+    sections = initial_data["contents"]["twoColumnSearchResultsRenderer"]["primaryContents"]["sectionListRenderer"]["contents"]
+    return [item["videoRenderer"]["videoId"] for section in sections if "itemSectionRenderer" in section
+            for item in section["itemSectionRenderer"]["contents"] if "videoRenderer" in item]
+
+
+@pytest.mark.parametrize("chunk_size", [1000, 64 * 1024])
+def test_search_page_skips_videos_nested_in_shelves(chunk_size):
+    """On a search page, videos inside "People also watched" style shelves are not results"""
+    with open(SEARCH_PAGE, "rb") as f:
+        page = f.read()
+    expected = primary_video_ids(page)
+
+    found = [r["videoId"] for _, r in
+             iter_renderers(split(page, chunk_size), "videoRenderer", container_key="itemSectionRenderer")]
+    assert found == expected
+
+    anywhere = [r["videoId"] for _, r in iter_renderers(split(page, chunk_size), "videoRenderer")]
+    assert set(found) < set(anywhere)
+
+    first = [r["videoId"] for _, r in iter_renderers(
+        split(page, chunk_size), "videoRenderer", max_results=5, container_key="itemSectionRenderer"
+    )]
+    assert first == expected[:5]
+
+
+def test_container_items_split_across_chunks():
+    page = (b'var ytInitialData = {"itemSectionRenderer": {"contents": [{"videoRenderer": {"videoId": "a"}}, '
+            b'{"shelfRenderer": {"items": [{"videoRenderer": {"videoId": "nested"}}]}}, '
+            b'{"videoRenderer": {"videoId": "b"}}]}};</script>')
+    for size in (1, 5, 1000):
+        found = [r["videoId"] for _, r in iter_renderers(split(page, size), "videoRenderer",
+                                                         container_key="itemSectionRenderer")]
+        assert found == ["a", "b"]
@@ -0,0 +1,84 @@
+# tests/test_http_client.py
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from src.http_client import YouTubeHttpClient, get_http_client, set_http_client
+
+
+class FakeYouTubeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+
+    def do_GET(self):
+        FakeYouTubeHandler.requests_seen.append((self.path, self.client_address[1]))
+        body = b"<html>ok</html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    FakeYouTubeHandler.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeYouTubeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_one_connection(fake_server):
+    """Consecutive requests go over the same keep-alive connection"""
+    client = YouTubeHttpClient(base_url=fake_server)
+
+    client.get("/results", params={"search_query": "python programming"})
+    client.get("/channel/abc/videos")
+
+    paths = [path for path, _ in FakeYouTubeHandler.requests_seen]
+    ports = {port for _, port in FakeYouTubeHandler.requests_seen}
+    assert paths == ["/results?search_query=python+programming", "/channel/abc/videos"]
+    assert len(ports) == 1
+
+
+def test_shared_client_can_be_swapped(fake_server):
+    """Tools pick up a replacement client installed with set_http_client"""
+    client = YouTubeHttpClient(base_url=fake_server)
+    previous = set_http_client(client)
+    try:
+        assert get_http_client() is client
+        assert get_http_client().get("/").status_code == 200
+    finally:
+        set_http_client(previous)
+
+
+def test_streamed_searches_reuse_one_connection(monkeypatch):
+    """A search that stops reading after its first hits still hands the connection back to the pool"""
+    import src.cache as cache_module
+    from benchmarks.fake_youtube import FakeYouTubeServer
+    from src.cache import ResultCache
+    from src.tools import search_youtube_videos
+
+    monkeypatch.setattr(cache_module, "_result_cache", ResultCache())
+    with FakeYouTubeServer() as youtube:
+        client = YouTubeHttpClient(base_url=youtube.url)
+        previous = set_http_client(client)
+        try:
+            first = search_youtube_videos("python programming", max_results=2)
+            second = search_youtube_videos("rust programming", max_results=2)
+        finally:
+            set_http_client(previous)
+            client.close()
+
+    assert len(first) == len(second) == 2 and "error" not in first[0]
+    assert len(youtube.client_ports) == 2
+    assert len(set(youtube.client_ports)) == 1
@@ -0,0 +1,105 @@
+# tests/test_llm_cache.py
+import time
+
+from src.cache import PersistentCache
+from src.llm_cache import CachedLLM
+
+
+class CountingLLM:
+    """Minimal OllamaLLM/OllamaChatLLM stand-in that counts generations"""
+
+    def __init__(self):
+        self.calls = 0
+        self.closed = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        return f"reply to {prompt}"
+
+    def stream(self, prompt, **kwargs):
+        self.calls += 1
+        try:
+            for word in f"reply to {prompt} and then some chatter".split():
+                yield word + " "
+        finally:
+            self.closed += 1
+
+    def chat(self, messages):
+        self.calls += 1
+        return f"chat reply to {messages[-1]['content']}", {"eval_count": 5}
+
+
+def test_memory_tier_and_opt_out():
+    llm = CountingLLM()
+    cached = CachedLLM(llm, "model-a", options={"temperature": 0.1})
+
+    assert cached.invoke("hi") == cached.invoke("hi") == "reply to hi"
+    assert llm.calls == 1
+    cached.invoke("hi", cache=False)
+    assert llm.calls == 2
+
+    messages = [{"role": "user", "content": "hi"}]
+    assert cached.chat(messages)[1] == {"eval_count": 5}
+    assert cached.chat(messages) == ("chat reply to hi", {})
+    assert cached.stats()["hits"] == 2
+
+
+def test_key_covers_model_and_options():
+    a = CachedLLM(CountingLLM(), "model-a", options={"temperature": 0.1})
+    b = CachedLLM(CountingLLM(), "model-b", options={"temperature": 0.1})
+    c = CachedLLM(CountingLLM(), "model-a", options={"temperature": 0.7})
+    assert len({a.key("generate", "p"), b.key("generate", "p"), c.key("generate", "p"), a.key("chat", "p")}) == 4
+
+
+def test_persistent_tier_survives_new_wrapper_and_ttl(tmp_path):
+    store = PersistentCache(str(tmp_path / "llm.sqlite3"), table="llm_responses")
+    first = CountingLLM()
+    CachedLLM(first, "m", persistent=store).invoke("hello")
+
+    second = CountingLLM()
+    assert CachedLLM(second, "m", persistent=store).invoke("hello") == "reply to hello"
+    assert second.calls == 0
+
+    expiring = CachedLLM(CountingLLM(), "m", ttl=0.05)
+    expiring.invoke("x")
+    time.sleep(0.1)
+    expiring.invoke("x")
+    assert expiring.llm.calls == 2
+    store.close()
+
+
+def test_stream_closed_early_caches_the_prefix_only_when_kept():
+    llm = CountingLLM()
+    cached = CachedLLM(llm, "m")
+
+    stream = cached.stream("hi")
+    received = [next(stream), next(stream)]
+    stream.keep_partial()
+    stream.close()
+    assert llm.closed == 1
+
+    replay = cached.stream("hi")
+    assert list(replay) == ["".join(received)]
+    replay.close()
+    assert llm.calls == 1
+
+
+def test_stream_abandoned_by_a_failing_consumer_is_not_cached():
+    """A consumer that raises mid-stream must not leave a cut-off reply in the cache"""
+    llm = CountingLLM()
+    cached = CachedLLM(llm, "m")
+
+    stream = cached.stream("hi")
+    try:
+        for chunk in stream:
+            raise KeyboardInterrupt
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.close()
+    assert llm.closed == 1
+
+    assert "".join(cached.stream("hi")) == "reply to hi and then some chatter "
+    assert llm.calls == 2
+    assert "".join(cached.stream("hi")) == "reply to hi and then some chatter "
+    assert llm.calls == 2
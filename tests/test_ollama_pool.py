@@ -0,0 +1,133 @@
+# tests/test_ollama_pool.py
+import threading
+from collections import Counter
+
+import pytest
+
+from src.ollama_pool import OllamaEndpointPool, PooledLLM, pinned_run
+
+URLS = ["http://a:11434", "http://b:11434", "http://c:11434"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class EndpointLLM:
+    """Answers with its own URL, or raises while its endpoint is marked down"""
+
+    down = set()
+
+    def __init__(self, url):
+        self.url = url
+
+    def invoke(self, prompt, **kwargs):
+        if self.url in self.down:
+            raise ConnectionError(f"{self.url} refused the connection")
+        return self.url
+
+    def stream(self, prompt, **kwargs):
+        if self.url in self.down:
+            raise ConnectionError(f"{self.url} refused the connection")
+        yield self.url
+
+
+def test_choose_prefers_least_loaded_then_pinned_endpoint():
+    pool = OllamaEndpointPool(URLS)
+    first, second = pool.choose(), pool.choose()
+    assert {first.url, second.url} == {"http://a:11434", "http://b:11434"}
+    assert pool.choose().url == "http://c:11434"
+
+    # A pinned run stays put even though its endpoint is now the busiest
+    assert pool.choose(preferred="http://a:11434").url == "http://a:11434"
+
+
+def test_failed_endpoint_cools_down_then_comes_back():
+    clock = FakeClock()
+    pool = OllamaEndpointPool(URLS[:2], failure_cooldown=30, clock=clock)
+    endpoint = pool.choose(preferred="http://a:11434")
+    pool.release(endpoint, failed=True)
+
+    assert {pool.choose().url for _ in range(3)} == {"http://b:11434"}
+    assert [e["healthy"] for e in pool.stats()] == [False, True]
+
+    clock.now = 31
+    assert pool.choose(preferred="http://a:11434").url == "http://a:11434"
+
+
+def test_runs_stick_to_one_endpoint_and_fail_over_together():
+    EndpointLLM.down = set()
+    llm = PooledLLM(OllamaEndpointPool(URLS), EndpointLLM)
+
+    with pinned_run() as pins:
+        answers = [llm.invoke("q") for _ in range(3)]
+        assert len(set(answers)) == 1 and pins
+
+        EndpointLLM.down = {answers[0]}
+        moved = llm.invoke("q")
+        assert moved != answers[0]
+        # The rest of the run follows it to the new endpoint, streams included
+        assert list(llm.stream("q")) == [moved]
+        assert llm.invoke("q") == moved
+
+    EndpointLLM.down = set(URLS)
+    with pytest.raises(ConnectionError):
+        llm.invoke("q")
+    EndpointLLM.down = set()
+
+
+def test_agent_runs_spread_over_fake_ollama_servers_and_survive_a_failure():
+    """Concurrent runs balance across healthy servers, each run stays on one, and a failing node is skipped"""
+    pytest.importorskip("langchain_ollama")
+    from langchain_core.tools import Tool
+
+    from benchmarks.fake_ollama import FakeOllamaServer
+    from src.agent import create_youtube_agent
+
+    hits = "[{'title': 'T', 'url': 'https://www.youtube.com/watch?v=aaaaaaaaaaa', 'channel': 'Alpha'}]"
+    tools = [
+        Tool(name="search_youtube_videos", func=lambda q: hits, description="search"),
+        Tool(name="extract_video_transcript", func=lambda url: "transcript text", description="transcript"),
+        Tool(name="analyze_channel_content", func=lambda name: "channel summary", description="channel"),
+    ]
+
+    servers = [FakeOllamaServer().start() for _ in range(3)]
+    try:
+        servers[0].fail = True
+        agent = create_youtube_agent(tools=tools, model_name="fake-model:latest", verbose=False,
+                                     base_urls=[server.url for server in servers])
+        results = []
+        lock = threading.Lock()
+
+        def run(i):
+            response = agent.invoke({"input": f"query {i}"})
+            with lock:
+                results.append(response)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+
+        assert len(results) == 6
+        assert all(r["output"].startswith("The videos explain") for r in results)
+
+        # Each run's calls all landed on the endpoint it reports
+        calls_by_endpoint = Counter()
+        for r in results:
+            calls_by_endpoint[r["stats"]["ollama_endpoint"]] += r["stats"]["llm_calls"]
+        for server in servers[1:]:
+            assert len(server.records) == calls_by_endpoint[server.url] > 0
+
+        # Only the runs that picked the failing node before its first failure tried it
+        assert 0 < servers[0].failed_requests <= 2
+        assert agent.endpoint_pool.stats()[0]["failures"] == servers[0].failed_requests
+        assert [e["healthy"] for e in agent.endpoint_pool.stats()] == [False, True, True]
+    finally:
+        for server in servers:
+            server.stop()
@@ -0,0 +1,38 @@
+# tests/test_pipeline.py
+import json
+import re
+
+from src.pipeline import fits_fixed_plan, follow_up_calls, render_calls
+
+
+def test_topic_questions_fit_the_plan():
+    assert fits_fixed_plan("polyester body filler")
+    assert fits_fixed_plan("How do I use the ollama python library?")
+
+
+def test_specific_videos_channels_and_ranges_do_not():
+    assert not fits_fixed_plan("Summarize https://www.youtube.com/watch?v=abcdefghijk")
+    assert not fits_fixed_plan("What does @mkbhd usually review?")
+    assert not fits_fixed_plan("Is the Fireship channel any good?")
+    assert not fits_fixed_plan("What happens at 12:30 in the langchain tutorial?")
+    assert not fits_fixed_plan("compare pytest vs unittest")
+    assert not fits_fixed_plan("???")
+
+
+def test_follow_up_calls_cover_top_videos_and_first_channel():
+    videos = [
+        {"title": "A", "url": "https://www.youtube.com/watch?v=aaaaaaaaaaa", "channel": "Alpha"},
+        {"title": "B", "url": "https://www.youtube.com/watch?v=bbbbbbbbbbb", "channel": "Beta"},
+        {"title": "C", "url": "https://www.youtube.com/watch?v=ccccccccccc", "channel": "Gamma"},
+    ]
+    assert follow_up_calls(videos, max_videos=2) == [
+        {"tool": "extract_video_transcript", "input": "https://www.youtube.com/watch?v=aaaaaaaaaaa"},
+        {"tool": "extract_video_transcript", "input": "https://www.youtube.com/watch?v=bbbbbbbbbbb"},
+        {"tool": "analyze_channel_content", "input": "Alpha"},
+    ]
+
+
+def test_rendered_calls_parse_back():
+    calls = [{"tool": "search_youtube_videos", "input": 'say "hi"'}]
+    blocks = re.findall(r"<json>\s*({.*?})\s*</json>", render_calls(calls), re.DOTALL)
+    assert [json.loads(block) for block in blocks] == [{"action": "search_youtube_videos", "action_input": 'say "hi"'}]
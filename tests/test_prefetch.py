@@ -0,0 +1,82 @@
+# tests/test_prefetch.py
+import threading
+import time
+
+from src.prefetch import TranscriptPrefetcher, set_prefetcher
+
+
+def make_fetch(delay=0.0, fail=()):
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(video_id):
+        with lock:
+            calls.append(video_id)
+        time.sleep(delay)
+        if video_id in fail:
+            raise RuntimeError("Subtitles are disabled")
+        return [{"text": f"words of {video_id}", "start": 0.0, "duration": 1.0}]
+
+    return fetch, calls
+
+
+def test_take_returns_prefetched_segments_once():
+    fetch, calls = make_fetch(delay=0.05, fail={"bad"})
+    prefetcher = TranscriptPrefetcher(fetch, top_n=2)
+
+    assert prefetcher.prefetch(["a", "b", "c"]) == ["a", "b"]
+    assert prefetcher.prefetch(["a"]) == []
+    assert prefetcher.take("a") == [{"text": "words of a", "start": 0.0, "duration": 1.0}]
+    assert prefetcher.take("a") is None
+    assert prefetcher.take("c") is None
+
+    prefetcher.prefetch(["bad"])
+    assert prefetcher.take("bad") is None
+    assert sorted(calls) == ["a", "b", "bad"]
+    assert prefetcher.stats()["used"] == 1
+    prefetcher.close()
+
+
+def test_budget_drops_oldest_unclaimed_prefetch():
+    fetch, calls = make_fetch(delay=0.2)
+    prefetcher = TranscriptPrefetcher(fetch, top_n=3, max_workers=1, budget=1)
+
+    prefetcher.prefetch(["a", "b", "c"])
+
+    # "a" was already running when "b" replaced it; "b" was still queued when "c" did, so it never runs
+    assert prefetcher.stats() == {"started": 3, "used": 0, "wasted": 2, "pending": 1}
+    assert prefetcher.take("a") is None
+    assert prefetcher.take("c") is not None
+    assert calls == ["a", "c"]
+    prefetcher.close()
+
+
+def test_transcript_tool_uses_prefetch_started_by_search(monkeypatch):
+    from benchmarks.fake_youtube import FakeYouTubeServer
+    from src.http_client import YouTubeHttpClient, set_http_client
+    from src.tools import extract_video_transcript, search_youtube_videos, set_transcript_source
+
+    monkeypatch.setenv("YT_AGENT_DISABLE_CACHE", "1")
+    with FakeYouTubeServer(latency=0.2) as youtube:
+        client = YouTubeHttpClient(base_url=youtube.url)
+        previous_client = set_http_client(client)
+        previous_source = set_transcript_source(youtube.transcript_source)
+        prefetcher = TranscriptPrefetcher(lambda video_id: youtube.transcript_source(video_id), top_n=2)
+        previous_prefetcher = set_prefetcher(prefetcher)
+        try:
+            videos = search_youtube_videos("prefetch test")
+            # Stands in for the LLM deciding what to do next
+            time.sleep(0.3)
+            start = time.perf_counter()
+            transcript = extract_video_transcript(videos[0]["url"])
+            elapsed = time.perf_counter() - start
+        finally:
+            set_prefetcher(previous_prefetcher)
+            set_transcript_source(previous_source)
+            set_http_client(previous_client)
+            client.close()
+            prefetcher.close()
+
+    assert transcript.startswith("in part 0 of")
+    assert elapsed < 0.15
+    assert sum(path.startswith("/transcript/") for path in youtube.request_paths) == 2
@@ -0,0 +1,149 @@
+# tests/test_rate_limit.py
+import threading
+import time
+
+import pytest
+
+from src.rate_limit import BATCH, INTERACTIVE, OutboundScheduler, parse_retry_after
+
+
+class FakeResponse:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+
+    def close(self):
+        pass
+
+
+def test_parse_retry_after_accepts_seconds_and_http_dates():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:10 GMT", now=1445412480.0) == 10.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_token_bucket_caps_request_rate():
+    """Past the burst, requests are spaced out at `rate` per second"""
+    scheduler = OutboundScheduler(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(6):
+        scheduler.release(scheduler.acquire(), 200)
+    # Two go out of the bucket straight away, the other four wait 1/20 s each
+    assert time.monotonic() - start >= 0.18
+
+
+def test_concurrency_limit_halves_once_per_congestion_event_and_recovers():
+    scheduler = OutboundScheduler(rate=0, max_concurrency=8)
+    admitted = [scheduler.acquire() for _ in range(4)]
+    for admitted_at in admitted:
+        scheduler.release(admitted_at, 429)
+    assert scheduler.limit == 4
+
+    # A request sent after the decrease is new evidence
+    scheduler.release(scheduler.acquire(), 503)
+    assert scheduler.limit == 2
+
+    for _ in range(20):
+        scheduler.release(scheduler.acquire(), 200)
+    assert 2 < scheduler.limit <= 8
+
+
+def test_interactive_requests_jump_ahead_of_batch():
+    scheduler = OutboundScheduler(rate=0, max_concurrency=1)
+    order = []
+    held = scheduler.acquire()
+
+    def worker(name, priority):
+        admitted_at = scheduler.acquire(priority)
+        order.append(name)
+        scheduler.release(admitted_at, 200)
+
+    threads = []
+    for name, priority in [("batch-1", BATCH), ("batch-2", BATCH), ("interactive", INTERACTIVE)]:
+        thread = threading.Thread(target=worker, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+
+    assert scheduler.stats()["queued"] == 3
+    scheduler.release(held, 200)
+    for thread in threads:
+        thread.join(5)
+    assert order == ["interactive", "batch-1", "batch-2"]
+
+
+def test_submit_retries_throttled_requests_with_backoff():
+    responses = [FakeResponse(503), FakeResponse(429), FakeResponse(200)]
+    sleeps = []
+    scheduler = OutboundScheduler(rate=0, retries=3, sleep=sleeps.append)
+
+    assert scheduler.submit(lambda: responses.pop(0)).status_code == 200
+    assert len(sleeps) == 2
+    assert scheduler.counters["retried"] == 2 and scheduler.counters["throttled"] == 2
+
+
+def test_submit_gives_up_after_retries_or_long_retry_after():
+    scheduler = OutboundScheduler(rate=0, retries=2, sleep=lambda s: None)
+    assert scheduler.submit(lambda: FakeResponse(429)).status_code == 429
+    assert scheduler.counters["sent"] == 3 and scheduler.counters["gave_up"] == 1
+
+    # Asked to wait longer than max_backoff: hand the error back rather than stall the agent
+    patient = OutboundScheduler(rate=0, max_backoff=5)
+    assert patient.submit(lambda: FakeResponse(429, "3600")).status_code == 429
+    assert patient.counters["sent"] == 1
+
+
+def test_long_retry_after_pauses_other_requests_for_at_most_max_backoff():
+    """A request that gave up on a long Retry-After doesn't leave the pause in place for everyone else"""
+    scheduler = OutboundScheduler(rate=0, max_backoff=0.2)
+    assert scheduler.submit(lambda: FakeResponse(429, "600")).status_code == 429
+    assert scheduler.stats()["paused_for"] <= 0.2
+
+    start = time.monotonic()
+    assert scheduler.submit(lambda: FakeResponse(200)).status_code == 200
+    assert time.monotonic() - start < 1
+
+
+def test_client_honours_retry_after_from_a_throttling_server():
+    """Against the fake YouTube, injected 429s are retried after Retry-After instead of surfacing"""
+    pytest.importorskip("requests")
+    from benchmarks.fake_youtube import FakeYouTubeServer
+    from src.http_client import YouTubeHttpClient
+
+    with FakeYouTubeServer() as youtube:
+        client = YouTubeHttpClient(base_url=youtube.url, scheduler=OutboundScheduler())
+        youtube.inject_errors(2, status=429, retry_after=0.2)
+
+        start = time.monotonic()
+        response = client.get("/results", params={"search_query": "python programming"})
+        assert response.status_code == 200
+        assert time.monotonic() - start >= 0.4
+        assert youtube.throttled_count == 2 and youtube.request_count == 3
+        client.close()
+
+
+def test_rate_limited_server_serves_every_concurrent_request():
+    """A burst well past the server's limit ends with every request answered"""
+    pytest.importorskip("requests")
+    from benchmarks.fake_youtube import FakeYouTubeServer
+    from src.http_client import YouTubeHttpClient
+
+    with FakeYouTubeServer(max_rps=10, retry_after=0.2) as youtube:
+        scheduler = OutboundScheduler(rate=50, burst=20, retries=10)
+        client = YouTubeHttpClient(base_url=youtube.url, scheduler=scheduler)
+        statuses = []
+
+        def fetch(i):
+            statuses.append(client.get("/results", params={"search_query": f"query {i}"}).status_code)
+
+        threads = [threading.Thread(target=fetch, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+
+        assert statuses == [200] * 20
+        assert youtube.throttled_count > 0
+        assert scheduler.limit < scheduler.max_concurrency
+        client.close()
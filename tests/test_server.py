@@ -0,0 +1,95 @@
+# tests/test_server.py
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.server import AgentService, create_app
+
+
+class EchoAgent:
+    """Streams the query back word by word after a delay"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.release = threading.Event()
+        self.release.set()
+
+    def invoke(self, inputs, on_token=None):
+        self.release.wait(5)
+        time.sleep(self.delay)
+        words = inputs["input"].split()
+        for word in words:
+            if on_token:
+                on_token(word + " ")
+        if inputs["input"] == "explode":
+            raise RuntimeError("model crashed")
+        return {"output": " ".join(words), "stats": {"llm_calls": 1}}
+
+
+def run_with_client(service, scenario):
+    async def main():
+        async with TestClient(TestServer(create_app(service))) as client:
+            return await scenario(client)
+    return asyncio.run(main())
+
+
+def test_query_health_and_warm_up():
+    warmed = []
+    service = AgentService(EchoAgent(), warm=lambda: warmed.append(True), model_name="fake")
+
+    async def scenario(client):
+        response = await client.post("/query", json={"query": "hello world"})
+        body = await response.json()
+        bad = await client.post("/query", json={"nope": 1})
+        failed = await client.post("/query", json={"query": "explode"})
+        health = await (await client.get("/health")).json()
+        return response.status, body, bad.status, failed.status, health
+
+    status, body, bad_status, failed_status, health = run_with_client(service, scenario)
+
+    assert status == 200 and body["output"] == "hello world"
+    assert bad_status == 400 and failed_status == 500
+    assert warmed == [True]
+    assert health["model_warm"] and health["status"] == "ok"
+    assert health["completed"] == 1 and health["failed"] == 1
+    assert health["queue_depth"] == 0 and health["latency_ms"]["p50"] >= 0
+
+
+def test_streaming_sends_tokens_then_final_record():
+    service = AgentService(EchoAgent())
+
+    async def scenario(client):
+        response = await client.post("/query", json={"query": "one two three", "stream": True})
+        return [json.loads(line) for line in (await response.text()).splitlines()]
+
+    lines = run_with_client(service, scenario)
+    assert [line["token"] for line in lines[:-1]] == ["one ", "two ", "three "]
+    assert lines[-1]["done"] and lines[-1]["output"] == "one two three"
+
+
+def test_bursts_beyond_the_queue_are_rejected():
+    agent = EchoAgent()
+    agent.release.clear()
+    service = AgentService(agent, max_concurrent=1, max_queue=2)
+
+    async def scenario(client):
+        requests = [asyncio.create_task(client.post("/query", json={"query": f"q{i}"})) for i in range(5)]
+        # One running and two queued; the other two are turned away straight away
+        while service.counters["rejected"] < 2:
+            await asyncio.sleep(0.01)
+        health = await (await client.get("/health")).json()
+        agent.release.set()
+        responses = await asyncio.gather(*requests)
+        return health, sorted(r.status for r in responses), responses
+
+    health, statuses, responses = run_with_client(service, scenario)
+    assert health["queue_depth"] == 2 and health["running"] == 1
+    assert statuses == [200, 200, 200, 503, 503]
+    assert all(r.headers.get("Retry-After") for r in responses if r.status == 503)
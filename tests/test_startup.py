@@ -0,0 +1,42 @@
+# tests/test_startup.py
+import os
+import subprocess
+import sys
+import time
+
+from src.startup import BackgroundTask, preload_modules
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_agent_and_tools_import_without_langchain():
+    """Importing the agent and tools must not pull in langchain; that cost is paid in the background"""
+    code = (
+        "import sys, src.agent, src.tools\n"
+        "heavy = [m for m in ('langchain_core', 'langchain_ollama', 'requests', 'numpy') if m in sys.modules]\n"
+        "print(','.join(heavy))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_background_task_records_result_error_and_duration():
+    def slow(value):
+        time.sleep(0.05)
+        return value
+
+    def broken():
+        raise RuntimeError("ollama is not running")
+
+    ok = BackgroundTask("ok", slow, 42)
+    failed = BackgroundTask("failed", broken)
+    assert not ok.done()
+
+    assert ok.wait(5) and failed.wait(5)
+    assert ok.result == 42 and ok.error is None and ok.duration >= 0.05
+    assert isinstance(failed.error, RuntimeError) and failed.result is None
+
+
+def test_preload_skips_missing_modules():
+    timings = preload_modules(("json", "a_module_that_does_not_exist"))
+    assert list(timings) == ["json"]
@@ -0,0 +1,80 @@
+# tests/test_tools.py
+import time
+
+import pytest
+
+from src.tools import extract_video_transcripts, iter_video_transcripts, set_transcript_source
+from src.transcript_index import TranscriptIndex, set_transcript_index
+
+DELAYS = {"aaaaaaaaaaa": 0.3, "bbbbbbbbbbb": 0.0, "ccccccccccc": 5.0}
+
+
+@pytest.fixture
+def stub_source(monkeypatch, tmp_path):
+    monkeypatch.setenv("YT_AGENT_DISABLE_CACHE", "1")
+    previous_index = set_transcript_index(TranscriptIndex(str(tmp_path / "index")))
+
+    def source(video_id):
+        time.sleep(DELAYS[video_id])
+        return [{"text": f"hello from {video_id}", "start": 0.0, "duration": 1.0}]
+
+    previous = set_transcript_source(source)
+    yield
+    set_transcript_source(previous)
+    set_transcript_index(previous_index).close()
+
+
+def test_results_stream_in_completion_order(stub_source):
+    urls = ["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"]
+    order = [url for url, _ in iter_video_transcripts(urls, concurrency=2)]
+    assert order == ["https://youtu.be/bbbbbbbbbbb", "https://youtu.be/aaaaaaaaaaa"]
+
+
+def test_slow_video_times_out_without_blocking_others(stub_source):
+    urls = ["https://youtu.be/ccccccccccc", "https://youtu.be/bbbbbbbbbbb"]
+
+    start = time.perf_counter()
+    results = dict(iter_video_transcripts(urls, concurrency=2, timeout=0.5))
+    elapsed = time.perf_counter() - start
+
+    assert results["https://youtu.be/bbbbbbbbbbb"] == "hello from bbbbbbbbbbb"
+    assert "timed out" in results["https://youtu.be/ccccccccccc"]
+    assert elapsed < 2
+
+
+def test_batch_tool_accepts_search_results(stub_source):
+    search_results = str([
+        {"title": "A", "url": "https://www.youtube.com/watch?v=aaaaaaaaaaa", "channel": "x"},
+        {"title": "B", "url": "https://www.youtube.com/watch?v=bbbbbbbbbbb", "channel": "y"},
+    ])
+    output = extract_video_transcripts(search_results)
+    assert output.index("hello from aaaaaaaaaaa") < output.index("hello from bbbbbbbbbbb")
+
+
+def test_search_returns_only_the_results_list(monkeypatch):
+    """Against a saved search page, shelf videos ("People also watched") are not reported as hits"""
+    pytest.importorskip("requests")
+    import os
+
+    import src.cache as cache_module
+    from benchmarks.fake_youtube import FakeYouTubeServer
+    from src.cache import ResultCache
+    from src.http_client import YouTubeHttpClient, set_http_client
+    from src.tools import search_youtube_videos
+    from tests.test_extractor import SEARCH_PAGE, primary_video_ids
+
+    monkeypatch.setattr(cache_module, "_result_cache", ResultCache())
+    with open(SEARCH_PAGE, "rb") as f:
+        expected = primary_video_ids(f.read())[:5]
+
+    with FakeYouTubeServer(pages_dir=os.path.dirname(SEARCH_PAGE)) as youtube:
+        client = YouTubeHttpClient(base_url=youtube.url)
+        previous = set_http_client(client)
+        try:
+            videos = search_youtube_videos("python tutorial")
+        finally:
+            set_http_client(previous)
+            client.close()
+
+    assert [v["url"].rsplit("=", 1)[1] for v in videos] == expected
+    assert all(v["title"] and v["channel"] for v in videos)
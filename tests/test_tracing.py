@@ -0,0 +1,86 @@
+# tests/test_tracing.py
+import json
+
+import pytest
+
+import src.tracing as tracing_module
+from src.tracing import NoopSpan, Tracer
+
+
+def read_spans(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_disabled_tracer_hands_out_noop_spans(tmp_path):
+    tracer = Tracer()
+    with tracer.span("agent.run", query_chars=3) as span:
+        span.set(llm_calls=1)
+        tracer.incr("llm_calls")
+    assert isinstance(span, NoopSpan)
+    assert tracer.current_span() is None
+
+
+def test_spans_are_written_with_parent_links(tmp_path):
+    trace_file = tmp_path / "trace.jsonl"
+    tracer = Tracer(trace_file=str(trace_file))
+
+    with tracer.span("agent.run") as run:
+        with tracer.span("llm.call", prompt_chars=10):
+            pass
+        # Worker threads don't share the context, so the parent is passed explicitly
+        with tracer.span("tool.call", parent=run) as tool:
+            tool.record_error("Failed to fetch")
+    tracer.close()
+
+    spans = {s["name"]: s for s in read_spans(trace_file)}
+    assert spans["agent.run"]["parent_id"] is None
+    assert spans["llm.call"]["parent_id"] == spans["agent.run"]["span_id"]
+    assert spans["tool.call"]["trace_id"] == spans["agent.run"]["trace_id"]
+    assert spans["llm.call"]["attrs"] == {"prompt_chars": 10}
+    assert spans["tool.call"]["error"] == "Failed to fetch"
+
+
+def test_metrics_file_uses_prometheus_text_format(tmp_path):
+    metrics_file = tmp_path / "metrics.prom"
+    tracer = Tracer(metrics_file=str(metrics_file))
+
+    with pytest.raises(RuntimeError):
+        with tracer.span("agent.run"):
+            tracer.incr("transcript_cache_requests", result="hit")
+            tracer.incr("transcript_cache_requests", result="hit")
+            raise RuntimeError("boom")
+
+    text = metrics_file.read_text()
+    assert 'yt_agent_span_duration_seconds_count{span="agent.run"} 1' in text
+    assert 'yt_agent_span_errors_total{span="agent.run"} 1' in text
+    assert 'yt_agent_transcript_cache_requests_total{result="hit"} 2' in text
+    tracer.close()
+
+
+def test_agent_run_emits_iteration_llm_and_tool_spans(tmp_path, monkeypatch):
+    pytest.importorskip("langchain_core")
+    from langchain_core.tools import Tool
+
+    from tests.test_agent import make_agent, tool_call
+
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(tracing_module, "_tracer", Tracer(trace_file=str(trace_file)))
+
+    tools = [Tool(name="search_youtube_videos", func=lambda q: "Error searching YouTube: down",
+                  description="search")]
+    agent, _ = make_agent(monkeypatch, [tool_call("search_youtube_videos", "x"), "Final Answer: done"], tools)
+    agent.invoke({"input": "x"})
+    tracing_module.get_tracer().close()
+
+    spans = read_spans(trace_file)
+    names = [s["name"] for s in spans]
+    assert names.count("llm.call") == 2
+    assert names.count("agent.iteration") == 2
+    assert names[-1] == "agent.run"
+
+    by_id = {s["span_id"]: s for s in spans}
+    tool = next(s for s in spans if s["name"] == "tool.call")
+    assert by_id[tool["parent_id"]]["name"] == "agent.iteration"
+    assert tool["error"].startswith("Error searching")
+    assert all(s["trace_id"] == spans[-1]["trace_id"] for s in spans)
@@ -0,0 +1,143 @@
+# tests/test_transcript_index.py
+import pytest
+
+from src.tools import extract_video_transcript, search_video_transcripts, set_transcript_source
+from src.transcript_index import TranscriptIndex, chunk_segments, set_transcript_index
+
+TOPICS = {
+    "aaaaaaaaaaa": ["install the python interpreter", "configure a virtual environment",
+                    "write unit tests with pytest", "deploy the docker container"],
+    "bbbbbbbbbbb": ["bake sourdough bread", "feed the starter every day",
+                    "shape the loaf gently", "bake at high temperature"],
+}
+
+
+def segments_for(video_id, repeat=30):
+    """Four topics per video, each spoken for `repeat` ten-second segments"""
+    segments = []
+    for topic in TOPICS[video_id]:
+        for _ in range(repeat):
+            segments.append({"text": f"now we {topic}", "start": len(segments) * 10.0, "duration": 10.0})
+    return segments
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = TranscriptIndex(str(tmp_path / "index"), chunk_words=40)
+    yield index
+    index.close()
+
+
+def test_chunks_keep_timestamps():
+    chunks = chunk_segments(segments_for("aaaaaaaaaaa", repeat=2), chunk_words=8)
+    assert [(c["start"], c["end"]) for c in chunks] == [(0.0, 20.0), (20.0, 40.0), (40.0, 60.0), (60.0, 80.0)]
+    assert chunks[1]["text"] == "now we configure a virtual environment now we configure a virtual environment"
+
+
+def test_bm25_ranks_matching_chunks_first(index):
+    index.add_video("aaaaaaaaaaa", segments_for("aaaaaaaaaaa"))
+    index.add_video("bbbbbbbbbbb", segments_for("bbbbbbbbbbb"))
+
+    results = index.search("how do I feed a sourdough starter", top_k=3)
+    assert len(results) == 3
+    assert all(r["video_id"] == "bbbbbbbbbbb" for r in results)
+    assert all("starter" in r["text"] or "sourdough" in r["text"] for r in results)
+
+    only_a = index.search("bake", video_ids=["aaaaaaaaaaa"])
+    assert only_a == []
+
+
+def test_index_persists_and_ignores_repeat_adds(tmp_path):
+    directory = str(tmp_path / "index")
+    first = TranscriptIndex(directory, chunk_words=40)
+    added = first.add_video("aaaaaaaaaaa", segments_for("aaaaaaaaaaa"))
+    assert first.add_video("aaaaaaaaaaa", segments_for("aaaaaaaaaaa")) == 0
+    first.close()
+
+    reopened = TranscriptIndex(directory, chunk_words=40)
+    assert len(reopened) == added
+    assert "aaaaaaaaaaa" in reopened
+    assert reopened.search("docker")[0]["start"] >= 900
+    reopened.close()
+
+
+def test_two_indexes_can_share_a_directory(tmp_path):
+    """Separate processes (here, separate instances) appending to one index don't clash"""
+    directory = str(tmp_path / "index")
+    first = TranscriptIndex(directory, chunk_words=40)
+    second = TranscriptIndex(directory, chunk_words=40)
+
+    added = first.add_video("aaaaaaaaaaa", segments_for("aaaaaaaaaaa"))
+    added += second.add_video("bbbbbbbbbbb", segments_for("bbbbbbbbbbb"))
+    assert second.add_video("aaaaaaaaaaa", segments_for("aaaaaaaaaaa")) == 0
+
+    for index in (first, second):
+        assert len(index) == added
+        assert index.search("docker")[0]["video_id"] == "aaaaaaaaaaa"
+        assert index.search("docker")[0]["start"] >= 900
+        assert index.search("sourdough starter")[0]["video_id"] == "bbbbbbbbbbb"
+        index.close()
+
+
+def test_embeddings_are_used_when_configured(tmp_path):
+    def embed(texts):
+        # Two-dimensional "embedding": does the text talk about bread or code?
+        return [[float("bread" in t or "loaf" in t), float("python" in t or "pytest" in t)] for t in texts]
+
+    index = TranscriptIndex(str(tmp_path / "index"), embedder=embed, chunk_words=40)
+    index.add_video("aaaaaaaaaaa", segments_for("aaaaaaaaaaa"))
+    index.add_video("bbbbbbbbbbb", segments_for("bbbbbbbbbbb"))
+
+    # No query word appears in the transcripts, so only the dense scores can match
+    results = index.search("loaf", top_k=2)
+    assert [r["video_id"] for r in results] == ["bbbbbbbbbbb", "bbbbbbbbbbb"]
+    index.close()
+
+
+def test_retrieval_tool_fetches_then_answers_follow_ups(monkeypatch, tmp_path):
+    monkeypatch.setenv("YT_AGENT_DISABLE_CACHE", "1")
+    fetched = []
+
+    def source(video_id):
+        fetched.append(video_id)
+        return segments_for(video_id)
+
+    previous_source = set_transcript_source(source)
+    previous_index = set_transcript_index(TranscriptIndex(str(tmp_path / "index"), chunk_words=40))
+    try:
+        full = extract_video_transcript("https://youtu.be/aaaaaaaaaaa")
+        answer = search_video_transcripts("virtual environment setup https://youtu.be/bbbbbbbbbbb "
+                                          "https://www.youtube.com/watch?v=aaaaaaaaaaa")
+        follow_up = search_video_transcripts("what about pytest?")
+    finally:
+        set_transcript_source(previous_source)
+        set_transcript_index(previous_index).close()
+
+    # Each transcript is fetched once; the follow-up is served from the index
+    assert fetched == ["aaaaaaaaaaa", "bbbbbbbbbbb"]
+    assert answer.startswith("[https://www.youtube.com/watch?v=aaaaaaaaaaa&t=")
+    assert "virtual environment" in answer.split("\n\n")[0]
+    assert "pytest" in follow_up.split("\n\n")[0]
+    assert len(answer) < len(full) / 2
+
+
+def test_index_failures_are_traced_not_printed(monkeypatch, tmp_path, capsys):
+    import src.tracing as tracing_module
+    from src.tools import _index_transcript
+    from src.tracing import Tracer
+
+    class BrokenIndex:
+        def __contains__(self, video_id):
+            raise OSError("disk full")
+
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(tracing_module, "_tracer", Tracer(trace_file=str(trace_file)))
+    previous_index = set_transcript_index(BrokenIndex())
+    try:
+        _index_transcript("aaaaaaaaaaa", segments_for("aaaaaaaaaaa"))
+    finally:
+        set_transcript_index(previous_index)
+        tracing_module.get_tracer().close()
+
+    assert capsys.readouterr().out == ""
+    assert "disk full" in trace_file.read_text()
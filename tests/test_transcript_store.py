@@ -0,0 +1,81 @@
+# tests/test_transcript_store.py
+import json
+
+import pytest
+
+from src.tools import extract_video_transcript, parse_transcript_request, set_transcript_source
+from src.transcript_store import CompactTranscript, parse_timestamp
+
+
+def make_segments(count=900, step=4.0):
+    return [{"text": f"line {i} says\nsomething", "start": i * step, "duration": step} for i in range(count)]
+
+
+def test_round_trip_is_smaller_than_json():
+    segments = make_segments()
+    transcript = CompactTranscript.from_segments(segments)
+    restored = CompactTranscript.from_bytes(transcript.to_bytes())
+
+    assert len(restored) == 900
+    assert restored.duration == 3600.0
+    assert list(restored.segments(5, 6)) == [{"text": "line 5 says something", "start": 20.0, "duration": 4.0}]
+    assert restored.text() == " ".join(f"line {i} says something" for i in range(900))
+    assert len(transcript.to_bytes()) < len(json.dumps(segments)) / 3
+
+
+def test_time_window_covers_overlapping_segments():
+    transcript = CompactTranscript.from_segments(make_segments(count=10, step=10.0))
+    assert transcript.window(25, 45) == (2, 5)
+    assert transcript.window(None, 10) == (0, 1)
+    assert transcript.window(95) == (9, 10)
+    assert transcript.window(500) == (10, 10)
+
+
+def test_parse_timestamps_and_requests():
+    assert parse_timestamp("1:02:03") == 3723
+    assert parse_timestamp("62:03") == 3723
+    assert parse_timestamp("90.5") == 90.5
+    with pytest.raises(ValueError):
+        parse_timestamp("ten")
+
+    assert parse_transcript_request("https://youtu.be/abc-123defg") == ("https://youtu.be/abc-123defg", None, None, None)
+    assert parse_transcript_request("https://youtu.be/abc-123defg 10:00-15:30") == \
+        ("https://youtu.be/abc-123defg", "time", "10:00", "15:30")
+    assert parse_transcript_request("https://youtu.be/abc-123defg segments 100-") == \
+        ("https://youtu.be/abc-123defg", "segments", "100", None)
+
+
+def test_tool_pages_through_a_long_video(monkeypatch, tmp_path):
+    monkeypatch.setenv("YT_AGENT_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("YT_AGENT_DISABLE_CACHE", raising=False)
+    import src.cache as cache_module
+    from src.transcript_index import TranscriptIndex, set_transcript_index
+
+    monkeypatch.setattr(cache_module, "_transcript_cache", None)
+    previous_index = set_transcript_index(TranscriptIndex(str(tmp_path / "index")))
+    fetches = []
+
+    def source(video_id):
+        fetches.append(video_id)
+        return make_segments()
+
+    previous = set_transcript_source(source)
+    try:
+        url = "https://www.youtube.com/watch?v=aaaaaaaaaaa"
+        page = extract_video_transcript(f"{url} 10:00-10:20")
+        windowed = extract_video_transcript(f"{url} segments 898-")
+        full = extract_video_transcript(url)
+        keyword = extract_video_transcript(url, start=3590)
+    finally:
+        set_transcript_source(previous)
+        set_transcript_index(previous_index).close()
+        monkeypatch.setattr(cache_module, "_transcript_cache", None)
+
+    # Fetched once, then served from the compact cache entry
+    assert fetches == ["aaaaaaaaaaa"]
+    assert page.startswith("Transcript 10:00-10:20 (segments 150-154 of 900, video length 1:00:00):\n")
+    assert "line 150 says something" in page and "line 155" not in page
+    assert page.endswith("[Continues at 10:20]")
+    assert windowed.endswith("line 898 says something line 899 says something")
+    assert full.startswith("line 0 says something line 1")
+    assert "segments 897-899" in keyword
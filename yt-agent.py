@@ -1,65 +1,199 @@
 # yt-agent.py
+import time
+
+_STARTED = time.perf_counter()
+
+import argparse
+import functools
+import os
+
 from src.agent import create_youtube_agent
-from langchain_core.tools import Tool
-from src.tools import search_youtube_videos, extract_video_transcript, analyze_channel_content
+from src.tools import create_youtube_tools
 from src.agent import ollama_model
 
+_IMPORTED = time.perf_counter()
+
+
+def run_batch_mode(args):
+    """Answer every query in a JSONL file without prompting"""
+    from src.batch import load_batch_queries, run_batch
+    
+    queries = load_batch_queries(args.batch)
+    output_path = args.output or args.batch.rsplit(".", 1)[0] + ".results.jsonl"
+    
+    agent_factory = functools.partial(
+        create_youtube_agent,
+        tools=create_youtube_tools(),
+        model_name=args.model,
+        verbose=False,
+        chat_mode=args.chat or None,
+        router_model=args.router_model,
+        pipeline=args.pipeline or None,
+        base_urls=args.ollama_url
+    )
+    
+    def report(record):
+        status = "error: " + record["error"] if record["error"] else f"{record['latency_ms'] / 1000:.1f}s"
+        print(f"[{record['id']}] {status}", flush=True)
+    
+    print(f"Running {len(queries)} queries from {args.batch} with {args.workers} workers "
+          f"({args.max_inflight} concurrent LLM requests), writing {output_path}")
+    summary = run_batch(
+        queries, output_path, agent_factory,
+        workers=args.workers, max_inflight_llm=args.max_inflight,
+        resume=not args.no_resume, on_result=report
+    )
+    print(f"Done: {summary['completed']} completed, {summary['failed']} failed, "
+          f"{summary['skipped']} skipped from an earlier run")
+
+def run_service_mode(args):
+    """Serve queries over HTTP with the model kept loaded between them"""
+    from src.server import build_service, run_server
+    
+    print(f"Starting YouTube Agent service with Ollama model {args.model} on http://{args.host}:{args.port}")
+    service = build_service(
+        args.model,
+        chat_mode=args.chat or None,
+        max_concurrent=args.max_concurrent,
+        max_queue=args.max_queue,
+        router_model=args.router_model,
+        pipeline=args.pipeline or None,
+        base_urls=args.ollama_url
+    )
+    run_server(service, host=args.host, port=args.port)
 
+def print_timings(time_to_prompt, first_query, preload, warm_up):
+    """Report where startup time went once the first query has been answered"""
+    print(f"\n[timings] imports: {(_IMPORTED - _STARTED) * 1000:.0f} ms")
+    print(f"[timings] time to prompt (excluding time spent answering prompts): {time_to_prompt * 1000:.0f} ms")
+    if preload.done():
+        print(f"[timings] background module preload: {preload.duration * 1000:.0f} ms")
+    if warm_up.error is not None:
+        print(f"[timings] model warm-up failed: {warm_up.error}")
+    elif warm_up.done():
+        load_ms = (warm_up.result or {}).get("load_ms", 0)
+        print(f"[timings] model warm-up: {warm_up.duration * 1000:.0f} ms (Ollama load {load_ms:.0f} ms)")
+    else:
+        print("[timings] model warm-up: still running")
+    print(f"[timings] first query: {first_query * 1000:.0f} ms")
+
+def parse_args():
+    from src.batch import DEFAULT_BATCH_WORKERS, DEFAULT_MAX_INFLIGHT_LLM
+    from src.server import DEFAULT_MAX_CONCURRENT, DEFAULT_MAX_QUEUE
+    
+    parser = argparse.ArgumentParser(description="YouTube content analysis agent")
+    parser.add_argument("--batch", metavar="QUERIES.jsonl", help="answer the queries in a JSONL file instead of prompting")
+    parser.add_argument("--output", metavar="RESULTS.jsonl", help="where batch results are appended (default: <batch>.results.jsonl)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_BATCH_WORKERS, help="queries processed at once in batch mode")
+    parser.add_argument("--max-inflight", type=int, default=DEFAULT_MAX_INFLIGHT_LLM, help="cap on concurrent Ollama requests in batch mode")
+    parser.add_argument("--no-resume", action="store_true", help="rerun queries already answered in the output file")
+    parser.add_argument("--serve", action="store_true", help="run as an HTTP service instead of prompting")
+    parser.add_argument("--host", default="127.0.0.1", help="address the service listens on")
+    parser.add_argument("--port", type=int, default=8080, help="port the service listens on")
+    parser.add_argument("--max-concurrent", type=int, default=DEFAULT_MAX_CONCURRENT, help="queries the service runs at once")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="queries the service queues before rejecting with 503")
+    parser.add_argument("--model", default="mistral:latest", help="Ollama model used in batch and service modes")
+    parser.add_argument("--chat", action="store_true", help="use the chat API invocation mode in batch and service modes")
+    parser.add_argument("--router-model", default=os.environ.get("YT_AGENT_ROUTER_MODEL") or None,
+                        help="small Ollama model that picks tool calls, leaving the final answer to the main model")
+    parser.add_argument("--pipeline", action="store_true", help="run search, transcripts and channel analysis directly for topic queries, then answer in one LLM call")
+    parser.add_argument("--ollama-url", action="append", metavar="URL", help="Ollama server to use; repeat to spread queries over several")
+    parser.add_argument("--timings", action="store_true", help="report import time, time to prompt and first-query latency")
+    return parser.parse_args()
 
 def main():
     """Main application entry point"""
+    args = parse_args()
+    if args.batch:
+        run_batch_mode(args)
+        return
+    if args.serve:
+        run_service_mode(args)
+        return
+    
     print("Initializing YouTube Agent with Ollama...")
     
-    # Create list of tools as proper Tool objects
-    youtube_tools = [
-        Tool(
-            name="search_youtube_videos",
-            func=search_youtube_videos,
-            description="Search for YouTube videos based on the query."
-        ),
-        Tool(
-            name="extract_video_transcript",
-            func=extract_video_transcript,
-            description="Extract the transcript from a YouTube video."
-        ),
-        Tool(
-            name="analyze_channel_content",
-            func=analyze_channel_content,
-            description="Analyze the content of a YouTube channel by examining its videos."
-        )
-    ]
+    # Import langchain and the HTTP clients while the user answers the prompts
+    from src.context import context_tokens_for_model
+    from src.ollama_pool import ollama_urls_from_env
+    from src.startup import start_preload, start_warm_up
+    preload = start_preload()
+    prompt_wait = 0.0
+    
+    def timed_input(prompt):
+        nonlocal prompt_wait
+        start = time.perf_counter()
+        try:
+            return input(prompt)
+        finally:
+            prompt_wait += time.perf_counter() - start
     
     # Get model name from user or use default
-    model_name = input("Enter Ollama model name (default: ollama_model): ").strip() or "mistral:latest"
+    model_name = timed_input("Enter Ollama model name (default: ollama_model): ").strip() or "mistral:latest"
+    
+    # Start loading the model(s) into Ollama while the debug prompt is answered
+    ollama_urls = args.ollama_url or ollama_urls_from_env() or [None]
+    warm_up = start_warm_up(model_name, base_url=ollama_urls[0])
+    for url in ollama_urls[1:]:
+        start_warm_up(model_name, base_url=url)
+    if args.router_model:
+        for url in ollama_urls:
+            start_warm_up(args.router_model, num_ctx=context_tokens_for_model(model_name), base_url=url)
     
     # Ask if debug mode should be enabled
-    debug_mode = input("Enable debug mode to see raw LLM responses? (y/n): ").lower().startswith('y')
+    debug_mode = timed_input("Enable debug mode to see raw LLM responses? (y/n): ").lower().startswith('y')
+    
+    # Create list of tools as proper Tool objects
+    youtube_tools = create_youtube_tools()
     
     # Create agent
     agent = create_youtube_agent(
         tools=youtube_tools,
         model_name=model_name,
         verbose=True,
-        debug=debug_mode
+        debug=debug_mode,
+        router_model=args.router_model,
+        pipeline=args.pipeline or None,
+        base_urls=args.ollama_url
     )
     
     print(f"YouTube Agent ready with Ollama model: {model_name}")
 
     print("Type 'exit' to quit")
+    ready = time.perf_counter()
+    first_query = True
     
     # Simple command loop
     while True:
         user_input = input("\nWhat would you like to know about YouTube content? ")
+        query_start = time.perf_counter()
         
         if user_input.lower() == 'exit':
             print("Goodbye!")
             break
             
         try:
-            response = agent.invoke({"input": user_input})
-            print(f"\nAgent response: {response['output']}")
+            # Stream the answer to the console as it is generated
+            streamed = []
+            
+            def print_token(token):
+                if not streamed:
+                    print("\nAgent response: ", end="")
+                streamed.append(token)
+                print(token, end="", flush=True)
+            
+            response = agent.invoke({"input": user_input}, on_token=print_token)
+            
+            if streamed:
+                print()
+            else:
+                print(f"\nAgent response: {response['output']}")
         except Exception as e:
             print(f"Error: {str(e)}")
+        
+        if first_query and args.timings:
+            print_timings(ready - _STARTED - prompt_wait, time.perf_counter() - query_start, preload, warm_up)
+        first_query = False
 
 if __name__ == "__main__":
     main()